@@ -0,0 +1,104 @@
+"""
+방위각 샘플 스트림 (캡처 스레드 -> 나침반 위젯)
+
+    AzimuthSample(azimuth, timestamp, velocity, confidence)
+        azimuth: 도 (float, 0~360), timestamp: 캡처 시각 (time.perf_counter() 기준 sec)
+        velocity: 도/초 (+ 시계방향), confidence: 0~1
+
+- SampleStream: 프레임마다 push, 의미 있게 바뀐 경우(각도/속도 변화, 오래 안 보냄)에만 샘플을 돌려줌
+- Extrapolator: 위젯 쪽, 화면 갱신 주기마다 마지막 샘플에서 속도로 현재 방위각을 내다봄
+  새 샘플이 와서 값이 튀는 만큼은 blend_sec 동안 서서히 없앰
+"""
+import math
+from typing import NamedTuple
+
+
+class AzimuthSample(NamedTuple):
+    azimuth: float
+    timestamp: float
+    velocity: float
+    confidence: float
+
+
+def _wrap180(deg):
+    return (deg + 180) % 360 - 180
+
+
+class SampleStream:
+    """
+    min_deg: 마지막으로 보낸 샘플에서 예측한 값과 이만큼 달라지면 보냄
+    min_rate: 속도가 이만큼(도/초) 바뀌면 보냄
+    heartbeat: 변화가 없어도 이 간격(초)마다 한 번은 보냄 (위젯이 멈춰있다는 걸 알 수 있게)
+    velocity_alpha: 속도를 직접 안 받을 때 측정값 차분에 거는 EMA
+    """
+    def __init__(self, min_deg=0.5, min_rate=3.0, heartbeat=0.5, velocity_alpha=0.5):
+        self.min_deg = min_deg
+        self.min_rate = min_rate
+        self.heartbeat = heartbeat
+        self.velocity_alpha = velocity_alpha
+        self.reset()
+
+    def reset(self):
+        self.last = None  # 마지막으로 보낸 샘플
+        self._prev = None  # 마지막으로 받은 (azimuth, timestamp)
+        self._velocity = 0.0
+        self.pushed = 0
+        self.emitted = 0
+
+    def push(self, azimuth, timestamp, confidence=1.0, velocity=None):
+        """-> 보낼 AzimuthSample 또는 None"""
+        self.pushed += 1
+        if velocity is None:
+            if self._prev is not None and timestamp > self._prev[1]:
+                rate = _wrap180(azimuth - self._prev[0]) / (timestamp - self._prev[1])
+                self._velocity += self.velocity_alpha * (rate - self._velocity)
+            velocity = self._velocity
+        self._prev = (azimuth, timestamp)
+
+        last = self.last
+        if last is not None:
+            predicted = last.azimuth + last.velocity * (timestamp - last.timestamp)
+            if (abs(_wrap180(azimuth - predicted)) < self.min_deg
+                    and abs(velocity - last.velocity) < self.min_rate
+                    and timestamp - last.timestamp < self.heartbeat):
+                return None
+        self.last = AzimuthSample(azimuth % 360, timestamp, velocity, confidence)
+        self.emitted += 1
+        return self.last
+
+
+class Extrapolator:
+    """
+    max_ahead: 마지막 샘플 이후 이 시간(초)까지만 속도로 내다봄 (그 뒤로는 멈춤, 잃어버렸을 때 계속 돌지 않게)
+    blend_sec: 새 샘플이 왔을 때 이전 표시값과의 차이를 없애는 시간
+    """
+    def __init__(self, max_ahead=0.15, blend_sec=0.05):
+        self.max_ahead = max_ahead
+        self.blend_sec = blend_sec
+        self.sample = None
+        self._offset = 0.0
+        self._offset_t = 0.0
+
+    def push(self, sample, now):
+        if self.sample is not None:
+            before = self.value(now)
+            self.sample = sample
+            self._offset = _wrap180(before - self._raw(now))
+        else:
+            self.sample = sample
+            self._offset = 0.0
+        self._offset_t = now
+
+    def _raw(self, now):
+        s = self.sample
+        ahead = min(max(now - s.timestamp, 0.0), self.max_ahead)
+        return s.azimuth + s.velocity * ahead
+
+    def value(self, now):
+        """now(perf_counter) 시점에 표시할 방위각 (0~360), 샘플이 없으면 None"""
+        if self.sample is None:
+            return None
+        offset = self._offset
+        if offset:
+            offset *= math.exp(-(now - self._offset_t) / self.blend_sec)
+        return (self._raw(now) + offset) % 360
@@ -0,0 +1,1278 @@
+"""
+방위각 파이프라인 마이크로 벤치마크 (화면/Qt 이벤트 루프 없이 실행)
+
+    python bench.py lines   # Hough 후처리(filter/candidates/cluster) 선 개수별 비용
+    python bench.py pairs   # 120도 쌍 탐색, 기존 전체 비교와 결과 동일성 + 대표 개수별 비용
+    python bench.py edge-output [--frames frames.npz]   # 엣지 이미지 전체 vs ROI 엣지 좌표만 읽어오기
+    python bench.py estimators [--frames frames.npz]    # Hough+클러스터링 vs 동심원 샘플링 vs θ 히스토그램 (비용/검출 수/각도 차이)
+    python bench.py theta [--frames frames.npz]         # θ 히스토그램 커널 vs CPU 기준 구현 (일치 여부) + 엣지 읽기+Hough 대비 시간
+    python bench.py reject [--count 600]                # 엣지 통계로 미니맵 아닌 화면(닫힘/메뉴/로딩) 거르기 끔/켬: 시간, 거른 수, 오검출
+                                                        #   + 경로(pyramid/points/pipeline/batch/ring/theta)마다 같은 프레임을 거르는지
+    python bench.py pipeline [--frames frames.npz]      # 동기 vs 더블 버퍼 비동기 엣지 (처리량/지연)
+    python bench.py upload [--frames frames.npz]        # BGRA 전체 vs B 채널 평면만 업로드 (전송량/지연)
+    python bench.py capture --source synthetic|file|mss|xshm [--process] [--alloc]   # 캡처 소스 처리량/프레임당 할당
+    python bench.py multiroi [--workers 1 4]            # 한 번 grab + ROI별 sub-view, 공용 풀에서 분석 (ROI별 시간)
+    python bench.py batch [--sizes 1 4 16 64]           # 한 장씩 canny vs K장 묶음 커널 (frames/sec)
+    python bench.py workgroup [--save]                  # OpenCL work-group 크기 / __local 타일 커널 후보별 시간 (캐시 무시)
+    python bench.py startup                             # 첫 HUD 그리기 / 첫 방위각까지 시간 (캐시 없음/있음, 동기 빌드 비교)
+    python bench.py accuracy [--count 2000] [--presets default hard]   # 정답 있는 합성 미니맵: 추정 방식 x 백엔드별 속도 + 각도 오차
+    python bench.py pyramid [--factors 1 2 4]           # hough 한 단계 vs 축소 엣지로 방향 찾고 부채꼴만 정밀화 (속도/오차)
+    python bench.py tracking [--count 2000]             # 추적(예측 주변만 탐색) 끔/켬: 프레임당 시간, 오차, 튐, 잠금 통계
+    python bench.py perf [--backend opencl-cpu]          # 단계별 기록 요약 + 기록 자체 비용 (프레임당 us)
+    python bench.py lag [--seconds 8]                   # 나침반 표시 지연: 기존(200 ms 타이머+애니메이션) vs 샘플+내다보기
+    python bench.py worker [--gui-load-ms 12]           # 스레드 vs 별도 프로세스 방위각 (GUI 수신 지연/간격 흔들림)
+"""
+import argparse
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+import cv2
+import numpy as np
+
+from capture import CaptureSource, FileSource, Frame, SyntheticSource, create_screen_source, load_frames
+from capture_service import CaptureService
+from conf import CAPTURE_MAX_FPS, PERF_WINDOW
+from gpu_util import (
+    EDGE_BACKENDS,
+    GPUUtils,
+    _tuning_key,
+    circular_roi,
+    create_edge_backend,
+    load_tuning_cache,
+    save_tuning_cache,
+)
+from screen_scan import AzimuthCaptureThread
+from synth import PRESETS, SCREENS, MinimapSynth
+from perf import PerfRing, format_snapshot
+from tracker import AzimuthTracker
+
+W, H = 298, 260
+
+
+# -------------------------
+# 기존(루프) 구현: 결과 비교용 기준
+# -------------------------
+def _legacy_filter_lines(lines, center, margin):
+    cx, cy = center
+    filtered = []
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+        line_center_x = (x1 + x2) // 2
+        line_center_y = (y1 + y2) // 2
+        if (cx - margin <= line_center_x <= cx + margin and
+                cy - margin <= line_center_y <= cy + margin):
+            filtered.append(line)
+    return filtered
+
+
+def _legacy_candidates(lines, center):
+    cx, cy = center
+    cands = []
+    for line in lines:
+        x1, y1, x2, y2 = line[0]
+        length = math.hypot(x2 - x1, y2 - y1)
+        d1 = (x1 - cx)**2 + (y1 - cy)**2
+        d2 = (x2 - cx)**2 + (y2 - cy)**2
+        if d1 >= d2:
+            dx, dy = x1 - cx, y1 - cy
+        else:
+            dx, dy = x2 - cx, y2 - cy
+        azimuth = (math.degrees(math.atan2(dy, dx)) + 360) % 360
+        mx = (x1 + x2) * 0.5
+        my = (y1 + y2) * 0.5
+        dist_center = math.hypot(mx - cx, my - cy)
+        score = length * (1.0 / (1.0 + dist_center / 80.0))
+        cands.append({"az": azimuth, "len": length, "dist": dist_center, "score": score})
+    return cands
+
+
+def _legacy_cluster_angles(cands, merge_deg=6):
+    cands = sorted(cands, key=lambda c: c["az"])
+    clusters = []
+    for c in cands:
+        placed = False
+        for cl in clusters:
+            d = abs(c["az"] - cl["rep"]["az"])
+            d = min(d, 360 - d)
+            if d <= merge_deg:
+                if c["score"] > cl["rep"]["score"]:
+                    cl["rep"] = c
+                placed = True
+                break
+        if not placed:
+            clusters.append({"rep": c})
+    return [cl["rep"] for cl in clusters]
+
+
+def _legacy_reps(lines, center, merge_deg):
+    filtered = _legacy_filter_lines(lines, center, margin=90)
+    reps = _legacy_cluster_angles(_legacy_candidates(filtered, center), merge_deg)
+    return [r["az"] for r in reps], [r["score"] for r in reps]
+
+
+def _legacy_pick_pair_120(reps, prev_pair=None, target=120, tol=6):
+    def ang_diff(a, b):
+        d = abs(a - b) % 360
+        return min(d, 360 - d)
+
+    best = None
+    best_score = -1e18
+    for i in range(len(reps)):
+        for j in range(i+1, len(reps)):
+            a, b = reps[i]["az"], reps[j]["az"]
+            if abs(ang_diff(a, b) - target) > tol:
+                continue
+            pair_score = reps[i]["score"] + reps[j]["score"]
+            if prev_pair is not None:
+                p1, p2 = prev_pair
+                dmatch = min(
+                    ang_diff(a, p1) + ang_diff(b, p2),
+                    ang_diff(a, p2) + ang_diff(b, p1),
+                )
+                pair_score += 200.0 / (1.0 + dmatch)
+            if pair_score > best_score:
+                best_score = pair_score
+                best = (a, b)
+    return best
+
+
+def _numpy_reps(thread, lines, center, merge_deg):
+    filtered = thread._filter_lines(lines, center, margin=90)
+    reps = thread._cluster_angles(thread._candidates(filtered, center), merge_deg)
+    return reps["az"].tolist(), reps["score"].tolist()
+
+
+def _same_reps(a, b):
+    # np.arctan2 / math.atan2 는 마지막 1ulp 정도 다를 수 있음
+    return len(a[0]) == len(b[0]) and np.allclose(a, b, rtol=1e-12, atol=1e-9)
+
+
+# -------------------------
+# 입력 생성 / 측정 도구
+# -------------------------
+def _random_lines(rng, n, w=W, h=H):
+    """HoughLinesP 출력 모양 (n, 1, 4) int32: 중심에서 뻗는 선 + 무작위 잡선"""
+    cx, cy = w // 2, h // 2
+    n_radial = n // 2
+    base = rng.uniform(0, 360, size=4)
+    ang = np.radians(rng.choice(base, size=n_radial) + rng.normal(0, 3, size=n_radial))
+    r0 = rng.uniform(0, 30, size=n_radial)
+    r1 = r0 + rng.uniform(10, 110, size=n_radial)
+    radial = np.stack([cx + r0 * np.cos(ang), cy + r0 * np.sin(ang),
+                       cx + r1 * np.cos(ang), cy + r1 * np.sin(ang)], axis=1)
+    clutter = rng.uniform(0, 1, size=(n - n_radial, 4)) * [w, h, w, h]
+    lines = np.concatenate([radial, clutter]).round().astype(np.int32)
+    rng.shuffle(lines)
+    return lines.reshape(-1, 1, 4)
+
+
+def _random_reps(rng, n):
+    """클러스터 대표 모양: 120도 떨어진 쌍 몇 개 + 무작위 각도, 일부는 점수 동점"""
+    az = rng.uniform(0, 360, size=n)
+    k = n // 4
+    az[:k] = (az[k:2 * k] + 120 + rng.normal(0, 4, size=k)) % 360
+    az = np.round(az, int(rng.integers(0, 3)))  # 정수/소수 1자리 -> 경계값, 동점 유도
+    score = np.round(rng.uniform(5, 150, size=n), int(rng.integers(0, 2)))
+    return {"az": az, "score": score}
+
+
+def _time_us(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)) * 1e6
+
+
+def _bench_frames(path, count=50):
+    if path:
+        return load_frames(path)
+    # 녹화 프레임처럼 연속으로 도는 시퀀스 (프레임 사이 EMA/이전 쌍 상태가 의미 있게)
+    synth = MinimapSynth(W, H, **PRESETS["default"])
+    return [bgra.copy() for bgra, _ in synth.walk(count)]
+
+
+def _available_backends(names=None):
+    backends = []
+    for name in names or EDGE_BACKENDS:
+        try:
+            backends.append(create_edge_backend(name))
+        except Exception as e:
+            print(f"[skip] {name}: {e}")
+    return backends
+
+
+def _make_thread():
+    return AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils("numpy"))
+
+
+# -------------------------
+# 벤치마크
+# -------------------------
+def bench_lines(args):
+    thread = _make_thread()
+    rng = np.random.default_rng(args.seed)
+    center = (W // 2, H // 2)
+    merge_deg = thread.azimuth_threshold
+
+    print(f"{'lines':>6} {'loop us':>10} {'numpy us':>10} {'speedup':>8} {'same reps':>10}")
+    for n in args.counts:
+        frames = [_random_lines(rng, n) for _ in range(args.frames)]
+        same = sum(_same_reps(_legacy_reps(l, center, merge_deg), _numpy_reps(thread, l, center, merge_deg))
+                   for l in frames)
+        it = iter(frames * args.repeat)
+        t_loop = _time_us(lambda: _legacy_reps(next(it), center, merge_deg), len(frames) * args.repeat)
+        it = iter(frames * args.repeat)
+        t_np = _time_us(lambda: _numpy_reps(thread, next(it), center, merge_deg), len(frames) * args.repeat)
+        print(f"{n:>6} {t_loop:>10.1f} {t_np:>10.1f} {t_loop / t_np:>7.1f}x {same:>5}/{len(frames)}")
+
+
+def bench_pairs(args):
+    thread = _make_thread()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'reps':>6} {'loop us':>10} {'sorted us':>10} {'speedup':>8} {'same pair':>10}")
+    for n in args.counts:
+        # 기존 전체 비교가 n^2 이라 큰 n에서는 케이스 수를 줄임
+        cases = []
+        for _ in range(max(10, min(args.frames, 10_000_000 // n**2))):
+            reps = _random_reps(rng, n)
+            prev_pair = None if rng.random() < 0.3 else tuple(rng.uniform(0, 360, size=2).tolist())
+            legacy = [{"az": a, "score": sc} for a, sc in zip(reps["az"].tolist(), reps["score"].tolist())]
+            cases.append((reps, legacy, prev_pair))
+
+        same = sum(_legacy_pick_pair_120(legacy, prev_pair) == thread._pick_pair_120(reps, prev_pair)
+                   for reps, legacy, prev_pair in cases)
+        it = iter(cases)
+        t_loop = _time_us(lambda: _legacy_pick_pair_120(*next(it)[1:]), len(cases))
+        it = iter(cases)
+        t_new = _time_us(lambda: thread._pick_pair_120(*next(it)[::2]), len(cases))
+        print(f"{n:>6} {t_loop:>10.1f} {t_new:>10.1f} {t_loop / t_new:>7.1f}x {same:>5}/{len(cases)}")
+
+
+def bench_edge_output(args):
+    frames = _bench_frames(args.frames)
+    h, w = frames[0].shape[:2]
+    roi = circular_roi(w, h)
+
+    print(f"{'backend':<11} {'mode':<7} {'readback B':>11} {'p50 us':>9} {'p95 us':>9}")
+    for backend in _available_backends(args.backends):
+        backend.canny(frames[0])
+        backend.edge_points(frames[0], roi)
+        for mode in ("image", "points"):
+            times, nbytes = [], []
+            for _ in range(args.repeat):
+                for frame in frames:
+                    t0 = time.perf_counter()
+                    if mode == "image":
+                        out = backend.canny(frame)
+                        nbytes.append(out.nbytes)
+                    else:
+                        out = backend.edge_points(frame, roi)
+                        nbytes.append(4 + out.nbytes)  # 개수 + 좌표
+                    times.append(time.perf_counter() - t0)
+            p50, p95 = np.percentile(np.asarray(times) * 1e6, [50, 95])
+            print(f"{backend.name:<11} {mode:<7} {np.mean(nbytes):>11.0f} {p50:>9.1f} {p95:>9.1f}")
+
+
+def bench_estimators(args):
+    from replay import compare_angles
+
+    frames = _bench_frames(args.frames)
+    thread = _make_thread()
+    results = {}
+
+    print(f"{'estimator':<10} {'found':>8} {'p50 us':>9} {'p95 us':>9}")
+    for estimator in ("hough", "ring", "theta"):
+        thread.estimator = estimator
+        thread.calculate_angle(frames[0])  # 워밍업 (LUT 등)
+        times = []
+        for _ in range(args.repeat):
+            thread.reset_tracking()
+            angles = []
+            for frame in frames:
+                t0 = time.perf_counter()
+                angles.append(thread.calculate_angle(frame))
+                times.append(time.perf_counter() - t0)
+        results[estimator] = angles
+        p50, p95 = np.percentile(np.asarray(times) * 1e6, [50, 95])
+        found = sum(a is not None for a in angles)
+        print(f"{estimator:<10} {found:>4}/{len(frames):<3} {p50:>9.1f} {p95:>9.1f}")
+
+    for other in ("ring", "theta"):
+        both = [(a, b) for a, b in zip(results["hough"], results[other]) if a is not None and b is not None]
+        diffs = [min(abs(a - b) % 360, 360 - abs(a - b) % 360) for a, b in both]
+        n_diff, _, _ = compare_angles(results[other], results["hough"])
+        if diffs:
+            print(f"hough/{other} both found: {len(both)} frames, mean diff {np.mean(diffs):.1f} deg, "
+                  f"max {max(diffs)} deg, {n_diff} frames differ")
+
+
+def bench_theta(args):
+    """
+    1) OpenCL theta_histogram / theta_peaks 를 CPU 기준 구현(EdgeBackend 기본 구현, numpy 백엔드)과 비교
+       히스토그램은 bin 경계에 걸린 픽셀(atan2 float 오차)만큼 다를 수 있어서 다른 bin 수, 봉우리는 각도 차이 최대값
+    2) 프레임당 시간: 엣지 이미지 + HoughLinesP (기존) vs 디바이스 히스토그램 + 봉우리만 읽기 (calculate_angle 전체)
+    """
+    frames = _bench_frames(args.frames)
+    reference = create_edge_backend("numpy")
+    backends = _available_backends(args.backends)
+
+    print(f"{'backend':<11} {'hist bins diff':>14} {'peak frames diff':>16} {'peak max deg':>12}")
+    for backend in backends:
+        bins_diff, peak_frames, peak_deg = 0, 0, 0.0
+        for frame in frames:
+            bins_diff += int(np.count_nonzero(backend.theta_histogram(frame) != reference.theta_histogram(frame)))
+            got, want = backend.theta_peaks(frame), reference.theta_peaks(frame)
+            if got.shape != want.shape:
+                peak_frames += 1
+                continue
+            if len(got):
+                d = float(np.max(np.abs(got - want)))
+                peak_deg = max(peak_deg, d)
+                peak_frames += d > 1e-3
+        print(f"{backend.name:<11} {bins_diff:>14} {peak_frames:>11}/{len(frames):<4} {peak_deg:>12.4f}")
+
+    print(f"\n{'backend':<11} {'estimator':<9} {'found':>8} {'p50 us':>9} {'p95 us':>9}")
+    for backend in backends:
+        thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(backend))
+        for estimator in ("hough", "theta"):
+            thread.estimator = estimator
+            thread.calculate_angle(frames[0])  # 워밍업
+            times = []
+            for _ in range(args.repeat):
+                thread.reset_tracking()
+                angles = []
+                for frame in frames:
+                    t0 = time.perf_counter()
+                    angles.append(thread.calculate_angle(frame))
+                    times.append(time.perf_counter() - t0)
+            p50, p95 = np.percentile(np.asarray(times) * 1e6, [50, 95])
+            found = sum(a is not None for a in angles)
+            print(f"{backend.name:<11} {estimator:<9} {found:>4}/{len(frames):<3} {p50:>9.1f} {p95:>9.1f}")
+
+
+def bench_reject(args):
+    """
+    합성 미니맵과 미니맵이 아닌 화면(synth.SCREENS)을 섞은 프레임으로 edge_stats_reject 끔/켬 비교
+    false reject = 끄면 방위각이 나오는 미니맵 프레임을 거름, false angle = 미니맵이 아닌데 방위각이 나옴
+    """
+    synth = MinimapSynth(**PRESETS[args.preset], seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    frames, kinds = [], []
+    for _ in range(args.count):
+        if rng.random() < args.other:
+            kind = SCREENS[int(rng.integers(len(SCREENS)))]
+            frames.append(synth.render_screen(kind).copy())
+        else:
+            kind = "minimap"
+            frames.append(synth.render(float(rng.uniform(0, 360))).copy())
+        kinds.append(kind)
+    kinds = np.asarray(kinds)
+
+    print(f"{args.count} frames ({args.preset}), " + ", ".join(f"{k} {np.sum(kinds == k)}" for k in ("minimap",) + SCREENS))
+    print(f"{'backend':<11} {'reject':<6} {'us/frame':>9} " + " ".join(f"{k + ' us':>11}" for k in ("minimap",) + SCREENS)
+          + f" {'rejected':>9} {'false rej':>9} {'false ang':>9} {'est saved':>10}")
+    for backend in _available_backends(args.backends):
+        found_off = None
+        for reject in (False, True):
+            thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(backend))
+            thread.estimator = args.estimator
+            thread.edge_stats_reject = reject
+            thread.calculate_angle(frames[0])  # 워밍업
+            thread.reject_stats = dict.fromkeys(thread.reject_stats, 0)
+            times, found = [], []
+            for frame in frames:
+                thread.reset_tracking()
+                t0 = time.perf_counter_ns()
+                angle = thread.calculate_angle(frame)
+                times.append((time.perf_counter_ns() - t0) / 1000)
+                found.append(angle is not None)
+            times, found = np.asarray(times), np.asarray(found)
+            if found_off is None:
+                found_off = found
+            minimap = kinds == "minimap"
+            per_kind = " ".join(f"{times[kinds == k].mean():>11.0f}" if np.any(kinds == k) else f"{'-':>11}"
+                                for k in ("minimap",) + SCREENS)
+            stats = thread.reject_stats
+            false_rej = int(np.sum(minimap & found_off & ~found)) if reject else 0
+            print(f"{backend.name:<11} {'on' if reject else 'off':<6} {times.mean():>9.0f} {per_kind} "
+                  f"{stats['rejected']:>9} {false_rej:>9} {int(np.sum(~minimap & found)):>9} "
+                  f"{stats['saved_cpu_ns'] / 1e6:>8.1f}ms")
+
+    # 경로마다 같은 프레임을 거르는지 (기준: 프레임마다 calculate_angle, 엣지 이미지)
+    print(f"\nreject on, per mode ({args.backends[0] if args.backends else 'numpy'}): same rejected frames as \"image\"?")
+    print("(angles differ: vs the same estimator without batch/pipeline, pyramid/points see different edges)")
+    print(f"{'mode':<16} {'rejected':>9} {'differ':>7} {'false ang':>9} {'angles differ':>14}")
+    backend = _available_backends(args.backends or ["numpy"])[0]
+    reference = None
+    per_frame = {}
+    for mode in REJECT_MODES:
+        thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(backend))
+        thread.edge_stats_reject = True
+        thread.skip_unchanged = False
+        rejected, angles = _run_reject_mode(thread, frames, mode)
+        if reference is None:
+            reference = rejected
+        estimator, output, pyramid, depth, batch = REJECT_MODES[mode]
+        if depth == 1 and not batch and not pyramid:
+            per_frame.setdefault(estimator, angles)
+        base = per_frame.get(estimator)
+        differ = "-" if base is None or base is angles or pyramid or output != "image" else sum(a != b for a, b in zip(angles, base))
+        false_ang = sum(a is not None for a, k in zip(angles, kinds) if k != "minimap")
+        print(f"{mode:<16} {int(rejected.sum()):>9} {int(np.sum(rejected != reference)):>7} {false_ang:>9} {differ:>14}")
+
+
+# bench.py reject 에서 비교하는 경로 (estimator, 엣지 출력, pyramid, pipeline depth, batch)
+REJECT_MODES = {
+    "image": ("hough", "image", 0, 1, 0),
+    "pyramid2": ("hough", "image", 2, 1, 0),
+    "pyramid4": ("hough", "image", 4, 1, 0),
+    "points": ("hough", "points", 0, 1, 0),
+    "pipeline2": ("hough", "image", 0, 2, 0),
+    "pipeline3": ("hough", "image", 0, 3, 0),
+    "batch8": ("hough", "image", 0, 1, 8),
+    "ring": ("ring", "image", 0, 1, 0),
+    "ring-batch8": ("ring", "image", 0, 1, 8),
+    "theta": ("theta", "image", 0, 1, 0),
+    "theta-pipeline2": ("theta", "image", 0, 2, 0),
+}
+
+
+def _run_reject_mode(thread, frames, mode):
+    """REJECT_MODES 경로로 전체 프레임 -> (거른 프레임 bool 배열, 프레임 순서 방위각 리스트)"""
+    estimator, output, pyramid, depth, batch = REJECT_MODES[mode]
+    thread.estimator = estimator
+    thread.edge_output = output
+    thread.pyramid = pyramid
+    thread.pipeline_depth = depth
+    rejected = np.zeros(len(frames), dtype=bool)
+    reject = thread._reject_implausible
+
+    def record(now):
+        # 모든 경로가 프레임 순서대로 한 번씩 검사하므로 검사한 수 - 1 = 프레임 번호
+        rejected[thread.reject_stats["frames"] - 1] = True
+        return reject(now)
+
+    thread._reject_implausible = record
+    if batch:
+        angles = thread.calculate_angles(frames, batch)
+    elif depth > 1:
+        angles = []
+        for frame in frames:
+            done, angle = thread.process_frame_pipelined(frame)
+            if done:
+                angles.append(angle)
+        angles += thread.drain_pipeline()
+    else:
+        angles = [thread.calculate_angle(frame) for frame in frames]
+    return rejected, angles
+
+
+def _run_pipeline(thread, frames, depth):
+    """return: (angles, 전체 sec, 프레임별 지연 sec) 지연 = 프레임을 넣은 시점 ~ 방위각이 나온 시점"""
+    thread.reset_tracking()
+    angles, latency, t_in = [], [], deque()
+    t_start = time.perf_counter()
+    for frame in frames:
+        t_in.append(time.perf_counter())
+        if depth > 1:
+            done, angle = thread.process_frame_pipelined(frame)
+            finished = [angle] if done else []
+        else:
+            finished = [thread.process_frame(frame)]
+        for angle in finished:
+            angles.append(angle)
+            latency.append(time.perf_counter() - t_in.popleft())
+    for angle in thread.drain_pipeline():
+        angles.append(angle)
+        latency.append(time.perf_counter() - t_in.popleft())
+    return angles, time.perf_counter() - t_start, latency
+
+
+def bench_pipeline(args):
+    frames = _bench_frames(args.frames)
+
+    print(f"{'backend':<11} {'depth':>5} {'frames/s':>9} {'lat p50 ms':>11} {'lat p95 ms':>11} {'same angles':>12}")
+    for backend in _available_backends(args.backends):
+        thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(backend))
+        thread.skip_unchanged = False
+        reference = None
+        for depth in [1] + args.depths:
+            _run_pipeline(thread, frames[:4], depth)  # 워밍업 (버퍼 세트 할당)
+            fps, lat = [], []
+            for _ in range(args.repeat):
+                angles, total, latency = _run_pipeline(thread, frames, depth)
+                fps.append(len(frames) / total)
+                lat += latency
+            if reference is None:
+                reference = angles
+            p50, p95 = np.percentile(np.asarray(lat) * 1000, [50, 95])
+            print(f"{backend.name:<11} {depth:>5} {np.median(fps):>9.1f} {p50:>11.2f} {p95:>11.2f} "
+                  f"{str(angles == reference):>12}")
+
+
+def bench_upload(args):
+    frames = _bench_frames(args.frames)
+    h, w = frames[0].shape[:2]
+    reference = create_edge_backend("numpy")
+
+    print(f"{'backend':<11} {'upload':<8} {'upload B':>9} {'p50 us':>9} {'p95 us':>9} {'same edges':>11}")
+    for backend in _available_backends([n for n in EDGE_BACKENDS if n.startswith("opencl")]):
+        for channel_only in (False, True):
+            backend.channel_only = channel_only
+            backend.canny(frames[0])  # 워밍업 (버퍼 재할당)
+            same = sum(np.array_equal(backend.canny(f), reference.canny(f)) for f in frames)
+            times = []
+            for _ in range(args.repeat):
+                for frame in frames:
+                    t0 = time.perf_counter()
+                    backend.canny(frame)
+                    times.append(time.perf_counter() - t0)
+            p50, p95 = np.percentile(np.asarray(times) * 1e6, [50, 95])
+            mode = "channel" if channel_only else "bgra"
+            print(f"{backend.name:<11} {mode:<8} {w * h * backend.stride:>9} {p50:>9.1f} {p95:>9.1f} "
+                  f"{same:>6}/{len(frames)}")
+
+
+def bench_capture(args):
+    if args.source == "file":
+        if not args.frames:
+            raise SystemExit("--source file needs --frames")
+        source = FileSource(args.frames, loop=True)
+    elif args.source in ("mss", "xshm"):
+        source = create_screen_source(args.rect, args.source)
+    else:
+        source = SyntheticSource(W, H)
+
+    thread = None
+    if args.process:
+        thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(args.backend), source=source)
+
+    grab_s, process_s, found = [], [], 0
+    with source:
+        t_end = time.perf_counter() + args.seconds
+        while time.perf_counter() < t_end:
+            t0 = time.perf_counter()
+            frame = source.grab()
+            if frame is None:
+                break
+            t1 = time.perf_counter()
+            grab_s.append(t1 - t0)
+            if thread is not None:
+                found += thread.process_frame(frame.bgra) is not None
+                process_s.append(time.perf_counter() - t1)
+
+    n = len(grab_s)
+    total = sum(grab_s) + sum(process_s)
+    p50, p95 = np.percentile(np.asarray(grab_s) * 1e6, [50, 95])
+    print(f"source: {source.name}  frames: {n}  {n / total:.1f} frames/sec")
+    print(f"grab     p50 {p50:>9.1f} us  p95 {p95:>9.1f} us")
+    if process_s:
+        p50, p95 = np.percentile(np.asarray(process_s) * 1e6, [50, 95])
+        print(f"process  p50 {p50:>9.1f} us  p95 {p95:>9.1f} us  angle found {found}/{n} "
+              f"(backend {thread.gpu_utils.backend_name})")
+
+    if args.alloc:
+        # 한 번 grab 하는 동안 파이썬 힙에 잠깐 잡힌 최대 바이트 (프레임마다 새 버퍼를 만들면 w*h*4 근처)
+        peaks = []
+        with source:
+            source.grab()
+            tracemalloc.start()
+            for _ in range(200):
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                frame = source.grab()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+                del frame
+            tracemalloc.stop()
+        print(f"alloc    peak {np.mean(peaks) / 1024:>8.1f} KB/frame")
+
+
+class _HudSource(CaptureSource):
+    """합성 미니맵을 더 큰 HUD 화면(노이즈) 안에 붙인 프레임"""
+    name = "synthetic-hud"
+
+    def __init__(self, rect, minimap_rect):
+        x1, y1, x2, y2 = rect
+        mx1, my1, mx2, my2 = minimap_rect
+        self.canvas = np.random.default_rng(1).integers(0, 255, size=(y2 - y1, x2 - x1, 4), dtype=np.uint8)
+        self.slot = (slice(my1 - y1, my2 - y1), slice(mx1 - x1, mx2 - x1))
+        self.minimap = SyntheticSource(mx2 - mx1, my2 - my1)
+
+    def open(self):
+        self.minimap.open()
+
+    def grab(self):
+        mini = self.minimap.grab()
+        self.canvas[self.slot] = mini.bgra
+        return Frame(self.canvas, mini.timestamp, mini.index)
+
+
+def _gauge_fill(view, timestamp=None):
+    # 게이지: 빨간 채널이 밝은 칸의 비율
+    return float((view[:, :, 2] > 128).mean())
+
+
+def _compass_edges(view, timestamp=None):
+    gray = cv2.cvtColor(view, cv2.COLOR_BGRA2GRAY)
+    return int(np.count_nonzero(cv2.Canny(gray, 80, 160)))
+
+
+def bench_multiroi(args):
+    rois = {
+        "minimap": (1000, 30, 1000 + W, 30 + H),
+        "compass": (700, 20, 980, 80),
+        "hp": (700, 100, 950, 120),
+        "cooldowns": (700, 140, 980, 200),
+    }
+    analyzers = {"compass": _compass_edges, "hp": _gauge_fill, "cooldowns": _gauge_fill}
+
+    for workers in args.workers:
+        service = CaptureService(rois, workers=workers)
+        source = _HudSource(service.rect, rois["minimap"])
+        thread = AzimuthCaptureThread(rois["minimap"], gpu_utils=GPUUtils(args.backend))
+        thread.skip_unchanged = False
+        service.add_consumer("minimap", thread.process_frame)
+        for name, fn in analyzers.items():
+            service.add_consumer(name, fn)
+
+        with source:
+            for _ in range(5):  # 워밍업
+                service.tick(source)
+            service.reset_timing()
+            t0 = time.perf_counter()
+            for _ in range(args.ticks):
+                service.tick(source)
+            elapsed = time.perf_counter() - t0
+        service.pool.shutdown()
+
+        x1, y1, x2, y2 = service.rect
+        print(f"workers: {workers}  bounding {x2 - x1}x{y2 - y1}  {args.ticks / elapsed:.1f} ticks/sec")
+        for name, p in service.timing_report().items():
+            print(f"  {name:<10} p50 {p[0]:>9.1f} us  p95 {p[1]:>9.1f} us")
+
+
+def bench_batch(args):
+    frames = _bench_frames(args.frames, count=128)
+
+    print(f"{'backend':<11} {'K':>5} {'frames/s':>9} {'vs single':>10} {'same edges':>11}")
+    for backend in _available_backends(args.backends):
+        if args.local and hasattr(backend, "batch_local_size"):
+            backend.batch_local_size = None if args.local == ["auto"] else tuple(map(int, args.local))
+        reference = [backend.canny(f).copy() for f in frames]
+
+        def single():
+            for f in frames:
+                backend.canny(f)
+
+        fps_single = len(frames) / _time_us(single, args.repeat) * 1e6
+        print(f"{backend.name:<11} {'-':>5} {fps_single:>9.1f} {'1.00x':>10} {'-':>11}")
+        for k in args.sizes:
+            starts = range(0, len(frames) - k + 1, k)
+            same = 0
+            for i in starts:
+                out = backend.canny_batch(frames[i:i + k])
+                same += sum(np.array_equal(out[j], reference[i + j]) for j in range(k))
+
+            def batched():
+                for i in starts:
+                    backend.canny_batch(frames[i:i + k])
+
+            fps_batch = len(starts) * k / _time_us(batched, args.repeat) * 1e6
+            print(f"{backend.name:<11} {k:>5} {fps_batch:>9.1f} {fps_batch / fps_single:>9.2f}x "
+                  f"{same:>6}/{len(starts) * k}")
+
+
+def bench_workgroup(args):
+    for name in [n for n in EDGE_BACKENDS if n.startswith("opencl")]:
+        try:
+            backend = EDGE_BACKENDS[name](autotune=False)
+        except Exception as e:
+            print(f"[skip] {name}: {e}")
+            continue
+        best, results = backend.tune_work_group(args.width, args.height, repeat=args.repeat)
+        print(f"{backend.name}: {backend.device.name.strip()} / driver {backend.device.driver_version.strip()}")
+        print(f"  {'kernel':<17} {'local':>8} {'us':>9}")
+        for r in sorted(results, key=lambda r: r["us"]):
+            local = "driver" if r["local"] is None else f"{r['local'][0]}x{r['local'][1]}"
+            mark = "  <- best" if (r["kernel"], r["local"]) == (best["kernel"], best["local"]) else ""
+            print(f"  {r['kernel']:<17} {local:>8} {r['us']:>9.1f}{mark}")
+        if args.save:
+            cache = load_tuning_cache()
+            cache[_tuning_key(backend.device, args.width, args.height, backend.stride)] = {
+                "launch": best, "results": results}
+            save_tuning_cache(cache)
+            print("  saved to work-group cache")
+
+
+# main.py 시작 순서를 화면 없이 흉내: 창 show -> 방위각 스레드 start, 첫 방위각이 나오면 종료
+_STARTUP_SCRIPT = r"""
+import startup
+import os, sys
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication, QWidget
+from capture import SyntheticSource
+from gpu_util import GPUUtils
+import screen_scan
+from screen_scan import AzimuthCaptureThread
+
+screen_scan.EDGE_BACKEND = os.environ.get("BENCH_BACKEND") or None  # 백그라운드 준비도 같은 백엔드로
+
+class Hud(QWidget):
+    def paintEvent(self, event):
+        startup.mark("first HUD paint")
+
+app = QApplication([])
+gpu_utils = GPUUtils(os.environ.get("BENCH_BACKEND") or None) if os.environ.get("BENCH_SYNC") else None
+hud = Hud()
+hud.resize(300, 200)
+hud.show()
+thread = AzimuthCaptureThread((0, 0, 298, 260), gpu_utils=gpu_utils, source=SyntheticSource())
+thread.angle_signal.connect(lambda _: app.quit())
+thread.start()
+QTimer.singleShot(60000, app.quit)
+app.exec_()
+thread.running = False
+thread.wait()
+info = getattr(thread.gpu_utils.backend, "build_info", None)
+print("RESULT", startup.marks.get("first HUD paint"), startup.marks.get("first azimuth"),
+      info["program"] if info else "-", f"{info['ms']:.0f}" if info else "-")
+"""
+
+
+def _run_startup(home, sync, backend):
+    env = dict(os.environ, HOME=home, QT_QPA_PLATFORM="offscreen", PYOPENCL_NO_CACHE="1",
+               BENCH_SYNC="1" if sync else "", BENCH_BACKEND=backend or "")
+    out = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], env=env, capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    for line in out.stdout.splitlines():
+        if line.startswith("RESULT"):
+            paint, azimuth, program, build_ms = line.split()[1:]
+            return float(paint), float(azimuth), program, build_ms
+    raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "no result")
+
+
+def bench_startup(args):
+    print(f"{'mode':<24} {'HUD paint ms':>13} {'azimuth ms':>11} {'program':>8} {'build ms':>9}")
+    for label, sync in (("sync build (old)", True), ("background warm-up", False)):
+        # 모드마다 빈 캐시 폴더에서 시작
+        with tempfile.TemporaryDirectory() as home:
+            for run in range(args.runs):
+                cache = "cold" if run == 0 else "cached"
+                paint, azimuth, program, build_ms = _run_startup(home, sync, args.backend)
+                print(f"{label + ', ' + cache:<24} {paint:>13.0f} {azimuth:>11.0f} {program:>8} {build_ms:>9}")
+
+
+def bench_accuracy(args):
+    """
+    프레임마다 reset_tracking 후 calculate_angle (서로 무관한 방위각이라 EMA/이전 쌍 가점 없이)
+    오차 = 결과와 정답의 원형 차이
+    miss = 결과 없음, wrong = 결과는 있지만 오차 > fail_deg (엉뚱한 쌍), 오차 통계는 나머지(맞은 것)만
+    """
+    backends = _available_backends(args.backends)
+    print(f"{args.count} frames per preset, wrong = error > {args.fail_deg:g} deg, error stats over the rest")
+    print(f"{'preset':<8} {'estimator':<9} {'backend':<11} {'frames/s':>9} {'p50 us':>8} {'p95 us':>8} "
+          f"{'err mean':>9} {'err p95':>8} {'miss':>6} {'wrong':>6} {'fail':>6}")
+    for preset in args.presets:
+        for estimator in args.estimators:
+            for backend in backends:
+                thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(backend))
+                thread.estimator = estimator
+                thread.calculate_angle(MinimapSynth(**PRESETS[preset], seed=args.seed + 1).render(0.0))  # 워밍업
+                # 조합마다 같은 seed 로 다시 생성해서 같은 프레임/정답 (생성 시간은 측정에서 제외)
+                synth = MinimapSynth(**PRESETS[preset], seed=args.seed)
+
+                times_us, errors, miss, wrong = [], [], 0, 0
+                for bgra, truth in synth.frames(args.count):
+                    thread.reset_tracking()
+                    t0 = time.perf_counter_ns()
+                    angle = thread.calculate_angle(bgra)
+                    times_us.append((time.perf_counter_ns() - t0) / 1000)
+                    if angle is None:
+                        miss += 1
+                        continue
+                    d = abs(angle - truth) % 360
+                    err = min(d, 360 - d)
+                    if err > args.fail_deg:
+                        wrong += 1
+                    else:
+                        errors.append(err)
+
+                times_us = np.asarray(times_us)
+                p50, p95 = np.percentile(times_us, [50, 95])
+                if errors:
+                    err_cols = f"{np.mean(errors):>9.2f} {np.percentile(errors, 95):>8.2f}"
+                else:
+                    err_cols = f"{'-':>9} {'-':>8}"
+                n = args.count
+                print(f"{preset:<8} {estimator:<9} {backend.name:<11} {1e6 / times_us.mean():>9.0f} {p50:>8.0f} {p95:>8.0f} "
+                      f"{err_cols} {miss / n:>6.1%} {wrong / n:>6.1%} {(miss + wrong) / n:>6.1%}")
+
+def bench_pyramid(args):
+    """
+    bench_accuracy 와 같은 방식 (프레임마다 reset_tracking), hough 만
+    factor 1 = 기존 한 단계 / 2, 4 = coarse-to-fine (EDGE_PYRAMID)
+    vs 1x = 둘 다 결과가 있는 프레임에서 한 단계 결과와의 차이, coarse = 축소 단계에서 쌍을 찾은 비율
+    speedup = 둘 다 결과가 있는 프레임의 p50 시간 비 (못 찾는 프레임은 일찍 끝나서 전체 p50 은 검출률에 따라 달라짐)
+    """
+    backends = _available_backends(args.backends)
+    print(f"{args.count} frames per preset, hough, wrong = error > {args.fail_deg:g} deg, error stats over the rest")
+    print(f"{'preset':<8} {'backend':<11} {'factor':>6} {'p50 us':>8} {'p95 us':>8} {'speedup':>8} "
+          f"{'err mean':>9} {'err p95':>8} {'vs 1x':>6} {'miss':>6} {'wrong':>6} {'coarse':>7}")
+    for preset in args.presets:
+        for backend in backends:
+            base_times, base_angles = None, None
+            for factor in args.factors:
+                thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(backend))
+                thread.estimator = "hough"
+                thread.pyramid = 0 if factor == 1 else factor
+                thread.calculate_angle(MinimapSynth(**PRESETS[preset], seed=args.seed + 1).render(0.0))  # 워밍업
+                thread.pyramid_stats = {"frames": 0, "coarse_hits": 0}
+                synth = MinimapSynth(**PRESETS[preset], seed=args.seed)
+
+                times_us, angles, errors, miss, wrong = [], [], [], 0, 0
+                for bgra, truth in synth.frames(args.count):
+                    thread.reset_tracking()
+                    t0 = time.perf_counter_ns()
+                    angle = thread.calculate_angle(bgra)
+                    times_us.append((time.perf_counter_ns() - t0) / 1000)
+                    angles.append(angle)
+                    if angle is None:
+                        miss += 1
+                    elif _circ(angle - truth) > args.fail_deg:
+                        wrong += 1
+                    else:
+                        errors.append(_circ(angle - truth))
+
+                times_us = np.asarray(times_us)
+                p50, p95 = np.percentile(times_us, [50, 95])
+                if base_times is None:
+                    base_times, base_angles = times_us, angles
+                found = np.array([a is not None and b is not None for a, b in zip(angles, base_angles)])
+                both = [_circ(a - b) for a, b, ok in zip(angles, base_angles, found) if ok]
+                speedup = np.median(base_times[found]) / np.median(times_us[found]) if found.any() else float("nan")
+                err_cols = f"{np.mean(errors):>9.2f} {np.percentile(errors, 95):>8.2f}" if errors else f"{'-':>9} {'-':>8}"
+                vs = f"{np.mean(both):>6.2f}" if both else f"{'-':>6}"
+                stats = thread.pyramid_stats
+                coarse = f"{stats['coarse_hits'] / stats['frames']:>7.1%}" if stats["frames"] else f"{'-':>7}"
+                n = args.count
+                print(f"{preset:<8} {backend.name:<11} {factor:>6} {p50:>8.0f} {p95:>8.0f} {speedup:>7.2f}x "
+                      f"{err_cols} {vs} {miss / n:>6.1%} {wrong / n:>6.1%} {coarse}")
+
+
+def _circ(d):
+    d = abs(d) % 360
+    return min(d, 360 - d)
+
+
+def bench_tracking(args):
+    """
+    연속 회전 시퀀스(MinimapSynth.walk)를 끊김 없이 처리 (reset 없음), i 번째 프레임의 캡처 시각 = i / fps
+    jump = 연속으로 나온 두 결과의 변화량이 정답 변화량과 jump_deg 넘게 다른 경우
+    """
+    print(f"{args.count} frames, preset {args.preset}, walk max {args.max_step:g} deg/frame, "
+          f"wrong = error > {args.fail_deg:g} deg")
+    print(f"{'estimator':<9} {'tracking':<8} {'us/frame':>9} {'p95 us':>8} {'err mean':>9} {'miss':>6} {'wrong':>6} "
+          f"{'jumps':>6} {'locked':>7} {'locks':>6} {'losses':>7} {'relock':>7}")
+    for estimator in args.estimators:
+        for tracking in (False, True):
+            thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(args.backend))
+            thread.estimator = estimator
+            thread.tracker = AzimuthTracker(gate_deg=args.gate) if tracking else None
+            synth = MinimapSynth(**PRESETS[args.preset], seed=args.seed)
+            thread.calculate_angle(synth.render(0.0))  # 워밍업
+            thread.reset_tracking()
+            synth = MinimapSynth(**PRESETS[args.preset], seed=args.seed)
+
+            times_us, errors, miss, wrong, jumps = [], [], 0, 0, 0
+            prev = None
+            for i, (bgra, truth) in enumerate(synth.walk(args.count, args.max_step)):
+                t0 = time.perf_counter_ns()
+                angle = thread.calculate_angle(bgra, timestamp=i / args.fps)
+                times_us.append((time.perf_counter_ns() - t0) / 1000)
+                if angle is None:
+                    miss += 1
+                    continue
+                err = _circ(angle - truth)
+                if err > args.fail_deg:
+                    wrong += 1
+                else:
+                    errors.append(err)
+                if prev is not None and _circ((angle - prev[0]) - (truth - prev[1])) > args.jump_deg:
+                    jumps += 1
+                prev = (angle, truth)
+
+            n = args.count
+            times_us = np.asarray(times_us)
+            err_mean = f"{np.mean(errors):>9.2f}" if errors else f"{'-':>9}"
+            if tracking:
+                t = thread.tracker.stats()
+                relock = "-" if t["relock_frames_mean"] is None else f"{t['relock_frames_mean']:.1f}"
+                lock_cols = f"{t['lock_ratio']:>7.0%} {t['locks']:>6} {t['losses']:>7} {relock:>7}"
+            else:
+                lock_cols = f"{'-':>7} {'-':>6} {'-':>7} {'-':>7}"
+            print(f"{estimator:<9} {'on' if tracking else 'off':<8} {times_us.mean():>9.0f} "
+                  f"{np.percentile(times_us, 95):>8.0f} {err_mean} {miss / n:>6.1%} {wrong / n:>6.1%} "
+                  f"{jumps:>6} {lock_cols}")
+
+
+def bench_perf(args):
+    frames = _bench_frames(args.frames)
+    thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(args.backend))
+    thread.skip_unchanged = False
+    if thread.perf is None:  # conf.PERF_ENABLED 가 꺼져 있어도 재봄 (백엔드 프로파일링도 같이 켜짐)
+        thread.perf = thread.gpu_utils.perf = PerfRing(PERF_WINDOW)
+    for f in frames[:5]:
+        thread.process_frame(f)  # 워밍업
+    thread.perf.reset()
+
+    # 켠 상태/끈 상태 번갈아 처리 시간 (프레임 처리 흔들림이 커서 참고용)
+    per_frame = {}
+    for label, perf in (("on", thread.perf), ("off", None), ("on", thread.perf)):
+        thread.perf = thread.gpu_utils.perf = perf
+        thread.reset_tracking()
+        t0 = time.perf_counter_ns()
+        for _ in range(args.repeat):
+            for f in frames:
+                thread.process_frame(f)
+        per_frame.setdefault(label, []).append((time.perf_counter_ns() - t0) / 1000 / (len(frames) * args.repeat))
+    thread.perf = thread.gpu_utils.perf = perf
+
+    print(f"backend {thread.gpu_utils.backend_name}, {len(frames)} frames x {args.repeat}")
+    print(format_snapshot(thread.perf_snapshot()))
+    print(f"process_frame: perf on {min(per_frame['on']):.1f} us/frame, off {min(per_frame['off']):.1f} us/frame")
+
+    # 기록 호출만 따로: 한 프레임에서 하는 것과 같은 순서 (grab/check/marks/count 3개/GPU 단계 3개/end)
+    ring = PerfRing()
+    marks = [("start", 0), ("edge", 100), ("hough", 200), ("filter", 300), ("candidates", 400),
+             ("cluster", 500), ("pair", 600), ("ema", 700)]
+    n = 20000
+    t0 = time.perf_counter_ns()
+    for _ in range(n):
+        ring.add("grab", 1000)
+        ring.add("check", 100)
+        ring.add("upload", 10)
+        ring.add("kernel", 10)
+        ring.add("readback", 10)
+        ring.count("lines", 12)
+        ring.count("filtered", 10)
+        ring.count("reps", 3)
+        ring.marks(marks)
+        ring.end(rejected=False)
+    record_us = (time.perf_counter_ns() - t0) / 1000 / n
+    snapshot_us = []
+    for _ in range(20):
+        t0 = time.perf_counter_ns()
+        ring.snapshot()
+        snapshot_us.append((time.perf_counter_ns() - t0) / 1000)
+    print(f"recording: {record_us:.2f} us/frame (+ GPU event reads on OpenCL), "
+          f"snapshot: {np.median(snapshot_us):.0f} us")
+
+
+def _lag_heading(t):
+    # 좌우로 방향을 바꾸며 도는 움직임 (최대 약 110 도/초)
+    return 60 * np.sin(2 * np.pi * 0.2 * t) + 20 * np.sin(2 * np.pi * 0.53 * t)
+
+
+def _run_lag_mode(mode, args):
+    """
+    화면 없는 QApplication 에서 캡처 스레드 -> 나침반 위젯까지 실제 경로 그대로 돌리고
+    60 Hz 로 위젯 회전값과 그 시각의 정답 heading 을 기록 -> (시각, 표시값, 정답) 배열
+    """
+    from PyQt5.QtCore import Qt, QTimer
+    from PyQt5.QtWidgets import QApplication
+    from widgets import CompassWidget
+    from conf import AZIMUTH_DURATION, DISPLAY_FPS
+
+    app = QApplication.instance() or QApplication([])
+    t0 = time.perf_counter()
+    heading = lambda t: _lag_heading(t - t0)
+    source = SyntheticSource(W, H, heading_fn=heading)
+    thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(args.backend), source=source)
+    thread.estimator = args.estimator
+    thread.tracker = AzimuthTracker() if mode == "stream+tracking" else None
+    compass = CompassWidget()
+
+    timer = QTimer()
+    timer.setTimerType(Qt.PreciseTimer)
+    if mode == "old":
+        latest = {"azimuth": 0}
+        thread.angle_signal.connect(lambda a: latest.update(azimuth=a))
+        timer.setInterval(AZIMUTH_DURATION)
+        timer.timeout.connect(lambda: compass.set_rotation_start_ani(latest["azimuth"]))
+    else:
+        thread.sample_signal.connect(lambda sample: compass.set_sample(sample, time.perf_counter()))
+        timer.setInterval(1000 // DISPLAY_FPS)
+        timer.timeout.connect(lambda: compass.advance(time.perf_counter()))
+
+    records = []
+    probe = QTimer()
+    probe.setTimerType(Qt.PreciseTimer)
+    probe.setInterval(16)
+    probe.timeout.connect(lambda: records.append((time.perf_counter(), compass.rotation)))
+
+    timer.start()
+    probe.start()
+    thread.start()
+    QTimer.singleShot(int(args.seconds * 1000), app.quit)
+    app.exec_()
+    timer.stop()
+    probe.stop()
+    thread.running = False
+    thread.wait()
+
+    rec = np.asarray(records[len(records) // 8:])  # 시작 직후(첫 결과 전)는 제외
+    return rec[:, 0] - t0, rec[:, 1], thread.stream
+
+
+def bench_lag(args):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    print(f"{args.seconds:.0f} s per mode, estimator {args.estimator}, backend {args.backend}")
+    print(f"{'mode':<16} {'lag ms':>7} {'err mean':>9} {'err p95':>8} {'samples':>8} {'frames':>7}")
+    taus = np.arange(0, 0.6, 0.002)
+    for mode in ("old", "stream", "stream+tracking"):
+        ts, shown, stream = _run_lag_mode(mode, args)
+
+        def err(tau):
+            return np.abs((shown - _lag_heading(ts - tau) + 180) % 360 - 180)
+
+        # 지연 = 정답을 tau 만큼 늦췄을 때 표시값과 가장 잘 맞는 tau
+        lag = taus[int(np.argmin([err(tau).mean() for tau in taus]))]
+        e_now = err(0)
+        samples = "-" if mode == "old" else stream.emitted
+        print(f"{mode:<16} {lag * 1000:>7.0f} {e_now.mean():>9.2f} {np.percentile(e_now, 95):>8.2f} "
+              f"{samples:>8} {stream.pushed:>7}")
+
+
+def _run_worker_mode(mode, args):
+    """
+    화면 없는 QApplication 에서 방위각을 받아 (수신 시각 - 캡처 시각) 지연, 수신 간격 기록
+    GUI 스레드는 16 ms 마다 gui_load_ms 동안 파이썬 코드로 바쁘게 돌림 (GIL 을 잡는 그리기/이벤트 처리 흉내)
+    process 는 수신 스레드가 슬롯을 읽은 시점까지의 지연도 따로 (GUI 가 바빠서 signal 이 늦게 도착하는 것과 구분)
+    """
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from vision_worker import VisionProcessThread
+
+    app = QApplication.instance() or QApplication([])
+    synth = {"w": W, "h": H, "deg_per_frame": 3.0}
+    if mode == "process":
+        thread = VisionProcessThread((0, 0, W, H), source_spec=("synthetic", synth), backend=args.backend,
+                                     estimator=args.estimator)
+        frame_time = lambda: thread.last_result["timestamp"]
+    else:
+        thread = AzimuthCaptureThread((0, 0, W, H), gpu_utils=GPUUtils(args.backend), source=SyntheticSource(**synth))
+        thread.estimator = args.estimator
+        frame_time = lambda: thread.last_frame_time
+
+    latency_ms, arrivals, read_ms = [], [], []
+
+    def on_angle(_):
+        now = time.perf_counter()
+        latency_ms.append((now - frame_time()) * 1000)
+        arrivals.append(now)
+        if mode == "process":
+            result = thread.last_result
+            read_ms.append((result["received"] - result["timestamp"]) * 1000)
+
+    def busy():
+        t_end = time.perf_counter() + args.gui_load_ms / 1000
+        x = 0
+        while time.perf_counter() < t_end:
+            x += 1
+
+    thread.angle_signal.connect(on_angle)
+    load = QTimer()
+    if args.gui_load_ms:
+        load.timeout.connect(busy)
+        load.start(16)
+    thread.start()
+    QTimer.singleShot(int(args.seconds * 1000), app.quit)
+    app.exec_()
+    load.stop()
+    thread.stop()
+
+    # 워커 프로세스 시작(모듈 import, 백엔드 준비) 구간은 빼고 첫 1초 이후만
+    keep = [i for i, t in enumerate(arrivals) if t - arrivals[0] > 1.0] if arrivals else []
+    lat = np.asarray([latency_ms[i] for i in keep])
+    gaps = np.diff([arrivals[i] for i in keep]) * 1000
+    read = np.asarray([read_ms[i] for i in keep]) if read_ms else None
+    return lat, gaps, read
+
+
+def bench_worker(args):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    print(f"backend {args.backend}, estimator {args.estimator}, GUI load {args.gui_load_ms:.0f} ms / 16 ms, {args.seconds:.0f} s per mode")
+    print(f"{'mode':<8} {'angles':>7} {'lat p50 ms':>11} {'lat p95 ms':>11} {'gap mean ms':>12} {'jitter ms':>10} "
+          f"{'read p50 ms':>12} {'read p95 ms':>12}")
+    for mode in ("thread", "process"):
+        lat, gaps, read = _run_worker_mode(mode, args)
+        if len(gaps) < 2:
+            print(f"{mode:<8} {len(lat):>7}  (not enough angles)")
+            continue
+        p50, p95 = np.percentile(lat, [50, 95])
+        line = f"{mode:<8} {len(lat):>7} {p50:>11.2f} {p95:>11.2f} {gaps.mean():>12.2f} {gaps.std():>10.2f}"
+        if read is not None:
+            r50, r95 = np.percentile(read, [50, 95])
+            line += f" {r50:>12.2f} {r95:>12.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("lines", help="Hough 후처리 비용 (선 개수별)")
+    p.add_argument("--counts", type=int, nargs="+", default=[10, 50, 100, 200, 500, 1000])
+    p.add_argument("--frames", type=int, default=200)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_lines)
+
+    p = sub.add_parser("pairs", help="120도 쌍 탐색 (대표 개수별, 무작위 입력으로 결과 비교)")
+    p.add_argument("--counts", type=int, nargs="+", default=[10, 16, 30, 100, 300, 1000])
+    p.add_argument("--frames", type=int, default=300)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_pairs)
+
+    p = sub.add_parser("edge-output", help="엣지 이미지 전체 vs ROI 엣지 좌표 (읽어오는 양/지연)")
+    p.add_argument("--frames", help="replay.py 형식 프레임 (기본: 합성 프레임)")
+    p.add_argument("--backends", nargs="+", default=None)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_edge_output)
+
+    p = sub.add_parser("reject", help="엣지 통계로 미니맵 아닌 프레임 거르기 끔/켬 (시간, 거른 수, 오검출)")
+    p.add_argument("--count", type=int, default=600)
+    p.add_argument("--other", type=float, default=0.4, help="미니맵이 아닌 화면 비율")
+    p.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    p.add_argument("--estimator", choices=("hough", "ring"), default="hough")
+    p.add_argument("--backends", nargs="+", help="기본: 사용 가능한 전부")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_reject)
+
+    p = sub.add_parser("theta", help="θ 히스토그램 커널 vs CPU 기준 구현 + hough 대비 시간")
+    p.add_argument("--frames", help="replay.py 형식 프레임 (기본: 합성 프레임)")
+    p.add_argument("--backends", nargs="+", help="기본: 사용 가능한 전부")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_theta)
+
+    p = sub.add_parser("estimators", help="방위각 추정 방식 비교 (hough vs ring vs theta)")
+    p.add_argument("--frames", help="replay.py 형식 프레임 (기본: 합성 프레임)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_estimators)
+
+    p = sub.add_parser("pipeline", help="동기 vs 파이프라인 엣지 계산 (처리량/지연)")
+    p.add_argument("--frames", help="replay.py 형식 프레임 (기본: 합성 프레임)")
+    p.add_argument("--backends", nargs="+", default=None)
+    p.add_argument("--depths", type=int, nargs="+", default=[2, 3])
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_pipeline)
+
+    p = sub.add_parser("upload", help="OpenCL 업로드: BGRA 전체 vs B 채널 평면 (전송량/지연)")
+    p.add_argument("--frames", help="replay.py 형식 프레임 (기본: 합성 프레임)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_upload)
+
+    p = sub.add_parser("capture", help="캡처 소스 처리량 (--process 면 방위각 계산까지)")
+    p.add_argument("--source", choices=("synthetic", "file", "mss", "xshm"), default="synthetic")
+    p.add_argument("--frames", help="--source file 일 때 프레임 파일/디렉터리/동영상")
+    p.add_argument("--rect", type=int, nargs=4, default=[0, 0, W, H], metavar=("X1", "Y1", "X2", "Y2"))
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--process", action="store_true")
+    p.add_argument("--backend", default="numpy")
+    p.add_argument("--alloc", action="store_true", help="grab 당 파이썬 힙 할당량 (tracemalloc)")
+    p.set_defaults(func=bench_capture)
+
+    p = sub.add_parser("multiroi", help="한 번 grab + ROI별 sub-view 분석 (공용 풀 크기별, ROI별 시간)")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    p.add_argument("--ticks", type=int, default=300)
+    p.add_argument("--backend", default="numpy")
+    p.set_defaults(func=bench_multiroi)
+
+    p = sub.add_parser("batch", help="한 장씩 canny vs K장 묶음 커널 (frames/sec)")
+    p.add_argument("--frames", help="replay.py 형식 프레임 (기본: 합성 프레임)")
+    p.add_argument("--backends", nargs="+", default=None)
+    p.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16, 64])
+    p.add_argument("--local", nargs="+", help="OpenCL 묶음 커널 work-group 크기 (예: 149 1 1, auto=드라이버)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("workgroup", help="OpenCL work-group 크기 후보별 시간 (--save 로 캐시 갱신)")
+    p.add_argument("--width", type=int, default=W)
+    p.add_argument("--height", type=int, default=H)
+    p.add_argument("--repeat", type=int, default=30)
+    p.add_argument("--save", action="store_true")
+    p.set_defaults(func=bench_workgroup)
+
+    p = sub.add_parser("startup", help="첫 HUD 그리기 / 첫 방위각까지 시간 (별도 프로세스, 임시 캐시 폴더)")
+    p.add_argument("--backend", default=None, help="엣지 백엔드 (기본: 자동 선택)")
+    p.add_argument("--runs", type=int, default=2, help="모드별 실행 횟수 (첫 번째는 캐시 없음)")
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("accuracy", help="정답 있는 합성 미니맵으로 추정 방식 x 백엔드별 속도와 각도 오차")
+    p.add_argument("--count", type=int, default=2000)
+    p.add_argument("--presets", nargs="+", choices=sorted(PRESETS), default=["clean", "default", "hard"])
+    p.add_argument("--estimators", nargs="+", choices=("hough", "ring", "theta"),
+                   default=["hough", "ring", "theta"])
+    p.add_argument("--backends", nargs="+", default=None)
+    p.add_argument("--fail-deg", type=float, default=10.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_accuracy)
+
+    p = sub.add_parser("pyramid", help="hough 한 단계 vs coarse-to-fine (축소 엣지 -> 부채꼴 정밀화)")
+    p.add_argument("--count", type=int, default=500)
+    p.add_argument("--presets", nargs="+", choices=sorted(PRESETS), default=["clean", "default", "hard"])
+    p.add_argument("--factors", nargs="+", type=int, default=[1, 2, 4], help="1 = 기존, 2의 거듭제곱")
+    p.add_argument("--backends", nargs="+", help="기본: 사용 가능한 전부")
+    p.add_argument("--fail-deg", type=float, default=10.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_pyramid)
+
+    p = sub.add_parser("tracking", help="추적 필터 끔/켬 (연속 회전 합성 시퀀스, 프레임당 시간/오차/튐/잠금)")
+    p.add_argument("--count", type=int, default=2000)
+    p.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    p.add_argument("--estimators", nargs="+", choices=("hough", "ring", "theta"),
+                   default=["hough", "ring", "theta"])
+    p.add_argument("--backend", default="numpy")
+    p.add_argument("--max-step", type=float, default=8.0, help="프레임당 최대 회전 (도)")
+    p.add_argument("--gate", type=float, default=12.0)
+    p.add_argument("--fail-deg", type=float, default=10.0)
+    p.add_argument("--jump-deg", type=float, default=10.0)
+    p.add_argument("--fps", type=float, default=CAPTURE_MAX_FPS, help="합성 시퀀스의 프레임 속도 (추적 필터의 프레임 시각)")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_tracking)
+
+    p = sub.add_parser("perf", help="단계별 기록(perf.PerfRing) 요약과 기록 비용")
+    p.add_argument("--frames", help="replay.py 형식 프레임 (기본: 합성 프레임)")
+    p.add_argument("--backend", default="opencl-cpu")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_perf)
+
+    p = sub.add_parser("worker", help="방위각 계산 스레드 vs 별도 프로세스 (GUI 수신 지연/흔들림)")
+    p.add_argument("--backend", default="numpy")
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--estimator", choices=("hough", "ring", "theta"), default="ring",
+                   help="ring 이 합성 프레임에서 검출률이 높아 수신 간격 비교에 적합")
+    p.add_argument("--gui-load-ms", type=float, default=12.0, help="GUI 스레드가 16 ms 마다 바쁘게 도는 시간")
+    p.set_defaults(func=bench_worker)
+
+    p = sub.add_parser("lag", help="나침반 표시 지연: 200 ms 타이머+애니메이션 vs 변화 샘플+내다보기")
+    p.add_argument("--backend", default="numpy")
+    p.add_argument("--seconds", type=float, default=8.0)
+    p.add_argument("--estimator", choices=("hough", "ring", "theta"), default="ring")
+    p.set_defaults(func=bench_lag)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+미니맵 프레임 공급원 (AzimuthCaptureThread 에 주입)
+
+    MSSSource       : 실제 화면 캡처 (mss.mss() 가 OS에 맞는 구현을 고름 - Windows/Linux/macOS)
+    XShmSource      : Linux X11 공유메모리 캡처, 같은 버퍼를 계속 채움 (xshm.py)
+    FileSource      : replay.py 형식 프레임(.npz / 디렉터리) 또는 동영상 파일
+    SyntheticSource : 노이즈 배경 + 회전하는 시야각 선 두 개 (화면/파일 없이 벤치마크, 장시간 테스트용)
+
+모든 소스는 with 문(open/close)을 지원하고 grab() 은 Frame, 끝나면 None 을 반환
+"""
+import os
+import sys
+import time
+from typing import NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+from synth import draw_view_lines
+
+IMAGE_EXTS = (".png", ".bmp")
+VIDEO_EXTS = (".mp4", ".avi", ".mkv", ".mov")
+
+
+class Frame(NamedTuple):
+    bgra: np.ndarray  # (h, w, 4) uint8, 소스 버퍼를 복사 없이 보는 view (다음 grab 까지만 유효)
+    timestamp: float  # 캡처 시각 (time.perf_counter() 기준 sec)
+    index: int
+
+
+def _to_bgra(image):
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+    if image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    return np.ascontiguousarray(image)
+
+
+def load_frames(path):
+    """BGRA uint8 프레임 리스트"""
+    if os.path.isdir(path):
+        frames = []
+        for name in sorted(os.listdir(path)):
+            full = os.path.join(path, name)
+            ext = os.path.splitext(name)[1].lower()
+            if ext == ".npy":
+                frames.append(_to_bgra(np.load(full)))
+            elif ext in IMAGE_EXTS:
+                frames.append(_to_bgra(cv2.imread(full, cv2.IMREAD_UNCHANGED)))
+        return frames
+
+    with np.load(path) as archive:
+        if "frames" in archive:
+            return [_to_bgra(f) for f in archive["frames"]]
+        return [_to_bgra(archive[k]) for k in sorted(archive.files)]
+
+
+class CaptureSource:
+    name = "base"
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def grab(self) -> Optional[Frame]:
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class MSSSource(CaptureSource):
+    """capture_rect = (x1, y1, x2, y2) 화면 좌표"""
+    name = "mss"
+
+    def __init__(self, capture_rect):
+        x1, y1, x2, y2 = capture_rect
+        self.monitor = {"top": y1, "left": x1, "width": x2 - x1, "height": y2 - y1}
+        self._sct = None
+        self._index = 0
+
+    def open(self):
+        import mss  # 실제 캡처할 때만 필요
+        self._sct = mss.mss()
+
+    def close(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+    def grab(self):
+        shot = self._sct.grab(self.monitor)
+        t = time.perf_counter()
+        # shot.raw(bytearray) 를 그대로 BGRA 배열로
+        image = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        self._index += 1
+        return Frame(image, t, self._index - 1)
+
+
+def create_screen_source(capture_rect, backend="auto"):
+    """
+    backend: "mss" / "xshm" / "auto"(Linux 에서 XShm 을 먼저 시도하고 안 되면 mss)
+    XShm 은 여기서 한 번 열었다 닫아서 X 서버가 지원하는지 확인 (사용할 때 with 로 다시 열기)
+    """
+    if backend == "mss":
+        return MSSSource(capture_rect)
+    if backend == "xshm" or (backend == "auto" and sys.platform.startswith("linux")):
+        from xshm import XShmSource
+        source = XShmSource(capture_rect)
+        try:
+            source.open()
+            source.close()
+            return source
+        except Exception as e:
+            if backend == "xshm":
+                raise
+            print(f"[capture] xshm unavailable ({e}), using mss")
+    return MSSSource(capture_rect)
+
+
+class FileSource(CaptureSource):
+    """
+    path: .npz / 프레임 디렉터리 (replay.py 형식) 또는 동영상 파일
+    loop: 끝나면 처음부터 다시
+    fps: 지정하면 그 속도로 프레임을 내보냄 (None 이면 최대한 빨리)
+    """
+    name = "file"
+
+    def __init__(self, path, loop=False, fps=None):
+        self.path = path
+        self.loop = loop
+        self.fps = fps
+        self._frames = None
+        self._video = None
+        self._video_buf = None
+        self._index = 0
+        self._t0 = None
+
+    def open(self):
+        self._index = 0
+        self._t0 = time.perf_counter()
+        if os.path.splitext(self.path)[1].lower() in VIDEO_EXTS:
+            self._video = cv2.VideoCapture(self.path)
+            if not self._video.isOpened():
+                raise RuntimeError(f"cannot open video: {self.path}")
+        elif self._frames is None:
+            self._frames = load_frames(self.path)
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+    def _next_image(self):
+        if self._video is not None:
+            ok, bgr = self._video.read()
+            if not ok and self.loop:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, bgr = self._video.read()
+            if not ok:
+                return None
+            if self._video_buf is None or self._video_buf.shape[:2] != bgr.shape[:2]:
+                self._video_buf = np.empty(bgr.shape[:2] + (4,), dtype=np.uint8)
+            cv2.cvtColor(bgr, cv2.COLOR_BGR2BGRA, dst=self._video_buf)
+            return self._video_buf
+
+        if not self._frames:
+            return None
+        pos = self._index
+        if pos >= len(self._frames):
+            if not self.loop:
+                return None
+            pos %= len(self._frames)
+        return self._frames[pos]
+
+    def grab(self):
+        if self.fps:
+            wait = self._t0 + self._index / self.fps - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        image = self._next_image()
+        if image is None:
+            return None
+        self._index += 1
+        return Frame(image, time.perf_counter(), self._index - 1)
+
+
+class SyntheticSource(CaptureSource):
+    """
+    heading 이 프레임마다 deg_per_frame 씩 도는 합성 미니맵
+    heading 은 calculate_angle 결과와 같은 기준 (선 두 개는 이미지 각도 heading-150, heading-30)
+    count=None 이면 끝없이 생성
+    heading_fn(t) 를 주면 프레임 번호 대신 grab 시각(perf_counter)의 heading 을 그림 (화면 지연 측정용)
+    """
+    name = "synthetic"
+
+    def __init__(self, w=298, h=260, deg_per_frame=3.0, noise=50, count=None, seed=0, start_deg=0.0, heading_fn=None):
+        self.w, self.h = w, h
+        self.deg_per_frame = deg_per_frame
+        self.noise = noise
+        self.count = count
+        self.seed = seed
+        self.start_deg = start_deg
+        self.heading_fn = heading_fn
+        self.heading = None  # 마지막으로 내보낸 프레임의 정답
+        self._buf = None
+        self._noise_pool = None
+        self._index = 0
+
+    def open(self):
+        rng = np.random.default_rng(self.seed)
+        # 매 프레임 난수를 새로 뽑는 대신 미리 만든 배경 몇 장을 돌려 씀
+        self._noise_pool = rng.integers(0, self.noise, size=(8, self.h, self.w, 4), dtype=np.uint8)
+        self._noise_pool[..., 3] = 255
+        self._buf = np.empty((self.h, self.w, 4), dtype=np.uint8)
+        self._index = 0
+
+    def heading_at(self, index):
+        return (self.start_deg + index * self.deg_per_frame) % 360
+
+    def grab(self):
+        if self.count is not None and self._index >= self.count:
+            return None
+        t = time.perf_counter()
+        heading = self.heading_fn(t) % 360 if self.heading_fn is not None else self.heading_at(self._index)
+        np.copyto(self._buf, self._noise_pool[self._index % len(self._noise_pool)])
+        draw_view_lines(self._buf, heading, (240, 240, 240, 255))
+
+        self.heading = heading
+        self._index += 1
+        return Frame(self._buf, t, self._index - 1)
@@ -0,0 +1,141 @@
+"""
+여러 HUD 영역(미니맵, 나침반, 게이지 ...)을 한 번의 캡처로 읽는 서비스
+
+    rois = {"minimap": (3122, 30, 3420, 290), "compass": (...)}
+    service = CaptureService(rois)
+    service.add_consumer("minimap", azimuth_thread.process_frame)
+    service.roi_signal.connect(on_result)   # (이름, 결과)
+    service.start()
+
+- 틱마다 모든 ROI를 감싸는 영역을 한 번만 grab, 각 consumer 에는 복사 없는 sub-view 와 캡처 시각을 넘김
+- consumer 는 공용 ThreadPoolExecutor 에서 병렬로 실행, 틱이 끝나기 전에 모두 기다림
+  (view 는 다음 grab 때 덮어써지므로)
+- ROI 별 처리 시간을 모아서 timing_report() / stop() 때 출력
+
+아직 main.py 에서는 안 씀 (읽는 영역이 미니맵 하나라 AzimuthCaptureThread 가 직접 캡처)
+나침반/게이지 같은 두 번째 영역을 읽게 되면 그때 옮김, 지금은 bench.py multiroi 에서만 씀
+(옮길 때: 틱 간격이 CaptureScheduler 고정 fps 라 AzimuthCaptureThread 의 유휴 fps / sample_signal / perf_signal 을
+ consumer 쪽에서 따로 챙겨야 함)
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from capture import create_screen_source
+from conf import CAPTURE_BACKEND, CAPTURE_MAX_FPS, ROI_WORKERS
+from screen_scan import CaptureScheduler
+
+
+def bounding_rect(rois):
+    """{이름: (x1, y1, x2, y2)} 를 모두 감싸는 (x1, y1, x2, y2)"""
+    rects = np.asarray(list(rois.values()))
+    return (int(rects[:, 0].min()), int(rects[:, 1].min()), int(rects[:, 2].max()), int(rects[:, 3].max()))
+
+
+class CaptureService(QThread):
+    """
+    rois: {이름: (x1, y1, x2, y2)} 화면 좌표
+    source: capture.CaptureSource, 프레임이 bounding_rect(rois) 영역이어야 함
+            (None 이면 run 할 때 conf.CAPTURE_BACKEND 로 그 영역을 화면 캡처)
+    """
+    roi_signal = pyqtSignal(str, object)
+
+    def __init__(self, rois, parent=None, source=None, workers=ROI_WORKERS, fps=CAPTURE_MAX_FPS, timing_window=300):
+        super().__init__(parent)
+        self.rois = dict(rois)
+        self.rect = bounding_rect(self.rois)
+        self.source = source
+        self.running = True
+        self.consumers = {}  # 이름 -> fn(view, timestamp) -> 결과 (None 이면 signal 생략)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="roi")
+        self.scheduler = CaptureScheduler(fps, fps)
+
+        # bounding 영역 안에서의 슬라이스는 한 번만 계산
+        bx, by = self.rect[:2]
+        self._slices = {
+            name: (slice(y1 - by, y2 - by), slice(x1 - bx, x2 - bx))
+            for name, (x1, y1, x2, y2) in self.rois.items()
+        }
+
+        self.ticks = 0
+        self.grab_ns = deque(maxlen=timing_window)
+        self.tick_ns = deque(maxlen=timing_window)
+        self.roi_ns = {name: deque(maxlen=timing_window) for name in self.rois}
+
+    def add_consumer(self, name, fn):
+        if name not in self.rois:
+            raise KeyError(f"unknown roi: {name}")
+        self.consumers[name] = fn
+
+    def views(self, image):
+        """bounding 영역 프레임 -> {이름: sub-view}"""
+        return {name: image[sl] for name, sl in self._slices.items()}
+
+    def _run_consumer(self, name, fn, view, timestamp):
+        t0 = time.perf_counter_ns()
+        result = fn(view, timestamp)
+        self.roi_ns[name].append(time.perf_counter_ns() - t0)
+        return result
+
+    def tick(self, source):
+        """한 번 grab 해서 모든 consumer 실행 -> {이름: 결과}, 소스가 끝났으면 None"""
+        t0 = time.perf_counter_ns()
+        frame = source.grab()
+        if frame is None:
+            return None
+        t1 = time.perf_counter_ns()
+
+        views = self.views(frame.bgra)
+        futures = {name: self.pool.submit(self._run_consumer, name, fn, views[name], frame.timestamp)
+                   for name, fn in self.consumers.items()}
+        results = {name: f.result() for name, f in futures.items()}
+
+        self.ticks += 1
+        self.grab_ns.append(t1 - t0)
+        self.tick_ns.append(time.perf_counter_ns() - t0)
+        return results
+
+    def run(self):
+        if self.source is None:
+            self.source = create_screen_source(self.rect, CAPTURE_BACKEND)
+        with self.source as source:
+            while self.running:
+                results = self.tick(source)
+                if results is None:
+                    break
+                for name, result in results.items():
+                    if result is not None:
+                        self.roi_signal.emit(name, result)
+                self.usleep(int(self.scheduler.frame_done(None) * 1_000_000))
+
+    def reset_timing(self):
+        self.grab_ns.clear()
+        self.tick_ns.clear()
+        for values in self.roi_ns.values():
+            values.clear()
+
+    def timing_report(self):
+        """{"grab": (p50_us, p95_us), "tick": ..., 이름: ...} 측정값이 없으면 None"""
+        def pct(values):
+            if not values:
+                return None
+            p50, p95 = np.percentile(np.asarray(values) / 1000, [50, 95])
+            return float(p50), float(p95)
+
+        report = {"grab": pct(self.grab_ns), "tick": pct(self.tick_ns)}
+        for name in self.rois:
+            report[name] = pct(self.roi_ns[name])
+        return report
+
+    def stop(self):
+        self.running = False
+        self.wait()
+        self.pool.shutdown(wait=True)
+        if self.ticks:
+            print(f"[capture] {self.ticks} ticks, {len(self.rois)} rois from {self.rect}")
+            for name, p in self.timing_report().items():
+                if p is not None:
+                    print(f"[capture] {name:<12} p50 {p[0]:8.1f} us  p95 {p[1]:8.1f} us")
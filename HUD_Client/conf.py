@@ -1,2 +1,85 @@
+import os
+
 AZIMUTH_DURATION = 200
-LR_DURATION = 200
\ No newline at end of file
+LR_DURATION = 200
+# 나침반: 샘플(방위각, 캡처 시각, 속도)을 받아 DISPLAY_FPS 로 현재 값을 내다봐서 그림 (False 면 AZIMUTH_DURATION 타이머 + 애니메이션)
+COMPASS_EXTRAPOLATE = True
+DISPLAY_FPS = 60
+EXTRAPOLATE_MAX_SEC = 0.15  # 마지막 샘플 이후 이만큼까지만 속도로 내다봄
+# 샘플은 예측과 SAMPLE_MIN_DEG 이상 / 속도가 SAMPLE_MIN_RATE(도/초) 이상 달라지거나 HEARTBEAT 마다만 보냄
+SAMPLE_MIN_DEG = 0.5
+SAMPLE_MIN_RATE = 3.0
+SAMPLE_HEARTBEAT_SEC = 0.5
+
+# 엣지 검출 백엔드 ("opencl-gpu", "opencl-cpu", "opencv", "numpy"), None이면 시작 시 자동 선택
+EDGE_BACKEND = None
+# OpenCL work-group 크기를 디바이스/프레임 크기별로 처음 한 번 재서 고름 (결과는 GPU_CACHE_DIR 에 저장)
+EDGE_AUTOTUNE = True
+GPU_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".bdo_hud")
+
+# 직전 프레임과 같은 미니맵이면 엣지/Hough 생략 (비교 샘플 간격 px, 1이면 전체 픽셀 비교)
+# 4: 가로세로 4px 마다 (1/16), 0.25도 이상 회전은 전부 잡음 (그보다 작으면 드물게 놓침, 출력은 1도 단위)
+# replay.py --skip-unchanged --change-step 으로 놓친 프레임 수 확인
+SKIP_UNCHANGED_FRAMES = True
+CHANGE_SAMPLE_STEP = 4
+
+# 캡처 주기: 방위각이 변하는 동안은 MAX, STABLE_SEC 동안 STABLE_DEG 미만으로만 변하면 IDLE까지 낮춤
+CAPTURE_MAX_FPS = 30
+CAPTURE_IDLE_FPS = 10
+CAPTURE_STABLE_SEC = 1.0
+CAPTURE_STABLE_DEG = 2
+# 화면 캡처 방식: "auto"(Linux 면 XShm 공유메모리 먼저 시도) / "mss" / "xshm"
+CAPTURE_BACKEND = "auto"
+# 여러 ROI를 한 번에 캡처할 때(CaptureService) ROI별 분석을 돌리는 공용 스레드 수
+# (CaptureService 는 아직 main.py 에서 안 씀, 미니맵 하나뿐이라 AzimuthCaptureThread 가 직접 캡처)
+ROI_WORKERS = 4
+
+# 엣지 결과 형태: "image"(전체 엣지 이미지) / "points"(원형 ROI 안 엣지 좌표만 읽어옴)
+# "points" 는 좌표로 바로 중심 기준 각도 히스토그램을 만들어서 AZIMUTH_ESTIMATOR 가 hough 여도 theta 와 같은 선 선택
+# (ring 추정기, 파이프라인, 묶음 처리는 엣지 이미지가 필요해서 "image" 로 계산하고 처음 한 번 출력)
+EDGE_OUTPUT = "image"
+EDGE_ROI_RADIUS = None  # None이면 min(w, h) // 2
+
+# 1: 동기 / 2 이상: 버퍼 세트 수만큼 프레임을 겹쳐서 처리 (GPU 엣지 계산과 CPU 후처리 병렬, 결과는 depth-1 프레임 늦음)
+EDGE_PIPELINE_DEPTH = 1
+
+# 녹화 영상 재처리(replay --batch 등)에서 커널 한 번에 묶어 보낼 프레임 수
+EDGE_BATCH_SIZE = 16
+
+# 방위각 추정: "hough"(HoughLinesP + 클러스터링) / "ring"(중심 기준 동심원 샘플링)
+#   / "theta"(중심 기준 각도 히스토그램을 엣지 커널에서 바로 누적, 봉우리 몇 개만 읽어옴)
+AZIMUTH_ESTIMATOR = "hough"
+# 엣지 통계로 미니맵이 아닌 프레임(닫힘/메뉴/로딩 화면) 거르기 (모든 경로 공통, Hough 등 CPU 후처리 없이 None)
+# 바깥 원(반지름 min(w, h) // 2) 안 엣지 수와 중심 원(그 절반) 안 엣지 수로
+# 중심 원 안 엣지 < EDGE_MIN_CENTER: 닫힘 / 바깥 원 안 엣지 > 원 넓이의 EDGE_MAX_FRACTION: 메뉴 같은 글자 화면
+# 중심 원 안 비율 > EDGE_MAX_CENTER_RATIO: 가운데 문구만 있는 로딩 화면
+# 기준값은 합성 프레임으로만 정함 (찾은 미니맵: 비율 최대 0.0242 / 중심 비율 최대 0.67 / 중심 최소 86, 메뉴 비율 최소 0.0286)
+# 실험 기능이라 꺼둠: 합성 프레임 600장에서도 오검출 1장 (bench.py reject "false rej"), 실제 캡처로는 안 맞춰봄
+# GPU 의 work-group 합산(stats_reduce="local", _stats_local)은 GPU 에서 돌려본 적 없음
+# (pocl CPU 에서 강제로 켜서 호스트 합산과 같은 값인 것만 확인)
+EDGE_STATS_REJECT = False
+EDGE_MIN_CENTER = 40
+EDGE_MAX_FRACTION = 0.027
+EDGE_MAX_CENTER_RATIO = 0.9
+# hough 용 coarse-to-fine: 1/EDGE_PYRAMID 축소 엣지(엣지 커널에서 같이 만듦)로 두 선 방향을 대충 찾고
+# 전체 해상도에서는 그 방향 +-PYRAMID_WEDGE_DEG 부채꼴만 Hough (0 이면 끔, 2 / 4, calculate_angle 경로만)
+EDGE_PYRAMID = 0
+PYRAMID_WEDGE_DEG = 4
+# 방위각 추적(tracker.py): 잠금 중에는 예측한 시야각 +-TRACK_GATE_DEG 안만 탐색, 결과는 EMA 대신 alpha-beta 필터 값
+AZIMUTH_TRACKING = False
+TRACK_GATE_DEG = 12
+
+# 단계별 시간/카운터 기록 (perf.py, 최근 PERF_WINDOW 프레임), PERF_EMIT_SEC 마다 perf_signal 로 요약을 내보냄
+# 비용 (bench.py perf): 기록 프레임당 4~6 us (프레임 ~1 ms 의 0.5% 정도) + 요약 ~0.2 ms / PERF_EMIT_SEC
+# HUD 는 PERF_LOG_SEC 마다 요약 한 줄을 출력 (perf.PerfLog, 0 이면 출력 안 함)
+PERF_ENABLED = True
+PERF_WINDOW = 512
+PERF_EMIT_SEC = 1.0
+PERF_LOG_SEC = 30
+
+# 캡처 + 방위각 계산을 별도 프로세스에서 (vision_worker.py, 결과는 공유메모리로 받음)
+VISION_PROCESS = False
+
+# tuning.py 가 저장한 엣지/Hough 파라미터 프로파일 (HUD 가 시작할 때 읽음, 파일이 없으면 코드 기본값)
+# replay.py / bench.py 는 재현되게 기본으로 안 읽음 (replay.py --profile 로)
+TUNING_PROFILE = os.path.join(GPU_CACHE_DIR, "tuning_profile.json")
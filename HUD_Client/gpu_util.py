@@ -1,69 +1,1388 @@
-import pyopencl as cl
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import partial
+
 import numpy as np
 
-class GPUUtils:
-    def __init__(self):
-        platforms = cl.get_platforms()
-        gpu_devices = [d for p in platforms for d in p.get_devices(device_type=cl.device_type.GPU)]
-        if not gpu_devices:
-            raise RuntimeError("No Available OpenCL GPU Devices!")
+import startup
+from conf import EDGE_AUTOTUNE, GPU_CACHE_DIR
+
+try:
+    import pyopencl as cl
+except ImportError:  # OpenCL 런타임이 없는 환경
+    cl = None
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# 엣지로 인정하는 gradient 크기 범위 기본값 (커널과 CPU 구현이 같은 값을 써야 함, 정수만)
+# 백엔드마다 set_edge_band 로 바꿀 수 있음 (OpenCL 은 -D EDGE_MAG_LO/HI 로 다시 빌드, tuning.py 프로파일)
+EDGE_MAG_MIN = 180
+EDGE_MAG_MAX = 275
+
+# 중심 기준 각도(θ) 히스토그램: 시야각 선은 미니맵 중심에서 뻗어나가므로 (θ, ρ) 대신 θ만 누적
+# 중심 근처(화살표, 각도 부정확)는 THETA_R_MIN 안쪽 제외, 봉우리는 3-bin 합이 THETA_MIN_VOTES 이상
+THETA_BINS = 360
+THETA_R_MIN = 12
+THETA_MIN_VOTES = 8
+THETA_MAX_PEAKS = 8
+
+KERNEL_CODE = r"""
+// EDGE_MAG_LO / EDGE_MAG_HI: 엣지 gradient 크기 범위 (float), 빌드 옵션 -D 로 넣음 (edge_band_options)
+// img: 엣지에 쓰는 채널(B)이 stride 바이트 간격으로 들어있는 버퍼
+//      stride=1 이면 B 채널만 뽑은 (h, w) 평면, stride=4 면 BGRA 원본 그대로
+__kernel void canny_edge(__global const uchar *img,
+                         __global uchar *output,
+                         int width, int height, int stride)
+{
+    int x = get_global_id(0);
+    int y = get_global_id(1);
+
+    if (x > 1 && y > 1 && x < width - 1 && y < height - 1) {
+        int left  = (y * width + (x - 1)) * stride;
+        int right = (y * width + (x + 1)) * stride;
+        int up    = ((y - 1) * width + x) * stride;
+        int down  = ((y + 1) * width + x) * stride;
+
+        int gx = (int)img[left] - (int)img[right];
+        int gy = (int)img[up]   - (int)img[down];
+
+        float mag = sqrt((float)(gx * gx + gy * gy));
+        output[y * width + x] = (mag >= EDGE_MAG_LO && mag <= EDGE_MAG_HI) ? 255 : 0;
+    }
+}
+
+// canny_edge 와 같은 결과, work-group 이 (lx+2) x (ly+2) 타일을 __local 에 한 번 읽어두고 이웃은 거기서
+// global size 는 local size 배수로 올려서 실행 (넘는 부분은 계산만 안 함)
+__kernel void canny_edge_tiled(__global const uchar *img,
+                               __global uchar *output,
+                               int width, int height, int stride,
+                               __local uchar *tile)
+{
+    int lx = get_local_id(0);
+    int ly = get_local_id(1);
+    int gw = get_local_size(0);
+    int gh = get_local_size(1);
+    int tw = gw + 2;
+    int th = gh + 2;
+    int x0 = get_group_id(0) * gw - 1;
+    int y0 = get_group_id(1) * gh - 1;
+
+    for (int i = ly * gw + lx; i < tw * th; i += gw * gh) {
+        int tx = clamp(x0 + i % tw, 0, width - 1);
+        int ty = clamp(y0 + i / tw, 0, height - 1);
+        tile[i] = img[(ty * width + tx) * stride];
+    }
+    barrier(CLK_LOCAL_MEM_FENCE);
+
+    int x = get_global_id(0);
+    int y = get_global_id(1);
+    if (x > 1 && y > 1 && x < width - 1 && y < height - 1) {
+        int c = (ly + 1) * tw + (lx + 1);
+        int gx = (int)tile[c - 1]  - (int)tile[c + 1];
+        int gy = (int)tile[c - tw] - (int)tile[c + tw];
+
+        float mag = sqrt((float)(gx * gx + gy * gy));
+        output[y * width + x] = (mag >= EDGE_MAG_LO && mag <= EDGE_MAG_HI) ? 255 : 0;
+    }
+}
 
-        self.ctx = cl.Context(devices=[gpu_devices[0]])
-        self.queue = cl.CommandQueue(self.ctx)
+// canny_edge 를 K장 묶음으로: img (K, h, w) * stride, output (K, h, w), global size (w, h, K)
+__kernel void canny_edge_batch(__global const uchar *img,
+                               __global uchar *output,
+                               int width, int height, int stride)
+{
+    int x = get_global_id(0);
+    int y = get_global_id(1);
+    int k = get_global_id(2);
 
-        self.kernel_code = r"""
-        __kernel void canny_edge(__global const uchar *img,
+    if (x > 1 && y > 1 && x < width - 1 && y < height - 1) {
+        int base = k * width * height;
+        int left  = (base + y * width + (x - 1)) * stride;
+        int right = (base + y * width + (x + 1)) * stride;
+        int up    = (base + (y - 1) * width + x) * stride;
+        int down  = (base + (y + 1) * width + x) * stride;
+
+        int gx = (int)img[left] - (int)img[right];
+        int gy = (int)img[up]   - (int)img[down];
+
+        float mag = sqrt((float)(gx * gx + gy * gy));
+        output[base + y * width + x] = (mag >= EDGE_MAG_LO && mag <= EDGE_MAG_HI) ? 255 : 0;
+    }
+}
+
+// canny_edge + 1/2^shift 축소 엣지(블록 안에 엣지가 하나라도 있으면 255)를 같은 패스에서
+// coarse 는 (height >> shift, width >> shift), 실행 전에 0으로 채워둠 (여러 픽셀이 같은 값 255만 씀)
+__kernel void canny_edge_pyramid(__global const uchar *img,
                                  __global uchar *output,
-                                 int width, int height)
-        {
-            int x = get_global_id(0);
-            int y = get_global_id(1);
-
-            if (x > 1 && y > 1 && x < width - 1 && y < height - 1) {
-                int left  = (y * width + (x - 1)) * 4;
-                int right = (y * width + (x + 1)) * 4;
-                int up    = ((y - 1) * width + x) * 4;
-                int down  = ((y + 1) * width + x) * 4;
-
-                int gx = (int)img[left] - (int)img[right];
-                int gy = (int)img[up]   - (int)img[down];
-
-                float mag = sqrt((float)(gx * gx + gy * gy));
-                output[y * width + x] = (mag >= 180.0f && mag <= 275.0f) ? 255 : 0;
-            }
+                                 __global uchar *coarse,
+                                 int width, int height, int stride, int shift)
+{
+    int x = get_global_id(0);
+    int y = get_global_id(1);
+
+    if (x > 1 && y > 1 && x < width - 1 && y < height - 1) {
+        int left  = (y * width + (x - 1)) * stride;
+        int right = (y * width + (x + 1)) * stride;
+        int up    = ((y - 1) * width + x) * stride;
+        int down  = ((y + 1) * width + x) * stride;
+
+        int gx = (int)img[left] - (int)img[right];
+        int gy = (int)img[up]   - (int)img[down];
+
+        float mag = sqrt((float)(gx * gx + gy * gy));
+        uchar edge = (mag >= EDGE_MAG_LO && mag <= EDGE_MAG_HI) ? 255 : 0;
+        output[y * width + x] = edge;
+
+        int cw = width >> shift;
+        int cx = x >> shift;
+        int cy = y >> shift;
+        if (edge && cx < cw && cy < (height >> shift))
+            coarse[cy * cw + cx] = 255;
+    }
+}
+
+// canny_edge + 프레임 통계 stats[0] = 엣지 수, stats[1] = 중심 원(반지름^2 <= r2_center) 안 엣지 수
+// work-group 안에서 (중심 << 16 | 엣지) 를 트리 합산한 뒤 그룹당 atomic_add 두 번 (local size 는 2의 거듭제곱)
+// stats 는 실행 전에 0으로, global size 는 local size 배수
+__kernel void canny_edge_stats(__global const uchar *img,
+                               __global uchar *output,
+                               volatile __global int *stats,
+                               int width, int height, int stride, int r2_outer, int r2_center,
+                               __local int *scratch)
+{
+    int x = get_global_id(0);
+    int y = get_global_id(1);
+    int lid = get_local_id(1) * get_local_size(0) + get_local_id(0);
+    int lsize = get_local_size(0) * get_local_size(1);
+
+    int packed = 0;
+    if (x > 1 && y > 1 && x < width - 1 && y < height - 1) {
+        int left  = (y * width + (x - 1)) * stride;
+        int right = (y * width + (x + 1)) * stride;
+        int up    = ((y - 1) * width + x) * stride;
+        int down  = ((y + 1) * width + x) * stride;
+
+        int gx = (int)img[left] - (int)img[right];
+        int gy = (int)img[up]   - (int)img[down];
+
+        float mag = sqrt((float)(gx * gx + gy * gy));
+        int edge = (mag >= EDGE_MAG_LO && mag <= EDGE_MAG_HI);
+        output[y * width + x] = edge ? 255 : 0;
+
+        int dx = x - width / 2;
+        int dy = y - height / 2;
+        int r2 = dx * dx + dy * dy;
+        packed = (edge && r2 <= r2_outer) | ((edge && r2 <= r2_center) << 16);
+    }
+
+    scratch[lid] = packed;
+    barrier(CLK_LOCAL_MEM_FENCE);
+    for (int s = lsize / 2; s > 0; s >>= 1) {
+        if (lid < s)
+            scratch[lid] += scratch[lid + s];
+        barrier(CLK_LOCAL_MEM_FENCE);
+    }
+    if (lid == 0 && scratch[0]) {
+        atomic_add(&stats[0], scratch[0] & 0xffff);
+        atomic_add(&stats[1], scratch[0] >> 16);
+    }
+}
+
+// (x, y) 가 canny_edge 기준 엣지면 미니맵 중심 기준 반지름^2, 아니면 -1
+inline int edge_r2(__global const uchar *img, int x, int y, int width, int height, int stride)
+{
+    if (x <= 1 || y <= 1 || x >= width - 1 || y >= height - 1)
+        return -1;
+
+    int left  = (y * width + (x - 1)) * stride;
+    int right = (y * width + (x + 1)) * stride;
+    int up    = ((y - 1) * width + x) * stride;
+    int down  = ((y + 1) * width + x) * stride;
+
+    int gx = (int)img[left] - (int)img[right];
+    int gy = (int)img[up]   - (int)img[down];
+
+    float mag = sqrt((float)(gx * gx + gy * gy));
+    if (mag < EDGE_MAG_LO || mag > EDGE_MAG_HI)
+        return -1;
+    int dx = x - width / 2;
+    int dy = y - height / 2;
+    return dx * dx + dy * dy;
+}
+
+// 엣지 픽셀 하나 -> 누적할 칸: 각도 bin (반지름^2 가 [r2_min, r2_max]), bins = 바깥 원(r2_max) 안 엣지 수,
+// bins + 1 = 중심 원(r2_center) 안 엣지 수 (canny_stats 와 같은 [엣지 수, 중심 원 안 엣지 수])
+inline int theta_bin(int x, int y, int width, int height, int r2, int r2_min, int bins)
+{
+    if (r2 < r2_min)
+        return -1;
+    float deg = degrees(atan2((float)(y - height / 2), (float)(x - width / 2)));
+    if (deg < 0.0f)
+        deg += 360.0f;
+    return min((int)(deg * bins / 360.0f), bins - 1);
+}
+
+// canny_edge 와 같은 엣지를 (미니맵 중심 기준 각도) 히스토그램으로 바로 누적 (엣지 이미지는 안 씀)
+// hist 는 bins + 2 칸 (뒤 두 칸은 엣지 통계, theta_bin 참고), 실행 전에 0으로
+// work-group 마다 __local 히스토그램에 모았다가 한 번에 global 에 더함
+// global size 는 local size 배수 (넘는 work-item 은 barrier 만 같이)
+__kernel void theta_histogram(__global const uchar *img,
+                              __global int *hist,
+                              int width, int height, int stride,
+                              int r2_min, int r2_max, int r2_center, int bins,
+                              __local int *local_hist)
+{
+    int lid = get_local_id(1) * get_local_size(0) + get_local_id(0);
+    int lsize = get_local_size(0) * get_local_size(1);
+    for (int i = lid; i < bins + 2; i += lsize)
+        local_hist[i] = 0;
+    barrier(CLK_LOCAL_MEM_FENCE);
+
+    int x = get_global_id(0);
+    int y = get_global_id(1);
+    int r2 = edge_r2(img, x, y, width, height, stride);
+    if (r2 >= 0 && r2 <= r2_max) {
+        atomic_inc(&local_hist[bins]);
+        if (r2 <= r2_center)
+            atomic_inc(&local_hist[bins + 1]);
+        int bin = theta_bin(x, y, width, height, r2, r2_min, bins);
+        if (bin >= 0)
+            atomic_inc(&local_hist[bin]);
+    }
+    barrier(CLK_LOCAL_MEM_FENCE);
+
+    for (int i = lid; i < bins + 2; i += lsize)
+        if (local_hist[i])
+            atomic_add(&hist[i], local_hist[i]);
+}
+
+// theta_histogram 과 같은 결과, global 히스토그램에 바로 원자적 덧셈 (barrier 가 비싼 CPU 디바이스용, 엣지는 드물어서 충돌 적음)
+__kernel void theta_histogram_global(__global const uchar *img,
+                                     __global int *hist,
+                                     int width, int height, int stride,
+                                     int r2_min, int r2_max, int r2_center, int bins)
+{
+    int x = get_global_id(0);
+    int y = get_global_id(1);
+    int r2 = edge_r2(img, x, y, width, height, stride);
+    if (r2 >= 0 && r2 <= r2_max) {
+        atomic_inc(&hist[bins]);
+        if (r2 <= r2_center)
+            atomic_inc(&hist[bins + 1]);
+        int bin = theta_bin(x, y, width, height, r2, r2_min, bins);
+        if (bin >= 0)
+            atomic_inc(&hist[bin]);
+    }
+}
+
+// θ 히스토그램 봉우리: work-item 하나가 bin 하나 (global size = bins)
+// s(i) = hist[i-1] + hist[i] + hist[i+1] (원형), s(i) 가 +-2 bin 안에서 최대(동점이면 앞쪽)이고 min_votes 이상이면 봉우리
+// 각도는 s 세 점 포물선으로 bin 안 위치까지, peaks 에 (각도, s(i)) 를 순서 없이 씀
+__kernel void theta_peaks(__global const int *hist,
+                          __global float2 *peaks,
+                          volatile __global int *count,
+                          int bins, int min_votes)
+{
+    int i = get_global_id(0);
+    if (i >= bins)
+        return;
+
+    int h[7];
+    for (int k = 0; k < 7; k++)
+        h[k] = hist[(i + k - 3 + bins) % bins];
+    int s0 = h[0] + h[1] + h[2];
+    int s1 = h[1] + h[2] + h[3];
+    int s2 = h[2] + h[3] + h[4];
+    int s3 = h[3] + h[4] + h[5];
+    int s4 = h[4] + h[5] + h[6];
+
+    if (s2 >= min_votes && s2 > s0 && s2 > s1 && s2 >= s3 && s2 >= s4) {
+        int den = s1 - 2 * s2 + s3;
+        float off = den != 0 ? 0.5f * (float)(s1 - s3) / (float)den : 0.0f;
+        int idx = atomic_inc(count);
+        peaks[idx] = (float2)((i + 0.5f + off) * 360.0f / bins, (float)s2);
+    }
+}
+
+// canny_edge + ROI 마스크, 엣지 좌표만 원자적 카운터로 압축해서 출력 (순서는 보장 안 됨)
+__kernel void edge_points(__global const uchar *img,
+                          __global const uchar *roi,
+                          __global ushort2 *points,
+                          volatile __global int *count,
+                          int width, int height, int stride)
+{
+    int x = get_global_id(0);
+    int y = get_global_id(1);
+
+    if (x > 1 && y > 1 && x < width - 1 && y < height - 1 && roi[y * width + x]) {
+        int left  = (y * width + (x - 1)) * stride;
+        int right = (y * width + (x + 1)) * stride;
+        int up    = ((y - 1) * width + x) * stride;
+        int down  = ((y + 1) * width + x) * stride;
+
+        int gx = (int)img[left] - (int)img[right];
+        int gy = (int)img[up]   - (int)img[down];
+
+        float mag = sqrt((float)(gx * gx + gy * gy));
+        if (mag >= EDGE_MAG_LO && mag <= EDGE_MAG_HI) {
+            int idx = atomic_inc(count);
+            points[idx] = (ushort2)(x, y);
         }
+    }
+}
+"""
+
+
+def theta_radius_range(w, h, r_min=THETA_R_MIN):
+    """θ 히스토그램에 쓰는 반지름^2 범위 (r_min^2, (min(w, h) // 2)^2) = circular_roi 와 같은 바깥 원"""
+    return r_min * r_min, (min(w, h) // 2) ** 2
+
+
+def stats_radius_range(w, h):
+    """
+    엣지 통계 (canny_stats / edge_stats / theta_peaks_stats) 의 (바깥 원, 중심 원) 반지름^2
+    바깥 원은 circular_roi 기본값과 같아서 "points" 출력(원 안 엣지만)으로도 같은 값이 나옴
+    """
+    return (min(w, h) // 2) ** 2, (min(w, h) // 4) ** 2
+
+
+def theta_peaks_from_histogram(hist, max_peaks=THETA_MAX_PEAKS, min_votes=THETA_MIN_VOTES):
+    """
+    theta_peaks 커널의 CPU 구현 -> (N, 2) float32 [각도(도), 표 수], 표 수 내림차순 (같으면 각도 오름차순), 최대 max_peaks 개
+    """
+    bins = len(hist)
+    hist = np.asarray(hist, dtype=np.int64)
+    s = np.roll(hist, 1) + hist + np.roll(hist, -1)
+    s_m2, s_m1, s_p1, s_p2 = np.roll(s, 2), np.roll(s, 1), np.roll(s, -1), np.roll(s, -2)
+    idx = np.flatnonzero((s >= min_votes) & (s > s_m2) & (s > s_m1) & (s >= s_p1) & (s >= s_p2))
+    den = (s_m1 - 2 * s + s_p1)[idx]
+    off = np.zeros(len(idx), dtype=np.float32)
+    nz = den != 0
+    off[nz] = 0.5 * (s_m1[idx][nz] - s_p1[idx][nz]).astype(np.float32) / den[nz].astype(np.float32)
+    angle = (idx + np.float32(0.5) + off) * np.float32(360.0 / bins)
+    peaks = np.stack((angle, s[idx].astype(np.float32)), axis=1).astype(np.float32)
+    return _sort_peaks(peaks, max_peaks)
+
+
+def _sort_peaks(peaks, max_peaks):
+    order = np.lexsort((peaks[:, 0], -peaks[:, 1]))
+    return peaks[order[:max_peaks]]
+
+
+class EdgeBackend:
+    """
+    gpu_canny 뒤에서 실제 엣지 계산을 담당하는 구현체
+    canny(image_bgra) -> (h, w) uint8 (0/255), 테두리 2px은 항상 0
+    반환 배열은 내부 버퍼라 다음 호출 때 덮어써짐
+    """
+    name = "base"
+    edge_band = (EDGE_MAG_MIN, EDGE_MAG_MAX)
+    _batch_host = None
+    _coarse_host = None
+    _theta_lut = None
+    _stats_mask = None
+    _submit_ring = None  # [다음 순번, depth 개 엣지 버퍼] (submit/collect 기본 구현)
+    profiling = False  # record_stages 용 디바이스 시간 기록 (set_profiling)
+
+    def canny(self, image_bgra: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def set_edge_band(self, lo: int, hi: int):
+        """엣지로 인정하는 gradient 크기 범위 [lo, hi] (정수)"""
+        self.edge_band = (int(lo), int(hi))
+
+    def edge_points(self, image_bgra: np.ndarray, roi: np.ndarray) -> np.ndarray:
         """
-        self.prg = cl.Program(self.ctx, self.kernel_code).build()
+        roi((h, w) uint8, 0이 아니면 사용) 안의 엣지 좌표만 (N, 2) uint16 [x, y]
+        순서는 구현마다 다를 수 있음
+        """
+        edges = self.canny(image_bgra)
+        ys, xs = np.nonzero(edges & roi)
+        return np.stack((xs, ys), axis=1).astype(np.uint16)
 
-        # ✅ 커널 객체를 한 번만 생성해서 재사용
-        self.kernel_canny = cl.Kernel(self.prg, "canny_edge")
+    def theta_histogram(self, image_bgra: np.ndarray, bins: int = THETA_BINS) -> np.ndarray:
+        """
+        엣지 픽셀의 미니맵 중심 기준 각도 히스토그램 (bins,) int32 (반지름은 theta_radius_range 안만)
+        기본 구현(canny + edge_theta_histogram)이 theta_histogram 커널의 CPU 기준 구현
+        """
+        return self.edge_theta_histogram(self.canny(image_bgra), bins)
+
+    def edge_theta_histogram(self, edges: np.ndarray, bins: int = THETA_BINS) -> np.ndarray:
+        """이미 계산한 엣지 이미지 (h, w) -> theta_histogram 과 같은 히스토그램"""
+        lut = self._theta_bin_lut(*edges.shape, bins)
+        return np.bincount(lut[(edges > 0) & (lut >= 0)], minlength=bins).astype(np.int32)
+
+    def points_theta_histogram(self, points: np.ndarray, shape, bins: int = THETA_BINS) -> np.ndarray:
+        """edge_points 결과 (N, 2) [x, y] + 프레임 (h, w) -> 같은 히스토그램 (엣지 이미지를 다시 안 만듦)"""
+        lut = self._theta_bin_lut(*shape[:2], bins)
+        idx = lut[points[:, 1], points[:, 0]]
+        return np.bincount(idx[idx >= 0], minlength=bins).astype(np.int32)
+
+    def _theta_bin_lut(self, h, w, bins):
+        # 픽셀별 θ bin (theta_radius_range 밖은 -1), 크기가 바뀔 때만 다시 만듦
+        key = (h, w, bins)
+        if self._theta_lut is None or self._theta_lut[0] != key:
+            # 커널과 같은 float32 atan2 (bin 경계에 딱 걸친 픽셀은 드물게 구현마다 다를 수 있음)
+            ys, xs = np.mgrid[:h, :w]
+            dx = (xs - w // 2).astype(np.float32)
+            dy = (ys - h // 2).astype(np.float32)
+            deg = np.degrees(np.arctan2(dy, dx))
+            deg[deg < 0] += np.float32(360)
+            lut = np.minimum((deg * bins / np.float32(360)).astype(np.int32), bins - 1)
+            r2_min, r2_max = theta_radius_range(w, h)
+            r2 = dx * dx + dy * dy
+            lut[(r2 < r2_min) | (r2 > r2_max)] = -1
+            self._theta_lut = (key, lut)
+        return self._theta_lut[1]
+
+    def theta_peaks(self, image_bgra: np.ndarray, max_peaks: int = THETA_MAX_PEAKS) -> np.ndarray:
+        """
+        엣지 이미지 대신 중심을 지나는 선 후보만: (N, 2) float32 [이미지 각도(도), 표 수], 표 수 내림차순
+        각도 기준은 _candidates 와 같음 (atan2(dy, dx), y 아래 방향, 0~360)
+        """
+        return theta_peaks_from_histogram(self.theta_histogram(image_bgra), max_peaks)
+
+    def theta_peaks_stats(self, image_bgra: np.ndarray, max_peaks: int = THETA_MAX_PEAKS):
+        """-> (theta_peaks 결과, edge_stats 와 같은 [엣지 수, 중심 원 안 엣지 수]) (OpenCL 은 히스토그램 커널이 같이 셈)"""
+        edges = self.canny(image_bgra)
+        return theta_peaks_from_histogram(self.edge_theta_histogram(edges), max_peaks), self.edge_stats(edges)
+
+    def edge_stats(self, edges: np.ndarray) -> np.ndarray:
+        """
+        이미 계산한 엣지 이미지 -> [바깥 원 안 엣지 수, 중심 원 안 엣지 수] int32 (내부 버퍼, stats_radius_range)
+        """
+        h, w = edges.shape
+        if self._stats_mask is None or self._stats_mask[0] != (h, w):
+            # 바깥 원을 감싸는 사각형 + 원 마스크 두 개 (사각형 안만 비교)
+            r2_outer, r2_center = stats_radius_range(w, h)
+            r = min(w, h) // 2
+            cx, cy = w // 2, h // 2
+            x0, x1 = max(cx - r, 0), min(cx + r + 1, w)
+            y0, y1 = max(cy - r, 0), min(cy + r + 1, h)
+            ys, xs = np.ogrid[y0:y1, x0:x1]
+            r2 = (xs - cx) ** 2 + (ys - cy) ** 2
+            self._stats_mask = ((h, w), (slice(y0, y1), slice(x0, x1)), r2 <= r2_outer, r2 <= r2_center,
+                                np.zeros(2, dtype=np.int32))
+        _, window, outer, center, stats = self._stats_mask
+        edges = edges[window]
+        stats[0] = np.count_nonzero(edges[outer])
+        stats[1] = np.count_nonzero(edges[center])
+        return stats
+
+    def points_stats(self, points: np.ndarray, shape) -> np.ndarray:
+        """edge_points 결과로 edge_stats 와 같은 [바깥 원 안 엣지 수, 중심 원 안 엣지 수] (ROI 가 바깥 원보다 크면 잘라서 셈)"""
+        h, w = shape[:2]
+        r2_outer, r2_center = stats_radius_range(w, h)
+        dx = points[:, 0].astype(np.int32) - w // 2
+        dy = points[:, 1].astype(np.int32) - h // 2
+        r2 = dx * dx + dy * dy
+        return np.array([np.count_nonzero(r2 <= r2_outer), np.count_nonzero(r2 <= r2_center)], dtype=np.int32)
+
+    def canny_stats(self, image_bgra: np.ndarray):
+        """
+        -> (edges, edge_stats(edges)) (둘 다 내부 버퍼)
+        기본 구현은 canny 결과를 세기만 (OpenCL 은 엣지 커널 안에서 work-group 합산)
+        """
+        edges = self.canny(image_bgra)
+        return edges, self.edge_stats(edges)
+
+    def canny_pyramid(self, image_bgra: np.ndarray, factor: int):
+        """
+        factor: 2 의 거듭제곱 (2, 4, ...)
+        -> (edges, coarse) coarse = (h // factor, w // factor) 축소 엣지 (0 이 아니면 블록 안에 엣지가 있음)
+        기본 구현은 canny 결과를 블록 평균으로 줄임 (둘 다 내부 버퍼)
+        """
+        edges = self.canny(image_bgra)
+        h, w = edges.shape
+        ch, cw = h // factor, w // factor
+        if cv2 is not None:
+            self._coarse_host = cv2.resize(edges[:ch * factor, :cw * factor], (cw, ch),
+                                           dst=self._coarse_out(ch, cw), interpolation=cv2.INTER_AREA)
+        else:
+            blocks = edges[:ch * factor, :cw * factor].reshape(ch, factor, cw, factor)
+            np.max(blocks, axis=(1, 3), out=self._coarse_out(ch, cw))
+        return edges, self._coarse_host
+
+    def _coarse_out(self, ch, cw):
+        buf = self._coarse_host
+        if buf is None or buf.shape != (ch, cw):
+            buf = self._coarse_host = np.zeros((ch, cw), dtype=np.uint8)
+        return buf
+
+    def canny_batch(self, frames) -> np.ndarray:
+        """
+        frames: 같은 크기 BGRA 프레임 K장 (리스트 또는 (K, h, w, 4)) -> (K, h, w) uint8
+        기본 구현은 한 장씩 canny (반환 배열은 내부 버퍼라 다음 호출 때 덮어써짐)
+        """
+        h, w = frames[0].shape[:2]
+        out = self._batch_out(len(frames), h, w)
+        for k, frame in enumerate(frames):
+            np.copyto(out[k], self.canny(frame))
+        return out
+
+    def _batch_out(self, k, h, w):
+        # 지금까지 가장 큰 K 로 잡아두고 앞쪽 k 장만 씀 (마지막 남은 몇 장 때문에 다시 할당하지 않게)
+        buf = self._batch_host
+        if buf is None or buf.shape[1:] != (h, w) or len(buf) < k:
+            buf = self._batch_host = np.zeros((k, h, w), dtype=np.uint8)
+        return buf[:k]
+
+    def submit(self, image_bgra: np.ndarray, depth: int = 2):
+        """
+        파이프라인용: 엣지 계산을 시작만 하고 ticket 반환, 결과는 collect(ticket)
+        depth: 동시에 진행 중일 수 있는 프레임 수 (버퍼 세트 수)
+        기본 구현은 비동기가 아니라 여기서 바로 canny, 결과를 depth 개 버퍼에 돌려가며 복사해둠
+        (프레임을 붙잡아 뒀다가 collect 에서 계산하면 버퍼를 재사용하는 캡처 소스가 그 사이에 덮어씀)
+        """
+        edges = self.canny(image_bgra)
+        ring = self._submit_ring
+        if ring is None or len(ring[1]) != depth or ring[1][0].shape != edges.shape:
+            ring = self._submit_ring = [0, [np.empty_like(edges) for _ in range(depth)]]
+        out = ring[1][ring[0] % depth]
+        ring[0] += 1
+        np.copyto(out, edges)
+        return out
+
+    def collect(self, ticket) -> np.ndarray:
+        """submit 순서대로 호출, 반환 배열은 같은 버퍼 세트가 다시 쓰일 때까지 유효"""
+        return ticket
+
+    def set_profiling(self, enabled: bool):
+        """record_stages 가 쓸 디바이스 시간 기록 켜고 끄기 (실행 중에도 됨)"""
+        self.profiling = bool(enabled)
+
+    def set_autotune(self, enabled: bool):
+        """실행 설정(work-group 크기) 자동 튜닝 켜고 끄기, 튜닝할 게 없는 구현은 무시"""
+
+    def record_stages(self, perf):
+        """직전 canny/collect 의 세부 단계 시간(upload/kernel/readback)을 perf 에 기록 (재는 방법이 없으면 생략)"""
+
+
+def _largest_divisor(n, limit):
+    return max(d for d in range(1, min(n, limit) + 1) if n % d == 0)
+
+
+# work-group 크기 후보 (lx, ly), 디바이스 한도를 넘는 건 빼고 시도
+WORK_GROUP_CANDIDATES = [(8, 8), (16, 8), (16, 16), (32, 4), (32, 8), (64, 1), (64, 2), (64, 4), (128, 1), (256, 1)]
+TUNING_CACHE_FILE = "workgroup_cache.json"
+PROGRAM_CACHE_DIR = "programs"
+
+
+def edge_band_options(lo=EDGE_MAG_MIN, hi=EDGE_MAG_MAX):
+    return [f"-DEDGE_MAG_LO={int(lo)}.0f", f"-DEDGE_MAG_HI={int(hi)}.0f"]
+
+
+def build_program(ctx, device, source=KERNEL_CODE, options=None):
+    """
+    컴파일된 프로그램 바이너리를 GPU_CACHE_DIR/programs 에 (커널 소스 해시 + 빌드 옵션 + 디바이스/드라이버) 키로 캐시
+    return: (program, "cached" | "built")
+    """
+    options = edge_band_options() if options is None else list(options)
+    key_src = "\0".join([source, " ".join(options), device.name, device.driver_version, device.platform.version])
+    key = hashlib.sha256(key_src.encode("utf-8")).hexdigest()[:32]
+    path = os.path.join(GPU_CACHE_DIR, PROGRAM_CACHE_DIR, key + ".bin")
+
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                binary = f.read()
+            return cl.Program(ctx, [device], [binary]).build(options), "cached"
+        except (OSError, cl.Error) as e:  # 깨진 파일 / 드라이버가 거부 -> 소스에서 다시
+            print(f"[edge] cached program rejected ({str(e).splitlines()[0] if str(e) else type(e).__name__}), rebuilding")
+
+    program = cl.Program(ctx, source).build(options)
+    try:
+        binary = program.get_info(cl.program_info.BINARIES)[0]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(binary)
+        os.replace(path + ".tmp", path)
+    except (OSError, cl.Error) as e:
+        print(f"[edge] cannot save program binary: {e}")
+    return program, "built"
+
+
+def _tuning_key(device, w, h, stride):
+    return f"{device.name.strip()}|{device.driver_version.strip()}|{w}x{h}|stride{stride}"
+
+
+def load_tuning_cache(path=None):
+    path = path or os.path.join(GPU_CACHE_DIR, TUNING_CACHE_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_tuning_cache(cache, path=None):
+    path = path or os.path.join(GPU_CACHE_DIR, TUNING_CACHE_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1)
+    os.replace(tmp, path)  # 쓰다가 죽어도 기존 캐시는 온전하게
+
+
+class OpenCLEdgeBackend(EdgeBackend):
+    """
+    channel_only=True: 커널이 읽는 B 채널만 (h, w) 평면으로 뽑아서 업로드 (BGRA 전체의 1/4)
+    autotune=True: 디바이스/프레임 크기별로 처음 한 번 work-group 크기를 재서 고르고 디스크에 캐시
+    """
+    def __init__(self, device_kind="GPU", channel_only=True, autotune=EDGE_AUTOTUNE):
+        if cl is None:
+            raise RuntimeError("pyopencl is not installed")
+        device_type = getattr(cl.device_type, device_kind)
+        devices = []
+        for platform in cl.get_platforms():
+            try:
+                devices += platform.get_devices(device_type=device_type)
+            except cl.Error:  # 해당 타입 디바이스가 없는 플랫폼
+                continue
+        if not devices:
+            raise RuntimeError(f"No Available OpenCL {device_kind} Devices!")
+
+        self.name = f"opencl-{device_kind.lower()}"
+        self.device = devices[0]
+        self.ctx = cl.Context(devices=[self.device])
+        self.queue = self._new_queue()
+        self._build()
+
+        # canny 실행 설정 {"kernel": "canny_edge" | "canny_edge_tiled", "local": None | [lx, ly]}
+        self.autotune = autotune
+        self.launch = {"kernel": "canny_edge", "local": None}
 
         # 버퍼 재사용용
-        self._w = self._h = None
+        self.channel_only = channel_only
+        self._w = self._h = self._stride = None
+        self._plane = None
         self._img_buf = None
         self._out_buf = None
         self._out_host = None
+        self._coarse_buf = None
 
-    def _ensure_buffers(self, w, h):
-        if self._w == w and self._h == h and self._img_buf is not None:
+        # 직전 canny/collect 의 (upload, kernel, readback) 이벤트 (record_stages 용)
+        self._events = None
+
+        # edge_points 용
+        self._roi_src = None
+        self._roi_buf = None
+        self._pts_buf = None
+        self._pts_host = None
+        self._count_buf = None
+        self._count_host = np.zeros(1, dtype=np.int32)
+
+        # canny_stats 용 [엣지 수, 중심 원 안 엣지 수]
+        self._stats_host = np.zeros(2, dtype=np.int32)
+        self._stats_buf = None
+        # "local": 엣지 커널 안에서 work-group 트리 합산 / "host": canny 후 numpy 로 세기
+        # (pocl 같은 CPU 디바이스는 barrier 때문에 커널이 ~20배 느려짐, 엣지마다 원자적 덧셈도 ~10배)
+        # "local" 은 GPU 에서 돌려본 적 없음 (conf.EDGE_STATS_REJECT 참고)
+        self.stats_reduce = "host" if self.device.type & cl.device_type.CPU else "local"
+
+        # theta_histogram / theta_peaks 용
+        self._theta_bins = None
+        self._hist_buf = None
+        self._hist_host = None
+        self._peaks_buf = None
+        self._peaks_host = None
+        self._theta_count_buf = None
+        # work-group 마다 __local 히스토그램 하나라 너무 작으면 global 원자적 덧셈이 많아짐
+        # None 이면 theta_histogram_global (pocl 같은 CPU 디바이스는 barrier 비용이 커서 그쪽이 3배쯤 빠름)
+        if self.device.type & cl.device_type.CPU:
+            self.theta_local_size = None
+        else:
+            self.theta_local_size = (16, 16) if self.device.max_work_group_size >= 256 else (8, 8)
+
+        # canny_batch 용 (K, h, w) 버퍼
+        self._batch_shape = None
+        # canny_batch 의 work-group 크기 (None 이면 드라이버가 정함)
+        # pocl 같은 CPU 디바이스는 3-D 자동 크기가 느려서 한 행을 나누는 (n, 1, 1) 로
+        self.batch_local_size = "row" if self.device.type & cl.device_type.CPU else None
+        self._batch_in = None
+        self._batch_in_buf = None
+        self._batch_out_buf = None
+
+        # submit/collect 파이프라인 용 버퍼 세트
+        self._slots = []
+        self._slot_shape = None
+        self._next_slot = 0
+
+    def _build(self):
+        t0 = time.perf_counter()
+        self.prg, program_source = build_program(self.ctx, self.device, options=edge_band_options(*self.edge_band))
+        self.build_info = {"program": program_source, "ms": (time.perf_counter() - t0) * 1000}
+
+        # ✅ 커널 객체를 한 번만 생성해서 재사용
+        self.kernel_canny = cl.Kernel(self.prg, "canny_edge")
+        self.kernel_points = cl.Kernel(self.prg, "edge_points")
+        self.kernel_batch = cl.Kernel(self.prg, "canny_edge_batch")
+        self.kernel_tiled = cl.Kernel(self.prg, "canny_edge_tiled")
+        self.kernel_pyramid = cl.Kernel(self.prg, "canny_edge_pyramid")
+        self.kernel_stats = cl.Kernel(self.prg, "canny_edge_stats")
+        self.kernel_theta_hist = cl.Kernel(self.prg, "theta_histogram")
+        self.kernel_theta_hist_global = cl.Kernel(self.prg, "theta_histogram_global")
+        self.kernel_theta_peaks = cl.Kernel(self.prg, "theta_peaks")
+
+    def set_edge_band(self, lo, hi):
+        # 범위는 빌드 옵션이라 바뀌면 프로그램/커널을 다시 만듦 (바이너리 캐시는 범위별로)
+        if (int(lo), int(hi)) == self.edge_band:
             return
-        self._w, self._h = w, h
+        super().set_edge_band(lo, hi)
+        self._build()
+
+    @property
+    def stride(self):
+        return 1 if self.channel_only else 4
+
+    def _ensure_buffers(self, w, h):
+        if self._ensure_buffers_only(w, h) and self.autotune:
+            self._apply_tuning(w, h)
+
+    def _ensure_buffers_only(self, w, h):
+        """버퍼를 새로 만들었으면 True"""
+        stride = self.stride
+        if self._w == w and self._h == h and self._stride == stride and self._img_buf is not None:
+            return False
+        self._w, self._h, self._stride = w, h, stride
         mf = cl.mem_flags
-        self._img_buf = cl.Buffer(self.ctx, mf.READ_ONLY, size=w * h * 4)
+        self._img_buf = cl.Buffer(self.ctx, mf.READ_ONLY, size=w * h * stride)
+        self._plane = np.empty((h, w), dtype=np.uint8) if stride == 1 else None
         self._out_host = np.empty((h, w), dtype=np.uint8)
         self._out_buf = cl.Buffer(self.ctx, mf.WRITE_ONLY, size=self._out_host.nbytes)
+        # 커널이 테두리는 안 쓰므로 한 번 0으로 채워둠 (다른 백엔드와 출력 일치)
+        cl.enqueue_fill_buffer(self.queue, self._out_buf, np.uint8(0), 0, self._out_host.nbytes)
+        return True
 
-    def gpu_canny(self, image_bgra: np.ndarray) -> np.ndarray:
+    def _enqueue_canny(self, queue, img_buf, out_buf, w, h, stride, launch=None, wait_for=None):
+        launch = launch or self.launch
+        local = launch["local"]
+        args = [img_buf, out_buf, np.int32(w), np.int32(h), np.int32(stride)]
+        if launch["kernel"] == "canny_edge_tiled":
+            kernel = self.kernel_tiled
+            args.append(cl.LocalMemory((local[0] + 2) * (local[1] + 2)))
+        else:
+            kernel = self.kernel_canny
+        if local is None:
+            global_size = (w, h)
+        else:
+            local = tuple(local)
+            global_size = (-(-w // local[0]) * local[0], -(-h // local[1]) * local[1])
+        kernel.set_args(*args)
+        return cl.enqueue_nd_range_kernel(queue, kernel, global_size, local, wait_for=wait_for)
+
+    def _apply_tuning(self, w, h):
+        key = _tuning_key(self.device, w, h, self._stride)
+        cache = load_tuning_cache()
+        if key in cache:
+            self.launch = cache[key]["launch"]
+            source = "cached"
+        else:
+            self.launch, results = self.tune_work_group(w, h)
+            cache[key] = {"launch": self.launch, "results": results}
+            try:
+                save_tuning_cache(cache)
+            except OSError as e:
+                print(f"[edge] cannot save work-group cache: {e}")
+            source = "tuned"
+        local = self.launch["local"]
+        desc = "driver" if local is None else f"{local[0]}x{local[1]}"
+        print(f"[edge] {self.name} work-group ({w}x{h}): {self.launch['kernel']} {desc} ({source})")
+
+    def launch_candidates(self):
+        limit = min(self.device.max_work_group_size,
+                    self.kernel_canny.get_work_group_info(cl.kernel_work_group_info.WORK_GROUP_SIZE, self.device),
+                    self.kernel_tiled.get_work_group_info(cl.kernel_work_group_info.WORK_GROUP_SIZE, self.device))
+        local_mem = self.device.local_mem_size
+        candidates = [{"kernel": "canny_edge", "local": None}]
+        for lx, ly in WORK_GROUP_CANDIDATES:
+            if lx * ly > limit:
+                continue
+            candidates.append({"kernel": "canny_edge", "local": [lx, ly]})
+            if (lx + 2) * (ly + 2) <= local_mem:
+                candidates.append({"kernel": "canny_edge_tiled", "local": [lx, ly]})
+        return candidates
+
+    def tune_work_group(self, w, h, repeat=30):
+        """
+        후보 실행 설정을 대표 프레임으로 재서 가장 빠른 것 (출력이 기본 커널과 다르면 제외)
+        return: (launch, results) results = [{"kernel", "local", "us"}, ...]
+        """
+        self._ensure_buffers_only(w, h)
+        cl.enqueue_copy(self.queue, self._img_buf, self._upload_source(_sample_frame(w, h)), is_blocking=True)
+
+        reference = None
+        results = []
+        best, best_us = None, None
+        for launch in self.launch_candidates():
+            try:
+                self._enqueue_canny(self.queue, self._img_buf, self._out_buf, w, h, self._stride, launch)
+                cl.enqueue_copy(self.queue, self._out_host, self._out_buf, is_blocking=True)
+                if reference is None:
+                    reference = self._out_host.copy()
+                elif not np.array_equal(self._out_host, reference):
+                    continue
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    self._enqueue_canny(self.queue, self._img_buf, self._out_buf, w, h, self._stride, launch)
+                self.queue.finish()
+                us = (time.perf_counter() - t0) / repeat * 1e6
+            except cl.Error:  # 디바이스가 거부하는 크기
+                continue
+            results.append(dict(launch, us=round(us, 2)))
+            if best_us is None or us < best_us:
+                best, best_us = launch, us
+        return best, results
+
+    def _upload_source(self, image_bgra):
+        # 채널만 보낼 때는 strided view 에서 재사용 평면으로 한 번 복사
+        if self._plane is None:
+            return image_bgra
+        np.copyto(self._plane, image_bgra[:, :, 0])
+        return self._plane
+
+    def canny(self, image_bgra):
         h, w = image_bgra.shape[:2]
         self._ensure_buffers(w, h)
 
         # host -> device
-        cl.enqueue_copy(self.queue, self._img_buf, image_bgra, is_blocking=False)
+        upload = cl.enqueue_copy(self.queue, self._img_buf, self._upload_source(image_bgra), is_blocking=False)
 
-        # ✅ 커널 재사용 호출
-        self.kernel_canny.set_args(self._img_buf, self._out_buf, np.int32(w), np.int32(h))
-        cl.enqueue_nd_range_kernel(self.queue, self.kernel_canny, (w, h), None)
+        # ✅ 커널 재사용 호출 (work-group 크기는 튜닝 결과)
+        kernel = self._enqueue_canny(self.queue, self._img_buf, self._out_buf, w, h, self._stride)
 
         # device -> host
-        cl.enqueue_copy(self.queue, self._out_host, self._out_buf, is_blocking=True)
-        return self._out_host
\ No newline at end of file
+        readback = cl.enqueue_copy(self.queue, self._out_host, self._out_buf, is_blocking=True)
+        self._events = (upload, kernel, readback)
+        return self._out_host
+
+    def canny_stats(self, image_bgra):
+        if self.stats_reduce == "host":
+            return super().canny_stats(image_bgra)
+        h, w = image_bgra.shape[:2]
+        self._ensure_buffers(w, h)
+        if self._stats_buf is None:
+            self._stats_buf = cl.Buffer(self.ctx, cl.mem_flags.READ_WRITE, size=self._stats_host.nbytes)
+
+        upload = cl.enqueue_copy(self.queue, self._img_buf, self._upload_source(image_bgra), is_blocking=False)
+        cl.enqueue_fill_buffer(self.queue, self._stats_buf, np.int32(0), 0, self._stats_host.nbytes)
+
+        local = self._stats_local()
+        global_size = (-(-w // local[0]) * local[0], -(-h // local[1]) * local[1])
+        self.kernel_stats.set_args(self._img_buf, self._out_buf, self._stats_buf, np.int32(w), np.int32(h),
+                                   np.int32(self._stride), *map(np.int32, stats_radius_range(w, h)),
+                                   cl.LocalMemory(4 * local[0] * local[1]))
+        kernel = cl.enqueue_nd_range_kernel(self.queue, self.kernel_stats, global_size, local)
+
+        cl.enqueue_copy(self.queue, self._stats_host, self._stats_buf, is_blocking=False)
+        readback = cl.enqueue_copy(self.queue, self._out_host, self._out_buf, is_blocking=True)
+        self._events = (upload, kernel, readback)
+        return self._out_host, self._stats_host
+
+    def _stats_local(self):
+        # 합산이 work-group 단위라 local size 가 꼭 필요 (튜닝 결과가 드라이버 자동이면 16x16)
+        # 튜닝은 canny_edge 기준이라 stats 커널의 한도를 넘으면 긴 쪽부터 반으로 (2의 거듭제곱 유지)
+        limit = min(self.device.max_work_group_size,
+                    self.kernel_stats.get_work_group_info(cl.kernel_work_group_info.WORK_GROUP_SIZE, self.device),
+                    self.device.local_mem_size // 4)
+        lx, ly = self.launch["local"] or (16, 16)
+        while lx * ly > limit:
+            if lx >= ly:
+                lx //= 2
+            else:
+                ly //= 2
+        return lx, ly
+
+    def _enqueue_theta_histogram(self, image_bgra, bins):
+        h, w = image_bgra.shape[:2]
+        self._ensure_buffers(w, h)
+        mf = cl.mem_flags
+        if self._theta_bins != bins:
+            # 뒤 두 칸은 [엣지 수, 중심 원 안 엣지 수]
+            self._hist_host = np.zeros(bins + 2, dtype=np.int32)
+            self._hist_buf = cl.Buffer(self.ctx, mf.READ_WRITE, size=self._hist_host.nbytes)
+            # 봉우리는 +-2 bin 안에서 하나라 bins 개면 넘치지 않음
+            self._peaks_host = np.zeros((bins, 2), dtype=np.float32)
+            self._peaks_buf = cl.Buffer(self.ctx, mf.READ_WRITE, size=self._peaks_host.nbytes)
+            self._theta_count_buf = cl.Buffer(self.ctx, mf.READ_WRITE, size=4)
+            self._theta_bins = bins
+
+        upload = cl.enqueue_copy(self.queue, self._img_buf, self._upload_source(image_bgra), is_blocking=False)
+        cl.enqueue_fill_buffer(self.queue, self._hist_buf, np.int32(0), 0, self._hist_host.nbytes)
+        r2_min, r2_max = theta_radius_range(w, h)
+        r2_center = stats_radius_range(w, h)[1]
+        args = [self._img_buf, self._hist_buf, np.int32(w), np.int32(h), np.int32(self._stride),
+                np.int32(r2_min), np.int32(r2_max), np.int32(r2_center), np.int32(bins)]
+        local = self.theta_local_size
+        if local is None:
+            self.kernel_theta_hist_global.set_args(*args)
+            kernel = cl.enqueue_nd_range_kernel(self.queue, self.kernel_theta_hist_global, (w, h), None)
+        else:
+            global_size = (-(-w // local[0]) * local[0], -(-h // local[1]) * local[1])
+            self.kernel_theta_hist.set_args(*args, cl.LocalMemory(4 * (bins + 2)))
+            kernel = cl.enqueue_nd_range_kernel(self.queue, self.kernel_theta_hist, global_size, local)
+        return upload, kernel
+
+    def theta_histogram(self, image_bgra, bins=THETA_BINS):
+        upload, kernel = self._enqueue_theta_histogram(image_bgra, bins)
+        readback = cl.enqueue_copy(self.queue, self._hist_host, self._hist_buf, is_blocking=True)
+        self._events = (upload, kernel, readback)
+        return self._hist_host[:bins]
+
+    def theta_peaks(self, image_bgra, max_peaks=THETA_MAX_PEAKS):
+        return self._theta_peaks(image_bgra, max_peaks)
+
+    def theta_peaks_stats(self, image_bgra, max_peaks=THETA_MAX_PEAKS):
+        return self._theta_peaks(image_bgra, max_peaks, stats=True)
+
+    def _theta_peaks(self, image_bgra, max_peaks, stats=False):
+        # 히스토그램 -> 봉우리까지 디바이스에서, 읽어오는 건 개수 + 봉우리 몇 개뿐 (stats 면 뒤 두 칸도)
+        upload, kernel = self._enqueue_theta_histogram(image_bgra, THETA_BINS)
+        if stats:
+            cl.enqueue_copy(self.queue, self._hist_host[THETA_BINS:], self._hist_buf,
+                            device_offset=4 * THETA_BINS, is_blocking=False)
+        cl.enqueue_fill_buffer(self.queue, self._theta_count_buf, np.int32(0), 0, 4)
+        self.kernel_theta_peaks.set_args(self._hist_buf, self._peaks_buf, self._theta_count_buf,
+                                         np.int32(THETA_BINS), np.int32(THETA_MIN_VOTES))
+        cl.enqueue_nd_range_kernel(self.queue, self.kernel_theta_peaks, (THETA_BINS,), None)
+        readback = cl.enqueue_copy(self.queue, self._count_host, self._theta_count_buf, is_blocking=True)
+        n = int(self._count_host[0])
+        if n:
+            readback = cl.enqueue_copy(self.queue, self._peaks_host[:n], self._peaks_buf, is_blocking=True)
+        self._events = (upload, kernel, readback)
+        # 원자적 카운터 순서라 정렬은 여기서 (봉우리 수십 개 이하)
+        peaks = _sort_peaks(self._peaks_host[:n], max_peaks)
+        return (peaks, self._hist_host[THETA_BINS:]) if stats else peaks
+
+    def canny_pyramid(self, image_bgra, factor):
+        h, w = image_bgra.shape[:2]
+        self._ensure_buffers(w, h)
+        ch, cw = h // factor, w // factor
+        coarse = self._coarse_host
+        if coarse is None or coarse.shape != (ch, cw):
+            coarse = self._coarse_out(ch, cw)
+            self._coarse_buf = cl.Buffer(self.ctx, cl.mem_flags.WRITE_ONLY, size=coarse.nbytes)
+
+        upload = cl.enqueue_copy(self.queue, self._img_buf, self._upload_source(image_bgra), is_blocking=False)
+
+        cl.enqueue_fill_buffer(self.queue, self._coarse_buf, np.uint8(0), 0, coarse.nbytes)
+
+        # 전체 엣지와 축소 엣지를 한 커널에서 (work-group 크기는 canny 튜닝 결과를 그대로)
+        local = self.launch["local"]
+        if local is None:
+            global_size = (w, h)
+        else:
+            local = tuple(local)
+            global_size = (-(-w // local[0]) * local[0], -(-h // local[1]) * local[1])
+        self.kernel_pyramid.set_args(self._img_buf, self._out_buf, self._coarse_buf, np.int32(w), np.int32(h),
+                                     np.int32(self._stride), np.int32(factor.bit_length() - 1))
+        kernel = cl.enqueue_nd_range_kernel(self.queue, self.kernel_pyramid, global_size, local)
+
+        cl.enqueue_copy(self.queue, coarse, self._coarse_buf, is_blocking=False)
+        readback = cl.enqueue_copy(self.queue, self._out_host, self._out_buf, is_blocking=True)
+        self._events = (upload, kernel, readback)
+        return self._out_host, coarse
+
+    def _ensure_batch_buffers(self, k, w, h):
+        # 최대 K 기준, 더 작은 묶음은 앞쪽 k 장만 올리고 global size 의 K 로 장 수를 넘김
+        stride = self.stride
+        shape = self._batch_shape
+        if shape is not None and shape[0] >= k and shape[1:] == (h, w, stride):
+            return
+        mf = cl.mem_flags
+        self._batch_in = np.empty((k, h, w) if stride == 1 else (k, h, w, 4), dtype=np.uint8)
+        self._batch_in_buf = cl.Buffer(self.ctx, mf.READ_ONLY, size=self._batch_in.nbytes)
+        out = self._batch_out(k, h, w)
+        self._batch_out_buf = cl.Buffer(self.ctx, mf.WRITE_ONLY, size=out.nbytes)
+        cl.enqueue_fill_buffer(self.queue, self._batch_out_buf, np.uint8(0), 0, out.nbytes)
+        self._batch_shape = (k, h, w, stride)
+
+    def canny_batch(self, frames):
+        k = len(frames)
+        h, w = frames[0].shape[:2]
+        self._ensure_batch_buffers(k, w, h)
+        stride = self._batch_shape[3]
+
+        # K장을 한 버퍼에 모아서 업로드 1번 + 커널 1번 + 읽기 1번
+        for i, frame in enumerate(frames):
+            np.copyto(self._batch_in[i], frame[:, :, 0] if stride == 1 else frame)
+        cl.enqueue_copy(self.queue, self._batch_in_buf, self._batch_in[:k], is_blocking=False)
+        self.kernel_batch.set_args(self._batch_in_buf, self._batch_out_buf, np.int32(w), np.int32(h), np.int32(stride))
+        local = self.batch_local_size
+        if local == "row":
+            local = (_largest_divisor(w, self.device.max_work_group_size), 1, 1)
+        cl.enqueue_nd_range_kernel(self.queue, self.kernel_batch, (w, h, k), local)
+        out = self._batch_host[:k]
+        cl.enqueue_copy(self.queue, out, self._batch_out_buf, is_blocking=True)
+        return out
+
+    def _ensure_slots(self, w, h, depth):
+        stride = self.stride
+        if self._slot_shape == (h, w, depth, stride):
+            return
+        for slot in self._slots:
+            slot["queue"].finish()
+        mf = cl.mem_flags
+        self._slots = []
+        for _ in range(depth):
+            # 세트마다 in-order 큐를 따로 둬서 한 세트의 전송/커널이 다른 세트와 겹칠 수 있게 함
+            queue = self._new_queue()
+            # ALLOC_HOST_PTR 스테이징 버퍼를 계속 매핑해두고 numpy로 씀 (page-locked 메모리 -> DMA 전송)
+            in_shape = (h, w) if stride == 1 else (h, w, 4)
+            in_pinned = cl.Buffer(self.ctx, mf.READ_ONLY | mf.ALLOC_HOST_PTR, size=w * h * stride)
+            out_pinned = cl.Buffer(self.ctx, mf.WRITE_ONLY | mf.ALLOC_HOST_PTR, size=w * h)
+            host_in, _ = cl.enqueue_map_buffer(queue, in_pinned, cl.map_flags.WRITE, 0, in_shape, np.uint8)
+            host_out, _ = cl.enqueue_map_buffer(queue, out_pinned, cl.map_flags.READ, 0, (h, w), np.uint8)
+            img_buf = cl.Buffer(self.ctx, mf.READ_ONLY, size=w * h * stride)
+            out_buf = cl.Buffer(self.ctx, mf.WRITE_ONLY, size=w * h)
+            cl.enqueue_fill_buffer(queue, out_buf, np.uint8(0), 0, w * h)
+            self._slots.append({
+                "queue": queue,
+                "in_pinned": in_pinned, "out_pinned": out_pinned,
+                "host_in": host_in, "host_out": host_out,
+                "img_buf": img_buf, "out_buf": out_buf,
+            })
+        self._slot_shape = (h, w, depth, stride)
+        self._next_slot = 0
+
+    def submit(self, image_bgra, depth=2):
+        h, w = image_bgra.shape[:2]
+        self._ensure_slots(w, h, depth)
+        slot = self._slots[self._next_slot]
+        self._next_slot = (self._next_slot + 1) % depth
+        queue = slot["queue"]
+
+        # 업로드 -> 커널 -> 읽기를 이벤트로 연결해서 한 번에 넣고 바로 반환
+        # (채널만 보낼 때는 캡처 버퍼에서 pinned 평면으로 바로 뽑음)
+        stride = self._slot_shape[3]
+        np.copyto(slot["host_in"], image_bgra[:, :, 0] if stride == 1 else image_bgra)
+        upload = cl.enqueue_copy(queue, slot["img_buf"], slot["host_in"], is_blocking=False)
+        kernel = self._enqueue_canny(queue, slot["img_buf"], slot["out_buf"], w, h, stride, wait_for=[upload])
+        readback = cl.enqueue_copy(queue, slot["host_out"], slot["out_buf"], is_blocking=False, wait_for=[kernel])
+        queue.flush()  # 드라이버에 바로 넘겨서 CPU가 다른 일을 하는 동안 진행되게
+        return slot, (upload, kernel, readback)
+
+    def collect(self, ticket):
+        slot, events = ticket
+        events[-1].wait()
+        self._events = events
+        return slot["host_out"]
+
+    def _new_queue(self):
+        # 단계 시간 기록이 켜져 있으면 이벤트에 디바이스 시각이 남도록
+        if self.profiling:
+            return cl.CommandQueue(self.ctx, properties=cl.command_queue_properties.PROFILING_ENABLE)
+        return cl.CommandQueue(self.ctx)
+
+    def set_autotune(self, enabled):
+        # 켤 때 이미 버퍼가 있으면 (선택 벤치마크로 대표 프레임을 돌린 뒤) 그 크기로 바로 튜닝
+        self.autotune = bool(enabled)
+        if self.autotune and self._img_buf is not None:
+            self._apply_tuning(self._w, self._h)
+
+    def set_profiling(self, enabled):
+        # 프로파일링은 큐 속성이라 바뀌면 큐를 새로 (파이프라인 버퍼 세트는 다음 submit 때 새 큐로 다시)
+        enabled = bool(enabled)
+        if enabled == self.profiling:
+            return
+        self.queue.finish()
+        for slot in self._slots:
+            slot["queue"].finish()
+        self.profiling = enabled
+        self.queue = self._new_queue()
+        self._slots = []
+        self._slot_shape = None
+        self._events = None
+
+    def record_stages(self, perf):
+        if self._events is None or not self.profiling:
+            return
+        start, end = cl.profiling_info.START, cl.profiling_info.END
+        for stage, event in zip(("upload", "kernel", "readback"), self._events):
+            perf.add(stage, event.get_profiling_info(end) - event.get_profiling_info(start))
+
+    def _ensure_point_buffers(self, w, h, roi):
+        self._ensure_buffers(w, h)
+        mf = cl.mem_flags
+        if self._pts_host is None or len(self._pts_host) != w * h:
+            # 최악의 경우(전부 엣지)도 넘치지 않게 w*h 개
+            self._pts_host = np.empty((w * h, 2), dtype=np.uint16)
+            self._pts_buf = cl.Buffer(self.ctx, mf.WRITE_ONLY, size=self._pts_host.nbytes)
+            self._count_buf = cl.Buffer(self.ctx, mf.READ_WRITE, size=4)
+            self._roi_src = None
+        if roi is not self._roi_src:
+            # ROI 마스크는 바뀔 때만 업로드
+            self._roi_buf = cl.Buffer(self.ctx, mf.READ_ONLY | mf.COPY_HOST_PTR,
+                                      hostbuf=np.ascontiguousarray(roi, dtype=np.uint8))
+            self._roi_src = roi
+
+    def edge_points(self, image_bgra, roi):
+        h, w = image_bgra.shape[:2]
+        self._ensure_point_buffers(w, h, roi)
+
+        cl.enqueue_copy(self.queue, self._img_buf, self._upload_source(image_bgra), is_blocking=False)
+        cl.enqueue_fill_buffer(self.queue, self._count_buf, np.int32(0), 0, 4)
+
+        self.kernel_points.set_args(self._img_buf, self._roi_buf, self._pts_buf, self._count_buf,
+                                    np.int32(w), np.int32(h), np.int32(self._stride))
+        cl.enqueue_nd_range_kernel(self.queue, self.kernel_points, (w, h), None)
+
+        # 개수(4바이트)를 먼저 읽고, 그만큼의 좌표만 읽어옴
+        cl.enqueue_copy(self.queue, self._count_host, self._count_buf, is_blocking=True)
+        n = int(self._count_host[0])
+        if n:
+            cl.enqueue_copy(self.queue, self._pts_host[:n], self._pts_buf, is_blocking=True)
+        return self._pts_host[:n]
+
+
+class NumpyEdgeBackend(EdgeBackend):
+    """OpenCL 커널과 같은 계산을 numpy 슬라이스로 (제곱값 비교라 sqrt 없음)"""
+    name = "numpy"
+
+    def __init__(self):
+        self._out = None
+
+    def canny(self, image_bgra):
+        h, w = image_bgra.shape[:2]
+        if self._out is None or self._out.shape != (h, w):
+            self._out = np.zeros((h, w), dtype=np.uint8)
+
+        b = image_bgra[:, :, 0].astype(np.int32)
+        gx = b[2:h-1, 1:w-2] - b[2:h-1, 3:w]
+        gy = b[1:h-2, 2:w-1] - b[3:h, 2:w-1]
+        mag2 = gx * gx + gy * gy
+
+        lo, hi = self.edge_band
+        edge = (mag2 >= lo * lo) & (mag2 <= hi * hi)
+        np.multiply(edge, 255, out=self._out[2:h-1, 2:w-1], casting="unsafe")
+        return self._out
+
+
+class OpenCVEdgeBackend(EdgeBackend):
+    """cv2.Sobel(ksize=1) == 중앙차분, magnitude + inRange"""
+    name = "opencv"
+
+    def __init__(self):
+        if cv2 is None:
+            raise RuntimeError("opencv is not installed")
+
+    def canny(self, image_bgra):
+        h, w = image_bgra.shape[:2]
+        b = cv2.extractChannel(image_bgra, 0)
+        gx = cv2.Sobel(b, cv2.CV_32F, 1, 0, ksize=1)
+        gy = cv2.Sobel(b, cv2.CV_32F, 0, 1, ksize=1)
+        out = cv2.inRange(cv2.magnitude(gx, gy), *self.edge_band)
+
+        # 커널과 같은 유효 영역만 남김
+        out[:2, :] = 0
+        out[h-1:, :] = 0
+        out[:, :2] = 0
+        out[:, w-1:] = 0
+        return out
+
+
+# 자동 선택 시 후보 (순서 = 시간이 같을 때의 우선순위)
+EDGE_BACKENDS = {
+    "opencl-gpu": partial(OpenCLEdgeBackend, "GPU"),
+    "opencl-cpu": partial(OpenCLEdgeBackend, "CPU"),
+    "opencv": OpenCVEdgeBackend,
+    "numpy": NumpyEdgeBackend,
+}
+
+
+def create_edge_backend(name):
+    if name not in EDGE_BACKENDS:
+        raise ValueError(f"unknown edge backend: {name} (choose from {', '.join(EDGE_BACKENDS)})")
+    return EDGE_BACKENDS[name]()
+
+
+def _sample_frame(w=298, h=260, seed=0):
+    """미니맵 크기의 대표 프레임: 노이즈 배경 + 중심에서 뻗는 시야각 선 두 개"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 60, size=(h, w, 4), dtype=np.uint8)
+    frame[:, :, 3] = 255
+    cx, cy = w // 2, h // 2
+    t = np.arange(0, min(w, h) // 2 - 5)
+    for deg in (-150, -30):
+        xs = (cx + t * np.cos(np.radians(deg))).astype(int)
+        ys = (cy + t * np.sin(np.radians(deg))).astype(int)
+        frame[ys, xs, :3] = 230
+    return frame
+
+
+def select_edge_backend(sample=None, repeat=15, verbose=True, autotune=EDGE_AUTOTUNE):
+    """
+    후보 백엔드를 대표 프레임으로 짧게 돌려보고
+    numpy 기준 결과와 같은 것 중 가장 빠른 것을 고름
+    work-group 튜닝은 후보 비교 때는 끄고 (기본 실행 설정으로 비교) 고른 백엔드에만 autotune 이면 켬
+    return: (backend, report) report = [(name, ms or None, note), ...]
+    """
+    if sample is None:
+        sample = _sample_frame()
+    reference = NumpyEdgeBackend().canny(sample).copy()
+
+    report = []
+    best, best_ms = None, None
+    for name, factory in EDGE_BACKENDS.items():
+        try:
+            backend = factory()
+            backend.set_autotune(False)
+            out = backend.canny(sample)  # 워밍업 (빌드/버퍼 할당)
+            if not np.array_equal(out, reference):
+                report.append((name, None, "output mismatch"))
+                continue
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                backend.canny(sample)
+                times.append(time.perf_counter() - t0)
+            ms = float(np.median(times)) * 1000
+        except Exception as e:
+            report.append((name, None, str(e).splitlines()[0] if str(e) else type(e).__name__))
+            continue
+
+        report.append((name, ms, "ok"))
+        if best_ms is None or ms < best_ms:
+            best, best_ms = backend, ms
+
+    if verbose:
+        for name, ms, note in report:
+            print(f"[edge] {name:<11} {f'{ms:.3f} ms' if ms is not None else '-':>10}  {note}")
+        print(f"[edge] selected backend: {best.name}")
+    best.set_autotune(autotune)
+    return best, report
+
+
+class GPUUtils:
+    """
+    엣지 검출 진입점
+    backend=None 이면 시작할 때 마이크로 벤치마크로 자동 선택
+    (GPU가 없는 PC에서도 CPU 구현으로 계속 동작)
+    """
+    def __init__(self, backend=None, sample=None):
+        self.backend_report = []
+        if backend is None:
+            backend, self.backend_report = select_edge_backend(sample)
+        elif isinstance(backend, str):
+            backend = create_edge_backend(backend)
+        self.backend = backend
+        self._perf = None
+
+    @property
+    def perf(self):
+        """perf.PerfRing 을 넣으면 OpenCL upload/kernel/readback 시간도 기록 (백엔드 프로파일링도 같이 켬)"""
+        return self._perf
+
+    @perf.setter
+    def perf(self, value):
+        self._perf = value
+        self.backend.set_profiling(value is not None)
+
+    @property
+    def backend_name(self):
+        return self.backend.name
+
+    def set_edge_band(self, lo: int, hi: int):
+        self.backend.set_edge_band(lo, hi)
+
+    def gpu_canny(self, image_bgra: np.ndarray) -> np.ndarray:
+        edges = self.backend.canny(image_bgra)
+        if self.perf is not None:
+            self.backend.record_stages(self.perf)
+        return edges
+
+    def gpu_canny_stats(self, image_bgra: np.ndarray):
+        edges, stats = self.backend.canny_stats(image_bgra)
+        if self.perf is not None:
+            self.backend.record_stages(self.perf)
+        return edges, stats
+
+    def gpu_theta_peaks(self, image_bgra: np.ndarray, max_peaks: int = THETA_MAX_PEAKS) -> np.ndarray:
+        peaks = self.backend.theta_peaks(image_bgra, max_peaks)
+        if self.perf is not None:
+            self.backend.record_stages(self.perf)
+        return peaks
+
+    def gpu_theta_peaks_stats(self, image_bgra: np.ndarray, max_peaks: int = THETA_MAX_PEAKS):
+        peaks, stats = self.backend.theta_peaks_stats(image_bgra, max_peaks)
+        if self.perf is not None:
+            self.backend.record_stages(self.perf)
+        return peaks, stats
+
+    def edge_stats(self, edges: np.ndarray) -> np.ndarray:
+        """이미 받아온 엣지 이미지로 gpu_canny_stats 와 같은 [엣지 수, 중심 원 안 엣지 수] (파이프라인/묶음/피라미드 경로용)"""
+        return self.backend.edge_stats(edges)
+
+    def edge_theta_peaks(self, edges: np.ndarray, max_peaks: int = THETA_MAX_PEAKS) -> np.ndarray:
+        """이미 받아온 엣지 이미지로 gpu_theta_peaks 와 같은 후보 (CPU, 파이프라인/묶음 경로용)"""
+        return theta_peaks_from_histogram(self.backend.edge_theta_histogram(edges), max_peaks)
+
+    def gpu_canny_pyramid(self, image_bgra: np.ndarray, factor: int):
+        edges, coarse = self.backend.canny_pyramid(image_bgra, factor)
+        if self.perf is not None:
+            self.backend.record_stages(self.perf)
+        return edges, coarse
+
+    def gpu_edge_points(self, image_bgra: np.ndarray, roi: np.ndarray) -> np.ndarray:
+        return self.backend.edge_points(image_bgra, roi)
+
+    def points_theta_peaks(self, points: np.ndarray, shape, max_peaks: int = THETA_MAX_PEAKS) -> np.ndarray:
+        """gpu_edge_points 결과로 gpu_theta_peaks 와 같은 후보 (CPU, "points" 출력용)"""
+        return theta_peaks_from_histogram(self.backend.points_theta_histogram(points, shape), max_peaks)
+
+    def points_stats(self, points: np.ndarray, shape) -> np.ndarray:
+        """gpu_edge_points 결과로 gpu_canny_stats 와 같은 [엣지 수, 중심 원 안 엣지 수]"""
+        return self.backend.points_stats(points, shape)
+
+    def gpu_canny_batch(self, frames) -> np.ndarray:
+        return self.backend.canny_batch(frames)
+
+    def gpu_canny_submit(self, image_bgra: np.ndarray, depth: int = 2):
+        return self.backend.submit(image_bgra, depth)
+
+    def gpu_canny_collect(self, ticket) -> np.ndarray:
+        edges = self.backend.collect(ticket)
+        if self.perf is not None:
+            self.backend.record_stages(self.perf)
+        return edges
+
+
+class GPUWarmup(threading.Thread):
+    """
+    GPUUtils 생성(OpenCL 컨텍스트, 프로그램 빌드, 백엔드 선택 벤치마크)을 백그라운드 스레드에서
+    result() 가 끝날 때까지 기다렸다가 GPUUtils 를 돌려줌 (실패하면 numpy 백엔드)
+    """
+    def __init__(self, backend=None):
+        super().__init__(name="gpu-warmup", daemon=True)
+        self.backend = backend
+        self.gpu_utils = None
+        self.elapsed = None
+        self.start()
+
+    def run(self):
+        t0 = time.perf_counter()
+        try:
+            self.gpu_utils = GPUUtils(self.backend)
+        except Exception as e:
+            print(f"[edge] warm-up failed ({e}), using numpy")
+            self.gpu_utils = GPUUtils("numpy")
+        self.elapsed = time.perf_counter() - t0
+        startup.mark("gpu ready")
+
+    def result(self, timeout=None):
+        self.join(timeout)
+        return self.gpu_utils
+
+
+def circular_roi(w, h, radius=None):
+    """미니맵 중심 기준 원형 ROI 마스크 (h, w) uint8"""
+    if radius is None:
+        radius = min(w, h) // 2
+    ys, xs = np.ogrid[:h, :w]
+    return (((xs - w // 2) ** 2 + (ys - h // 2) ** 2) <= radius ** 2).astype(np.uint8)
@@ -1,7 +1,10 @@
+import startup  # 시작 시간 기준점 (가장 먼저)
 import sys, os
 import threading
+import multiprocessing
 import math
 import json
+import time
 from PyQt5.QtCore import (
     QMetaObject,
     Qt,
@@ -41,8 +44,14 @@ from screen_scan import (
     AzimuthCaptureThread,
 )
 from draw_tools import draw_neon_line
+from perf import PerfLog
 from conf import(
     AZIMUTH_DURATION,
+    VISION_PROCESS,
+    COMPASS_EXTRAPOLATE,
+    DISPLAY_FPS,
+    PERF_LOG_SEC,
+    TUNING_PROFILE,
 )
 from tools import Cannon, HitTableWorker, SimpleGetWorker
 
@@ -297,6 +306,7 @@ class HUDWindow(QWidget):
         self.move(int(new_x), int(new_y))
 
     def paintEvent(self, event):
+        startup.mark("first HUD paint")
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
 
@@ -734,9 +744,15 @@ class CompassWindow(QWidget):
 
         # 업데이트 타이머(기존 compass_timer 역할)
         self.compass_timer = QTimer(self)
-        self.compass_timer.setInterval(AZIMUTH_DURATION)
-        self.compass_timer.timeout.connect(lambda: self.compass_widget.set_rotation_start_ani(self.new_azimuth))
-        self.compass_timer.timeout.connect(lambda: self.azimuth_widget.set_azimuth_start_ani(self.new_azimuth))
+        if COMPASS_EXTRAPOLATE:
+            # 샘플 사이를 화면 갱신 주기로 내다봐서 그림 (update_sample 로 받음)
+            self.compass_timer.setTimerType(Qt.PreciseTimer)
+            self.compass_timer.setInterval(1000 // DISPLAY_FPS)
+            self.compass_timer.timeout.connect(self._advance)
+        else:
+            self.compass_timer.setInterval(AZIMUTH_DURATION)
+            self.compass_timer.timeout.connect(lambda: self.compass_widget.set_rotation_start_ani(self.new_azimuth))
+            self.compass_timer.timeout.connect(lambda: self.azimuth_widget.set_azimuth_start_ani(self.new_azimuth))
         self.compass_timer.start()
 
         # 화면 중앙 하단에 고정 배치(원하면 좌표 조절)
@@ -748,8 +764,20 @@ class CompassWindow(QWidget):
     def update_azimuth(self, new_azimuth):
         self.new_azimuth = new_azimuth
 
+    def update_sample(self, sample):
+        now = time.perf_counter()
+        self.new_azimuth = sample.azimuth
+        self.compass_widget.set_sample(sample, now)
+        self.azimuth_widget.set_sample(sample, now)
+
+    def _advance(self):
+        now = time.perf_counter()
+        self.compass_widget.advance(now)
+        self.azimuth_widget.advance(now)
+
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # PyInstaller onefile 에서 vision 워커 프로세스(spawn) 실행용
     app = QApplication([])
 
     hud_window = HUDWindow()
@@ -785,8 +813,18 @@ if __name__ == '__main__':
     y1 = 30
     x2 = x1 + 298
     y2 = y1 + 260
-    azimuth_thread = AzimuthCaptureThread((x1, y1, x2, y2))
-    azimuth_thread.angle_signal.connect(compass_window.update_azimuth)
+    if VISION_PROCESS:
+        from vision_worker import VisionProcessThread
+        azimuth_thread = VisionProcessThread((x1, y1, x2, y2), profile=TUNING_PROFILE)
+    else:
+        azimuth_thread = AzimuthCaptureThread((x1, y1, x2, y2), profile=TUNING_PROFILE)
+    if COMPASS_EXTRAPOLATE:
+        azimuth_thread.sample_signal.connect(compass_window.update_sample)
+    else:
+        azimuth_thread.angle_signal.connect(compass_window.update_azimuth)
+    # 단계별 시간 요약은 로그 한 줄로 (워커 프로세스 모드는 워커가 직접 출력)
+    if PERF_LOG_SEC and hasattr(azimuth_thread, "perf_signal"):
+        azimuth_thread.perf_signal.connect(PerfLog(PERF_LOG_SEC))
     azimuth_thread.start()
 
     # keyboard thread
@@ -0,0 +1,167 @@
+"""
+방위각 파이프라인 단계별 시간 기록 (conf.PERF_ENABLED 로 켬, 끄면 기록 호출 자체가 없음)
+
+    perf = PerfRing()
+    perf.add("grab", ns)                 # 직접 잰 시간
+    perf.marks(marks)                    # calculate_angle 의 marks [(단계, perf_counter_ns), ...] -> 단계별 시간
+    perf.count("lines", n)
+    perf.end(rejected=angle is None)     # 프레임 하나 확정 (링 버퍼에 기록, 다음 프레임용으로 비움)
+    perf.snapshot()                      # 최근 capacity 프레임의 단계별 p50/p95/p99 (us), 카운터 평균, 누적 수
+                                         # (모든 단계를 한 번에 정렬해서 계산)
+
+- 프레임 안에서는 파이썬 list 에만 쓰고 end() 때 한 번에 numpy 링 버퍼로 복사 (프레임당 수 us)
+- 시간 0 / 카운터 -1 = 그 프레임에서 해당 단계까지 가지 않음 (통계에서 제외)
+- upload/kernel/readback 은 OpenCL 이벤트의 디바이스 시간 (edge 안에 포함되는 세부 시간)
+"""
+import time
+
+import numpy as np
+
+STAGES = ("grab", "check", "edge", "upload", "kernel", "readback",
+          "coarse", "refine", "hough", "filter", "candidates", "cluster", "pair", "ring", "theta", "ema")
+# edge 의 세부 시간이라 프레임 합계에서는 뺌
+DEVICE_STAGES = ("upload", "kernel", "readback")
+COUNTERS = ("lines", "filtered", "reps", "edges", "center")
+
+
+class PerfRing:
+    def __init__(self, capacity=512, stages=STAGES, counters=COUNTERS):
+        self.capacity = capacity
+        self.stages = stages
+        self.counters = counters
+        self._stage_col = {s: i for i, s in enumerate(stages)}
+        self._count_col = {c: i for i, c in enumerate(counters)}
+        self._ns = np.zeros((capacity, len(stages)), dtype=np.int64)
+        self._counts = np.full((capacity, len(counters)), -1, dtype=np.int32)
+        self._cur_ns = [0] * len(stages)
+        self._cur_counts = [-1] * len(counters)
+        self.frames = 0
+        self.rejected = 0
+        self.skipped = 0
+
+    def add(self, stage, ns):
+        self._cur_ns[self._stage_col[stage]] = ns
+
+    def marks(self, marks):
+        col = self._stage_col
+        cur = self._cur_ns
+        t_prev = marks[0][1]
+        for stage, t in marks[1:]:
+            cur[col[stage]] = t - t_prev
+            t_prev = t
+
+    def count(self, name, n):
+        self._cur_counts[self._count_col[name]] = n
+
+    def end(self, rejected=False, skipped=False):
+        row = self.frames % self.capacity
+        self._ns[row] = self._cur_ns
+        self._counts[row] = self._cur_counts
+        self._cur_ns = [0] * len(self.stages)
+        self._cur_counts = [-1] * len(self.counters)
+        self.frames += 1
+        self.rejected += rejected
+        self.skipped += skipped
+
+    def reset(self):
+        self._ns[:] = 0
+        self._counts[:] = -1
+        self._cur_ns = [0] * len(self.stages)
+        self._cur_counts = [-1] * len(self.counters)
+        self.frames = self.rejected = self.skipped = 0
+
+    def snapshot(self):
+        """
+        {"frames", "rejected", "skipped", "window",
+         "stages": {단계: {"n", "p50", "p95", "p99"} (us), "total": 호스트 단계 합},
+         "counts": {카운터: 평균 (기록된 프레임만)}}
+        """
+        n = min(self.frames, self.capacity)
+        ns = self._ns[:n]
+        # 단계 열 + 호스트 합계 열을 한 번에 (정렬 한 번, 열마다 np.percentile 부르면 ms 단위)
+        host = [i for i, s in enumerate(self.stages) if s not in DEVICE_STAGES]
+        columns = np.column_stack((ns, ns[:, host].sum(axis=1)))
+        valid, pct = _column_percentiles(columns, (50, 95, 99))
+        stages = {}
+        for i, stage in enumerate(self.stages + ("total",)):
+            if valid[i]:
+                p = pct[:, i] / 1000
+                stages[stage] = {"n": int(valid[i]), "p50": p[0], "p95": p[1], "p99": p[2]}
+
+        recorded = self._counts[:n] >= 0
+        sums = np.where(recorded, self._counts[:n], 0).sum(axis=0)
+        hits = recorded.sum(axis=0)
+        means = np.divide(sums, hits, out=np.zeros(len(self.counters)), where=hits > 0)
+        counts = {name: float(m) for name, m in zip(self.counters, means)}
+
+        return {
+            "frames": self.frames,
+            "rejected": self.rejected,
+            "skipped": self.skipped,
+            "window": n,
+            "stages": stages,
+            "counts": counts,
+        }
+
+
+def _column_percentiles(values, q):
+    """
+    열마다 0 보다 큰 값만으로 percentile (np.percentile 의 linear 와 같은 값)
+    return: (열마다 값 개수, (len(q), 열) float 배열), 값이 없는 열은 의미 없음
+    """
+    valid = values > 0
+    n = valid.sum(axis=0)
+    if not len(values):
+        return n, np.zeros((len(q), values.shape[1]))
+    ordered = np.sort(np.where(valid, values, np.iinfo(values.dtype).max), axis=0)
+    last = np.maximum(n - 1, 0)
+    pos = np.asarray(q, dtype=np.float64)[:, None] / 100 * last
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, last)
+    cols = np.arange(values.shape[1])
+    a = ordered[lo, cols].astype(np.float64)
+    b = ordered[hi, cols].astype(np.float64)
+    return n, a + (b - a) * (pos - lo)
+
+
+def summary_line(snap):
+    """snapshot() -> 한 줄 (프레임 시간 p50/p95, p95 가 가장 긴 호스트 단계)"""
+    stages = snap["stages"]
+    line = f"frames {snap['frames']} (rejected {snap['rejected']}, skipped {snap['skipped']})"
+    if "total" in stages:
+        line += f", frame p50 {stages['total']['p50']:.0f} us p95 {stages['total']['p95']:.0f} us"
+    host = [s for s in stages if s != "total" and s not in DEVICE_STAGES]
+    if host:
+        slowest = max(host, key=lambda s: stages[s]["p95"])
+        line += f", slowest {slowest} p95 {stages[slowest]['p95']:.0f} us"
+    return line
+
+
+class PerfLog:
+    """perf_signal 에 연결하는 소비자: 요약은 PERF_EMIT_SEC 마다 오지만 출력은 every_sec 마다 한 줄"""
+
+    def __init__(self, every_sec, prefix="[azimuth] perf: ", clock=time.perf_counter):
+        self.every_sec = every_sec
+        self.prefix = prefix
+        self.clock = clock
+        self.last = None
+        self._next = None
+
+    def __call__(self, snap):
+        self.last = snap
+        now = self.clock()
+        if self._next is None:
+            self._next = now + self.every_sec
+        elif now >= self._next:
+            self._next = now + self.every_sec
+            print(self.prefix + summary_line(snap))
+
+
+def format_snapshot(snap):
+    """snapshot() -> 출력용 여러 줄 문자열"""
+    lines = [f"frames {snap['frames']}  rejected {snap['rejected']}  skipped {snap['skipped']}  "
+             f"(last {snap['window']})"]
+    for stage, p in snap["stages"].items():
+        lines.append(f"{stage:<11} {p['n']:>5} {p['p50']:>9.1f} {p['p95']:>9.1f} {p['p99']:>9.1f} us")
+    lines.append("  ".join(f"{name} {value:.1f}" for name, value in snap["counts"].items()))
+    return "\n".join(lines)
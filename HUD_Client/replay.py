@@ -0,0 +1,202 @@
+"""
+녹화된 미니맵 프레임을 AzimuthCaptureThread.calculate_angle 에 그대로 흘려보내는 오프라인 재생기
+(화면 캡처 / Qt 이벤트 루프 없이 실행)
+
+    python replay.py frames.npz
+    python replay.py recorded_dir/ --backend numpy --repeat 5 --out run_b.json --compare run_a.json
+
+입력:
+    - .npz : "frames" 키의 (N, h, w, 4) 배열, 없으면 저장된 배열들을 키 이름 순으로
+    - 디렉터리 : *.npy / *.png / *.bmp 를 파일 이름 순으로 (3채널 이미지는 BGRA로 변환)
+출력:
+    - frames/sec, 단계별(edge, hough, filter, candidates, cluster, pair, ring, ema) p50/p95/p99
+    - 방위각 시퀀스 (--out JSON, --compare 로 이전 결과와 비교)
+    - --skip-unchanged : process_frame(변화 없는 프레임 생략) 경로로 한 번 더 돌려서 적중률/절약 시간
+    - --batch K : calculate_angles(K장씩 묶은 엣지 계산) 경로로 한 번 더 돌려서 처리량과 결과 비교
+프레임 캡처 시각은 i / --fps (녹화 파일에는 시각이 없음), 추적 필터는 처리 시각 대신 이 시각을 봄
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from capture import load_frames
+from gpu_util import GPUUtils
+from conf import CAPTURE_MAX_FPS, TRACK_GATE_DEG
+from screen_scan import AzimuthCaptureThread
+from tracker import AzimuthTracker
+
+STAGES = ("edge", "coarse", "refine", "hough", "filter", "candidates", "cluster", "pair", "ring", "theta", "ema")
+
+
+def replay(thread, frames, repeat=1, frame_sec=1 / CAPTURE_MAX_FPS):
+    """
+    frame_sec: 프레임 간격 (i 번째 프레임의 캡처 시각 = i * frame_sec)
+    return: (angles, stage_ns, total_ns)
+        angles: 첫 번째 반복의 프레임별 결과 (int 또는 None)
+        stage_ns: {단계: [ns, ...]} 해당 단계까지 도달한 프레임만
+    """
+    angles = []
+    stage_ns = {stage: [] for stage in STAGES}
+    total_ns = 0
+    for r in range(repeat):
+        # 반복마다 같은 결과가 나오도록 프레임 간 상태 초기화
+        thread.reset_tracking()
+        for i, frame in enumerate(frames):
+            marks = [("start", time.perf_counter_ns())]
+            angle = thread.calculate_angle(frame, marks=marks, timestamp=i * frame_sec)
+            total_ns += marks[-1][1] - marks[0][1]
+            for (_, t_prev), (stage, t) in zip(marks, marks[1:]):
+                stage_ns[stage].append(t - t_prev)
+            if r == 0:
+                angles.append(angle)
+    return angles, stage_ns, total_ns
+
+
+def replay_skipping(thread, frames, frame_sec=1 / CAPTURE_MAX_FPS):
+    """
+    process_frame 경로 (변화 없는 프레임 생략) -> (angles, total_ns, change_stats)
+    change_stats["missed"]: 건너뛰었는데 직전 프레임과 픽셀이 하나라도 다른 프레임 수 (샘플 간격 때문에 놓친 변화, 시간 밖에서 셈)
+    """
+    thread.reset_tracking()
+    thread.skip_stats = dict.fromkeys(thread.skip_stats, 0)
+    angles = []
+    missed = 0
+    total_ns = 0
+    for i, frame in enumerate(frames):
+        skipped = thread.skip_stats["skipped"]
+        t0 = time.perf_counter_ns()
+        angles.append(thread.process_frame(frame, i * frame_sec))
+        total_ns += time.perf_counter_ns() - t0
+        if thread.skip_stats["skipped"] > skipped and not np.array_equal(frame, frames[i - 1]):
+            missed += 1
+    return angles, total_ns, dict(thread.change_stats(), missed=missed)
+
+
+def _percentiles_us(values):
+    if not values:
+        return None
+    return np.percentile(np.asarray(values) / 1000, [50, 95, 99])
+
+
+def compare_angles(current, previous):
+    """(다른 프레임 수, 최대 원형 차이, 처음 몇 개의 다른 인덱스)"""
+    diffs = []
+    max_diff = 0
+    for i, (a, b) in enumerate(zip(current, previous)):
+        if a == b:
+            continue
+        diffs.append(i)
+        if a is not None and b is not None:
+            d = abs(a - b) % 360
+            max_diff = max(max_diff, min(d, 360 - d))
+    diffs += range(min(len(current), len(previous)), max(len(current), len(previous)))
+    return len(diffs), max_diff, diffs[:10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("frames", help=".npz 파일 또는 프레임 디렉터리")
+    parser.add_argument("--backend", default=None, help="엣지 백엔드 이름 (기본: 자동 선택)")
+    parser.add_argument("--repeat", type=int, default=1, help="측정용 반복 횟수")
+    parser.add_argument("--estimator", choices=("hough", "ring", "theta"), default=None,
+                        help="방위각 추정 방식 (기본: conf.AZIMUTH_ESTIMATOR)")
+    parser.add_argument("--tracking", action="store_true", help="추적 필터 켜기 (conf.AZIMUTH_TRACKING 과 같음)")
+    parser.add_argument("--edge-output", choices=("image", "points"), default=None,
+                        help="엣지 결과 형태 (기본: conf.EDGE_OUTPUT)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="이전 결과 JSON과 방위각 시퀀스 비교")
+    parser.add_argument("--skip-unchanged", action="store_true", help="변화 없는 프레임 생략 경로도 측정")
+    parser.add_argument("--change-step", type=int, default=None,
+                        help="--skip-unchanged 의 비교 샘플 간격 px (기본: conf.CHANGE_SAMPLE_STEP)")
+    parser.add_argument("--batch", type=int, default=None, help="K장씩 묶은 엣지 계산 경로도 측정")
+    parser.add_argument("--profile", default=None, help="tuning.py 프로파일 적용 (기본: 코드 기본값, conf.TUNING_PROFILE 도 안 읽음)")
+    parser.add_argument("--fps", type=float, default=CAPTURE_MAX_FPS, help="녹화 프레임 속도 (추적 필터의 프레임 시각)")
+    args = parser.parse_args()
+    frame_sec = 1 / args.fps
+
+    frames = load_frames(args.frames)
+    if not frames:
+        parser.error(f"no frames found in {args.frames}")
+    h, w = frames[0].shape[:2]
+
+    thread = AzimuthCaptureThread((0, 0, w, h), gpu_utils=GPUUtils(args.backend), profile=args.profile)
+    if args.edge_output:
+        thread.edge_output = args.edge_output
+    if args.estimator:
+        thread.estimator = args.estimator
+    if args.change_step:
+        thread.change_sample_step = args.change_step
+    if args.tracking and thread.tracker is None:
+        thread.tracker = AzimuthTracker(gate_deg=TRACK_GATE_DEG)
+    thread.calculate_angle(frames[0])  # 워밍업 (버퍼 할당 등)
+
+    angles, stage_ns, total_ns = replay(thread, frames, args.repeat, frame_sec)
+    n_frames = len(frames) * args.repeat
+    fps = n_frames / (total_ns / 1e9) if total_ns else float("inf")
+    found = sum(a is not None for a in angles)
+
+    print(f"backend: {thread.gpu_utils.backend_name} ({thread.edge_output}, {thread.estimator})  frames: {len(frames)} x {args.repeat}  size: {w}x{h}")
+    print(f"throughput: {fps:.1f} frames/sec  ({total_ns / n_frames / 1000:.1f} us/frame)")
+    print(f"angle found: {found}/{len(angles)}")
+    if thread.tracker is not None:
+        t = thread.tracker.stats()
+        print(f"tracking: locked {t['lock_ratio']:.0%}, {t['locks']} locks / {t['losses']} losses")
+    print(f"{'stage':<11} {'frames':>7} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    for stage in STAGES:
+        pct = _percentiles_us(stage_ns[stage])
+        if pct is None:
+            print(f"{stage:<11} {0:>7}")
+            continue
+        print(f"{stage:<11} {len(stage_ns[stage]):>7} {pct[0]:>9.1f} {pct[1]:>9.1f} {pct[2]:>9.1f}")
+
+    if args.skip_unchanged:
+        skip_angles, skip_ns, stats = replay_skipping(thread, frames, frame_sec)
+        n_diff, max_diff, _ = compare_angles(skip_angles, angles)
+        print(f"skip-unchanged: {len(frames) / (skip_ns / 1e9):.1f} frames/sec, "
+              f"hit rate {stats['hit_rate']:.0%} ({stats['skipped']}/{stats['frames']}), "
+              f"check {stats['check_us_per_frame']:.1f} us/frame (step {thread.change_sample_step}), "
+              f"{stats['missed']} changed frames missed, "
+              f"saved {stats['saved_edge_ms']:.1f} ms edge + {stats['saved_cpu_ms']:.1f} ms cpu, "
+              f"{n_diff} angles differ (max {max_diff} deg)")
+
+    if args.batch:
+        thread.reset_tracking()
+        t0 = time.perf_counter_ns()
+        batch_angles = thread.calculate_angles(frames, args.batch, [i * frame_sec for i in range(len(frames))])
+        batch_ns = time.perf_counter_ns() - t0
+        n_diff, max_diff, _ = compare_angles(batch_angles, angles)
+        print(f"batch {args.batch}: {len(frames) / (batch_ns / 1e9):.1f} frames/sec, "
+              f"{n_diff} angles differ (max {max_diff} deg)")
+
+    result = {
+        "source": os.path.abspath(args.frames),
+        "backend": thread.gpu_utils.backend_name,
+        "edge_output": thread.edge_output,
+        "estimator": thread.estimator,
+        "profile": args.profile,
+        "frames": len(frames),
+        "fps": fps,
+        "stages_us": {s: (None if p is None else dict(zip(("p50", "p95", "p99"), p.tolist())))
+                      for s, p in ((s, _percentiles_us(stage_ns[s])) for s in STAGES)},
+        "angles": angles,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=1)
+        print(f"saved: {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        n_diff, max_diff, first = compare_angles(angles, previous["angles"])
+        if n_diff == 0:
+            print(f"compare: identical to {args.compare}")
+        else:
+            print(f"compare: {n_diff} frames differ from {args.compare} (max {max_diff} deg), first at {first}")
+
+
+if __name__ == "__main__":
+    main()
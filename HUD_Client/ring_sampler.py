@@ -0,0 +1,124 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class RingSampler:
+    """
+    미니맵 중심 기준 동심원 위의 엣지만 샘플링해서 1-D 각도 프로파일을 만들고,
+    target(120도)만큼 떨어진 두 봉우리(시야각 경계)를 바로 찾음
+    시야각 선은 항상 중심에서 뻗어나가므로 Hough 없이 O(원 둘레)로 충분
+
+    각도는 _candidates 와 같은 기준 (atan2(dy, dx), 이미지 y축 아래 방향, 0~360)
+    """
+    def __init__(self, r_min=25, r_margin=8, r_step=6, bins=360, spread=2, min_hits=0.25):
+        self.r_min = r_min
+        self.r_margin = r_margin  # 바깥 테두리 장식 피하기
+        self.r_step = r_step
+        self.bins = bins
+        self.spread = spread  # 링마다 +-spread bin 안에서 만나면 적중 (선 두께/반올림 오차)
+        self.min_hits = min_hits  # 봉우리로 인정할 최소 링 비율
+        self.last_strength = 0.0  # 마지막으로 찾은 쌍에서 약한 쪽 봉우리의 링 비율 (0~1)
+        self._shape = None
+        self._lut = None
+
+    def _ensure_lut(self, w, h):
+        if self._shape == (h, w):
+            return
+        cx, cy = w // 2, h // 2
+        radii = np.arange(self.r_min, min(w, h) // 2 - self.r_margin + 1, self.r_step)
+        theta = np.radians(np.arange(self.bins) * (360 / self.bins))
+        xs = np.rint(cx + radii[:, None] * np.cos(theta)).astype(np.intp)
+        ys = np.rint(cy + radii[:, None] * np.sin(theta)).astype(np.intp)
+        self._lut = ys * w + xs  # (링 수, bins) 평탄화 인덱스
+        self._shape = (h, w)
+
+    def _hits(self, edges):
+        h, w = edges.shape
+        self._ensure_lut(w, h)
+        return edges.reshape(-1)[self._lut] > 0
+
+    def _spread(self, hits):
+        s = self.spread
+        if s == 0:
+            return hits
+        padded = np.concatenate([hits[:, -s:], hits, hits[:, :s]], axis=1)  # 0/360 경계 이어붙이기
+        out = padded[:, :self.bins].copy()
+        for d in range(1, 2 * s + 1):
+            out |= padded[:, d:d + self.bins]
+        return out
+
+    def profile(self, edges):
+        """각도 bin마다 (+-spread 안에서) 엣지를 만난 링의 비율 (bins,)"""
+        return self._spread(self._hits(edges)).mean(axis=0)
+
+    def find_pair(self, edges, target=120, tol=6, around=None):
+        """
+        return: (az1, az2) 또는 None
+        around: (방향1, 방향2, gate) 를 주면 두 방향 +-gate 안의 광선만 샘플링 (추적 중일 때)
+        """
+        if around is not None:
+            return self._find_pair_around(edges, target, tol, *around)
+        hits = self._hits(edges)
+        raw = hits.mean(axis=0)
+        prof = self._spread(hits).mean(axis=0)
+        step = 360 / self.bins
+
+        # partner[k] = prof[k + off + d] 중 최대 (d는 -tol ~ +tol)
+        off = int(round(target / step))
+        t = int(round(tol / step))
+        windows = sliding_window_view(np.concatenate([prof, prof[:2 * t]]), 2 * t + 1)
+        shift = -((off - t) % self.bins)
+        best_d = np.roll(windows.argmax(axis=1), shift)
+        partner = np.roll(windows.max(axis=1), shift)
+
+        k = int(np.argmax(prof + partner))
+        if prof[k] < self.min_hits or partner[k] < self.min_hits:
+            return None
+        j = (k + off + int(best_d[k]) - t) % self.bins
+        self.last_strength = float(min(prof[k], partner[k]))
+        return self._refine(raw, k) * step % 360, self._refine(raw, j) * step % 360
+
+    def _window(self, flat, center, half):
+        # center bin +-half 구간의 (spread 적용) 프로파일과 원래 적중률, 구간 시작 bin
+        s = self.spread
+        start = int(round(center / (360 / self.bins))) - half
+        idx = np.arange(start - s, start + 2 * half + s + 1) % self.bins
+        hits = flat[self._lut[:, idx]] > 0
+        spread = hits[:, :2 * half + 1].copy()
+        for d in range(1, 2 * s + 1):
+            spread |= hits[:, d:d + 2 * half + 1]
+        return spread.mean(axis=0), hits[:, s:s + 2 * half + 1].mean(axis=0), start
+
+    def _find_pair_around(self, edges, target, tol, dir1, dir2, gate):
+        h, w = edges.shape
+        self._ensure_lut(w, h)
+        flat = edges.reshape(-1)
+        step = 360 / self.bins
+        half = int(round(gate / step))
+        prof1, raw1, start1 = self._window(flat, dir1, half)
+        prof2, raw2, start2 = self._window(flat, dir2, half)
+        k1, k2 = int(np.argmax(prof1)), int(np.argmax(prof2))
+        if prof1[k1] < self.min_hits or prof2[k2] < self.min_hits:
+            return None
+        a = self._refine_window(raw1, k1, start1) * step % 360
+        b = self._refine_window(raw2, k2, start2) * step % 360
+        d = abs(a - b) % 360
+        if abs(min(d, 360 - d) - target) > tol:
+            return None
+        self.last_strength = float(min(prof1[k1], prof2[k2]))
+        return a, b
+
+    def _refine_window(self, raw, k, start):
+        lo, hi = max(k - self.spread, 0), min(k + self.spread + 1, len(raw))
+        weights = raw[lo:hi]
+        if weights.sum() == 0:
+            return float(start + k)
+        return float(start + (np.arange(lo, hi) * weights).sum() / weights.sum())
+
+    def _refine(self, raw, k):
+        # 봉우리 주변 +-spread bin의 무게중심으로 보정 (argmax 는 평탄한 구간의 첫 bin)
+        idx = np.arange(k - self.spread, k + self.spread + 1)
+        weights = raw[idx % self.bins]
+        if weights.sum() == 0:
+            return float(k)
+        return float((idx * weights).sum() / weights.sum())
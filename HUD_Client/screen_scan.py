@@ -1,97 +1,520 @@
 import math
+import time
+from collections import deque
 import cv2
 import numpy as np
-import pyopencl as cl
 from PyQt5.QtCore import QThread, pyqtSignal
-from mss.windows import MSS as mss
-from gpu_util import GPUUtils
+from capture import create_screen_source
+import startup
+from gpu_util import EDGE_MAG_MAX, EDGE_MAG_MIN, GPUWarmup, circular_roi
+from ring_sampler import RingSampler
+from perf import PerfRing
+from tracker import AzimuthTracker
+from azimuth_stream import SampleStream
+from tuning_profile import PARAMS as TUNING_PARAMS, load_profile
+from conf import (
+    EDGE_BACKEND,
+    EDGE_OUTPUT,
+    EDGE_ROI_RADIUS,
+    AZIMUTH_ESTIMATOR,
+    AZIMUTH_TRACKING,
+    TRACK_GATE_DEG,
+    EDGE_PIPELINE_DEPTH,
+    EDGE_BATCH_SIZE,
+    EDGE_PYRAMID,
+    PYRAMID_WEDGE_DEG,
+    EDGE_STATS_REJECT,
+    EDGE_MIN_CENTER,
+    EDGE_MAX_FRACTION,
+    EDGE_MAX_CENTER_RATIO,
+    SKIP_UNCHANGED_FRAMES,
+    CHANGE_SAMPLE_STEP,
+    CAPTURE_MAX_FPS,
+    CAPTURE_IDLE_FPS,
+    CAPTURE_STABLE_SEC,
+    CAPTURE_STABLE_DEG,
+    CAPTURE_BACKEND,
+    PERF_ENABLED,
+    PERF_WINDOW,
+    PERF_EMIT_SEC,
+    SAMPLE_MIN_DEG,
+    SAMPLE_MIN_RATE,
+    SAMPLE_HEARTBEAT_SEC,
+)
+
+def _no_stamp(_):
+    pass
+
+class CaptureScheduler:
+    """
+    마감시간(deadline) 기준 캡처 주기
+    - 처리 시간을 빼고 남은 만큼만 쉬어서 실제 주기가 목표 fps를 따라가게 함
+    - 방위각이 변하면 바로 max_fps, stable_sec 동안 안정적이면 idle_fps까지 서서히 낮춤
+    """
+    def __init__(self, max_fps=30, idle_fps=10, stable_sec=1.0, stable_deg=2, decay=0.9, clock=time.perf_counter):
+        self.max_fps = max_fps
+        self.idle_fps = idle_fps
+        self.stable_sec = stable_sec
+        self.stable_deg = stable_deg
+        self.decay = decay
+        self.clock = clock
+
+        self.target_fps = max_fps
+        self.achieved_fps = 0.0
+        self.frames = 0
+        self.misses = 0
+
+        self._deadline = None
+        self._last_angle = None
+        self._stable_since = clock()
+        self._win_start = self._stable_since
+        self._win_frames = 0
+
+    def frame_done(self, angle):
+        """
+        한 프레임 처리가 끝났을 때 호출, 다음 프레임까지 쉴 시간(sec)을 반환
+        """
+        now = self.clock()
+        self.frames += 1
+
+        # 목표 fps 조정
+        if angle is not None:
+            if self._last_angle is not None:
+                d = abs(angle - self._last_angle) % 360
+                if min(d, 360 - d) >= self.stable_deg:
+                    self.target_fps = self.max_fps
+                    self._stable_since = now
+            self._last_angle = angle
+        if now - self._stable_since >= self.stable_sec:
+            self.target_fps = max(self.idle_fps, self.target_fps * self.decay)
+
+        # 실제 fps (약 1초 단위)
+        self._win_frames += 1
+        if now - self._win_start >= 1.0:
+            self.achieved_fps = self._win_frames / (now - self._win_start)
+            self._win_start = now
+            self._win_frames = 0
+
+        # 다음 마감시간
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += 1.0 / self.target_fps
+        remaining = self._deadline - now
+        if remaining < 0:
+            # 마감 초과: 밀린 프레임을 따라잡지 않고 지금부터 다시 시작
+            self.misses += 1
+            self._deadline = now
+            return 0.0
+        return remaining
+
+    def stats(self):
+        return {
+            "target_fps": self.target_fps,
+            "achieved_fps": self.achieved_fps,
+            "frames": self.frames,
+            "deadline_misses": self.misses,
+        }
 
 class AzimuthCaptureThread(QThread):
     """
     미니맵캡처, 시야각 인식 및 방위각 측정
     (x1, y1, x2, y2)
+    source: capture.CaptureSource (None 이면 run 할 때 conf.CAPTURE_BACKEND 로 capture_rect 화면 캡처)
     """
     angle_signal = pyqtSignal(int)
-    
-    def __init__(self, capture_rect, parent=None):
+    sample_signal = pyqtSignal(object)  # azimuth_stream.AzimuthSample, 바뀔 때만
+    perf_signal = pyqtSignal(object)  # PERF_EMIT_SEC 마다 perf_snapshot()
+    # tuning.py 가 찾는 값들 (프로파일 JSON 의 키 = 속성 이름)
+    TUNABLE = tuple(TUNING_PARAMS)
+
+    def __init__(self, capture_rect, parent=None, gpu_utils=None, source=None, profile=None):
+        """
+        profile: tuning.py 가 저장한 프로파일 경로 (HUD 는 conf.TUNING_PROFILE, 기본 None = 아래 기본값)
+        모르는 이름/잘못된 값은 tuning_profile.load_profile 이 출력하고 건너뜀
+        """
         super().__init__(parent)
         self.capture_rect = capture_rect
+        self.source = source
+        self.last_frame_time = None
         self.running = True
+        # 엣지 gradient 범위, HoughLinesP (threshold, minLineLength, maxLineGap), 중앙 margin, 클러스터 병합 각도
+        self.edge_mag_min = EDGE_MAG_MIN
+        self.edge_mag_max = EDGE_MAG_MAX
+        self.hough_threshold = 40
+        self.hough_min_length = 8
+        self.hough_max_gap = 10
+        self.line_margin = 90
         self.azimuth_threshold = 7
-        self.gpu_utils = GPUUtils()
+        # gpu_utils 를 안 넘기면 OpenCL 준비는 백그라운드에서 (처음 쓸 때 기다림)
+        self._gpu_utils = gpu_utils
+        self._warmup = GPUWarmup(EDGE_BACKEND) if gpu_utils is None else None
         self.prev_pair = None
         self.middle_ema = None
         self.ema_alpha = 0.35
+        self.last_middle = None  # 마지막으로 계산한 프레임의 (EMA 전) 방위각
+        self.last_confidence = 0.0  # 0~1, 두 경계가 120도에 얼마나 맞는지 (ring 이면 봉우리 세기도 곱함)
+        self.last_azimuth = None  # 마지막 결과 (EMA/추적 필터 뒤, 반올림 전 float)
+        # 의미 있게 바뀔 때만 sample_signal 로 (방위각, 캡처 시각, 속도, 신뢰도)
+        self.stream = SampleStream(SAMPLE_MIN_DEG, SAMPLE_MIN_RATE, SAMPLE_HEARTBEAT_SEC)
+
+        # "image": 엣지 이미지 전체를 받아서 Hough
+        # "points": 원형 ROI 안의 엣지 좌표만 받아서 중심 기준 각도 히스토그램 (theta 와 같은 후보, 읽어오는 양이 훨씬 적음)
+        #           ring 추정기 / 파이프라인 / 묶음 경로는 엣지 이미지가 필요해서 "image" 로 계산 (처음 한 번 출력)
+        self.edge_output = EDGE_OUTPUT
+        self.roi_radius = EDGE_ROI_RADIUS
+        self._roi = None
+        self._warned = set()
+
+        # 1: 프레임마다 엣지 -> 후처리 순서대로 / 2 이상: 다음 프레임 엣지를 GPU가 계산하는 동안 이번 프레임 후처리
+        self.pipeline_depth = EDGE_PIPELINE_DEPTH
+        self._pending = deque()
+
+        # 시야각 경계 찾는 방식: "hough"(HoughLinesP + 클러스터링) / "ring"(동심원 샘플링)
+        # / "theta"(디바이스에서 중심 기준 각도 히스토그램 봉우리, 엣지 이미지를 안 읽어옴)
+        self.estimator = AZIMUTH_ESTIMATOR
+        self.ring_sampler = RingSampler()
+
+        # hough coarse-to-fine: 축소 엣지로 방향을 먼저 찾고 전체 해상도는 그 부채꼴만 (0 이면 한 단계)
+        self.pyramid = EDGE_PYRAMID
+        self.pyramid_wedge_deg = PYRAMID_WEDGE_DEG
+        self.pyramid_stats = {"frames": 0, "coarse_hits": 0}
+        self._polar = None
+
+        # 추적 필터: 잠금 중에는 예측한 시야각 주변(+-TRACK_GATE_DEG)만 탐색, 결과도 EMA 대신 필터 값
+        self.tracker = AzimuthTracker(gate_deg=TRACK_GATE_DEG) if AZIMUTH_TRACKING else None
+        self._gate_mask = None
+        self._gated_edges = None
+
+        # 엣지 커널이 같이 센 (엣지 수, 중심 원 안 엣지 수) 로 미니맵이 아닌 프레임은 후처리 없이 거름
+        self.edge_stats_reject = EDGE_STATS_REJECT
+        self.edge_min_center = EDGE_MIN_CENTER
+        self.edge_max_fraction = EDGE_MAX_FRACTION
+        self.edge_max_center_ratio = EDGE_MAX_CENTER_RATIO
+        self._last_post_ns = 0  # 직전에 끝까지 처리한 프레임의 후처리 시간 (거른 프레임이 아꼈을 시간 추정)
+        self.reject_stats = {"frames": 0, "rejected": 0, "saved_cpu_ns": 0}
+
+        # 변화 없는 프레임은 엣지/Hough 생략하고 직전 결과 재사용
+        self.skip_unchanged = SKIP_UNCHANGED_FRAMES
+        self.change_sample_step = CHANGE_SAMPLE_STEP
+        self._prev_sample = None
+        self._last_edge_ns = 0  # 직전 계산 비용 (같은 프레임이면 같은 비용이 들었을 것)
+        self._last_cpu_ns = 0
+        self.skip_stats = {"frames": 0, "skipped": 0, "check_ns": 0, "saved_edge_ns": 0, "saved_cpu_ns": 0}
+
+        # 고정 msleep(33) 대신 마감시간 기반 + 변화량에 따른 가변 주기
+        self.scheduler = CaptureScheduler(CAPTURE_MAX_FPS, CAPTURE_IDLE_FPS, CAPTURE_STABLE_SEC, CAPTURE_STABLE_DEG)
+
+        # 단계별 시간/카운터 (process_frame 경로에서만 기록, None 이면 끔)
+        self.perf = PerfRing(PERF_WINDOW) if PERF_ENABLED else None
+
+        params = load_profile(profile, self.tuning_params()) if profile else None
+        if params is not None:
+            self.apply_tuning(params)
+            print(f"[azimuth] tuning profile: {profile}")
+        if gpu_utils is not None:
+            self._attach(gpu_utils)
+
+    @property
+    def gpu_utils(self):
+        if self._gpu_utils is None:
+            self._gpu_utils = self._warmup.result()
+            self._attach(self._gpu_utils)
+        return self._gpu_utils
+
+    @gpu_utils.setter
+    def gpu_utils(self, value):
+        self._gpu_utils = value
+        self._attach(value)
+
+    def _attach(self, gpu_utils):
+        gpu_utils.perf = self.perf
+        gpu_utils.set_edge_band(self.edge_mag_min, self.edge_mag_max)
+
+    def tuning_params(self):
+        """지금 쓰는 TUNABLE 값 dict (tuning.py 프로파일 형식)"""
+        return {name: getattr(self, name) for name in self.TUNABLE}
+
+    def apply_tuning(self, params):
+        """TUNABLE 중 params 에 있는 것만 바꿈 (엣지 범위는 엣지 백엔드에도)"""
+        for name, value in params.items():
+            if name not in self.TUNABLE:
+                raise ValueError(f"unknown tuning parameter: {name}")
+            setattr(self, name, value)
+        if self._gpu_utils is not None:
+            self._gpu_utils.set_edge_band(self.edge_mag_min, self.edge_mag_max)
+
+    def perf_snapshot(self):
+        """최근 PERF_WINDOW 프레임의 단계별 p50/p95/p99 (perf.PerfRing.snapshot), 기록을 끄면 None"""
+        return None if self.perf is None else self.perf.snapshot()
 
     def run(self):
         #(3122, 30, 3420, 290)
-        moniter = {
-            'top': self.capture_rect[1],
-            'left': self.capture_rect[0],
-            'width': self.capture_rect[2]-self.capture_rect[0],
-            'height': self.capture_rect[3]-self.capture_rect[1],
-        }
-        with mss() as sct:
+        if self.source is None:
+            self.source = create_screen_source(self.capture_rect, CAPTURE_BACKEND)
+        perf = self.perf
+        next_emit = time.perf_counter() + PERF_EMIT_SEC
+        frame_times = deque()  # 파이프라인에서 마무리되는 프레임의 캡처 시각
+        with self.source as source:
             while self.running:
-                shot = sct.grab(moniter)
-                image = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
-                calculated_angle = self.calculate_angle(image)
+                t_grab = time.perf_counter_ns()
+                frame = source.grab()
+                if frame is None:  # 파일/합성 소스 끝
+                    break
+                self.last_frame_time = frame.timestamp
+                if perf is not None:
+                    perf.add("grab", time.perf_counter_ns() - t_grab)
+                frame_times.append(frame.timestamp)
+                if self.pipeline_depth > 1:
+                    # 파이프라인이 찰 때까지(처음 depth-1 프레임)는 결과 없음
+                    done, calculated_angle = self.process_frame_pipelined(frame.bgra, frame.timestamp)
+                else:
+                    done, calculated_angle = True, self.process_frame(frame.bgra, frame.timestamp)
+                captured = frame_times.popleft() if done else None
 
                 if calculated_angle is not None:
+                    startup.mark("first azimuth")
                     self.angle_signal.emit(calculated_angle)
+                    velocity = self.tracker.rate if self.tracker is not None else None
+                    sample = self.stream.push(self.last_azimuth, captured, self.last_confidence, velocity)
+                    if sample is not None:
+                        self.sample_signal.emit(sample)
+                if perf is not None and time.perf_counter() >= next_emit:
+                    next_emit += PERF_EMIT_SEC
+                    self.perf_signal.emit(perf.snapshot())
+
+                self.usleep(int(self.scheduler.frame_done(calculated_angle) * 1_000_000))
+            self.drain_pipeline()
+
+    def process_frame(self, image, timestamp=None):
+        """
+        직전 프레임과 같으면 무거운 단계를 건너뛰는 calculate_angle
+        timestamp: 캡처 시각 (perf_counter 기준 sec, 추적 필터의 시간), None 이면 지금
+        """
+        stats = self.skip_stats
+        perf = self.perf
+        stats["frames"] += 1
+        if self.skip_unchanged:
+            t0 = time.perf_counter_ns()
+            unchanged = self._frame_unchanged(image)
+            check_ns = time.perf_counter_ns() - t0
+            stats["check_ns"] += check_ns
+            if perf is not None:
+                perf.add("check", check_ns)
+            if unchanged:
+                stats["skipped"] += 1
+                stats["saved_edge_ns"] += self._last_edge_ns
+                stats["saved_cpu_ns"] += self._last_cpu_ns
+                if perf is not None:
+                    perf.end(skipped=True)
+                return self._reuse_last_result(timestamp)
+
+        marks = [("start", time.perf_counter_ns())]
+        angle = self.calculate_angle(image, marks=marks, timestamp=timestamp)
+        self._last_edge_ns = marks[1][1] - marks[0][1]
+        self._last_cpu_ns = marks[-1][1] - marks[1][1]
+        if perf is not None:
+            perf.marks(marks)
+            perf.end(rejected=angle is None)
+        return angle
+
+    def process_frame_pipelined(self, image, timestamp=None):
+        """
+        이번 프레임은 엣지 계산을 시작만 하고, depth-1 프레임 전에 넣은 프레임을 마무리
+        return: (done, angle) done=False 면 아직 끝난 프레임 없음
+        "points" 출력은 파이프라인에서 안 씀 (엣지 이미지로 계산, 처음 한 번 출력)
+        """
+        if self.edge_output == "points":
+            self._warn_once("points-pipeline", 'edge output "points" is not used by the pipeline, using edge images')
+        stats = self.skip_stats
+        stats["frames"] += 1
+        unchanged = False
+        if self.skip_unchanged:
+            t0 = time.perf_counter_ns()
+            unchanged = self._frame_unchanged(image)
+            check_ns = time.perf_counter_ns() - t0
+            stats["check_ns"] += check_ns
+            if self.perf is not None:
+                self.perf.add("check", check_ns)
+        if unchanged:
+            stats["skipped"] += 1
+            self._pending.append((None, timestamp))  # 결과 재사용 표시 (순서를 지키려고 큐에 같이 넣음)
+        else:
+            self._pending.append((self.gpu_utils.gpu_canny_submit(image, self.pipeline_depth), timestamp))
+
+        if len(self._pending) < self.pipeline_depth:
+            return False, None
+        return True, self._finish_pending()
 
-                self.msleep(33)
+    def drain_pipeline(self):
+        """진행 중인 프레임을 모두 마무리, 방위각 리스트 (오래된 순)"""
+        angles = []
+        while self._pending:
+            angles.append(self._finish_pending())
+        return angles
+
+    def _finish_pending(self):
+        # perf 기록은 grab/check 는 방금 넣은 프레임, 나머지는 여기서 마무리하는 프레임 것 (depth-1 프레임 차이)
+        perf = self.perf
+        ticket, timestamp = self._pending.popleft()
+        if ticket is None:
+            if perf is not None:
+                perf.end(skipped=True)
+            return self._reuse_last_result(timestamp)
+        self.last_middle = None
+        marks = [("start", time.perf_counter_ns())]
+        edges = self.gpu_utils.gpu_canny_collect(ticket)
+        marks.append(("edge", time.perf_counter_ns()))
+        angle = self._angle_from_edges(edges, marks.append, timestamp=timestamp)
+        if perf is not None:
+            perf.marks(marks)
+            perf.end(rejected=angle is None)
+        return angle
+
+    def _frame_unchanged(self, image):
+        # BGRA 픽셀을 uint32 하나로 보고 step 간격으로 샘플링해서 비교 (step=1 이면 전체 비교)
+        step = self.change_sample_step
+        sample = image.view(np.uint32)[::step, ::step, 0]
+        if self._prev_sample is not None and self._prev_sample.shape == sample.shape:
+            if np.array_equal(sample, self._prev_sample):
+                return True
+            np.copyto(self._prev_sample, sample)
+        else:
+            self._prev_sample = sample.copy()
+        return False
+
+    def _reuse_last_result(self, timestamp=None):
+        # 같은 프레임이면 같은 쌍이 나오므로 EMA만 한 번 더 진행 (멈춘 뒤에도 값이 수렴하도록)
+        if self.last_middle is None:
+            return None
+        if self.tracker is not None:
+            now = time.perf_counter() if timestamp is None else timestamp
+            self.last_azimuth = self.tracker.update(self.last_middle, now)
+        else:
+            self.middle_ema = self.last_azimuth = self._ang_ema(self.middle_ema, self.last_middle, self.ema_alpha)
+        return int(self.last_azimuth)
+
+    def change_stats(self):
+        stats = self.skip_stats
+        frames = max(stats["frames"], 1)
+        return {
+            "frames": stats["frames"],
+            "skipped": stats["skipped"],
+            "hit_rate": stats["skipped"] / frames,
+            "check_us_per_frame": stats["check_ns"] / frames / 1000,
+            "saved_edge_ms": stats["saved_edge_ns"] / 1e6,
+            "saved_cpu_ms": stats["saved_cpu_ns"] / 1e6,
+        }
 
     def _candidates(self, lines, center):
+        """
+        lines: (N, 4) 선분 배열 -> 후보 속성 배열 dict {"az", "len", "dist", "score"}
+        """
         cx, cy = center
-        cands = []
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
+        x1, y1, x2, y2 = lines.T
 
-            # 길이(긴 선 우선)
-            length = math.hypot(x2 - x1, y2 - y1)
+        # 길이(긴 선 우선)
+        length = np.hypot(x2 - x1, y2 - y1)
 
-            # 중심 기준으로 "더 먼 끝점" 방향을 사용 (기존 의도 유지!)
-            d1 = (x1 - cx)**2 + (y1 - cy)**2
-            d2 = (x2 - cx)**2 + (y2 - cy)**2
-            if d1 >= d2:
-                dx, dy = x1 - cx, y1 - cy
-            else:
-                dx, dy = x2 - cx, y2 - cy
+        # 중심 기준으로 "더 먼 끝점" 방향을 사용 (기존 의도 유지!)
+        d1 = (x1 - cx)**2 + (y1 - cy)**2
+        d2 = (x2 - cx)**2 + (y2 - cy)**2
+        far1 = d1 >= d2
+        dx = np.where(far1, x1, x2) - cx
+        dy = np.where(far1, y1, y2) - cy
 
-            azimuth = (math.degrees(math.atan2(dy, dx)) + 360) % 360
+        azimuth = (np.degrees(np.arctan2(dy, dx)) + 360) % 360
 
-            # 중심 근처를 더 신뢰(선생님 기존 filter 의도 반영)
-            mx = (x1 + x2) * 0.5
-            my = (y1 + y2) * 0.5
-            dist_center = math.hypot(mx - cx, my - cy)
+        # 중심 근처를 더 신뢰(선생님 기존 filter 의도 반영)
+        mx = (x1 + x2) * 0.5
+        my = (y1 + y2) * 0.5
+        dist_center = np.hypot(mx - cx, my - cy)
 
-            # 점수: 길이↑, 중심근접↑ (dist 스케일은 ROI에 맞게 조절)
-            score = length * (1.0 / (1.0 + dist_center / 80.0))
+        # 점수: 길이↑, 중심근접↑ (dist 스케일은 ROI에 맞게 조절)
+        score = length * (1.0 / (1.0 + dist_center / 80.0))
 
-            cands.append({"az": azimuth, "len": length, "dist": dist_center, "score": score})
-        return cands
+        return {"az": azimuth, "len": length, "dist": dist_center, "score": score}
 
     def _cluster_angles(self, cands, merge_deg=6):
         # azimuth를 0~360로 정렬 후, 가까운 각도끼리 묶어서
         # 각 클러스터에서 score가 가장 높은 것만 대표로 남김
-        cands = sorted(cands, key=lambda c: c["az"])
-        clusters = []
-        for c in cands:
-            placed = False
-            for cl in clusters:
-                # 대표 각도와 원형 차이 비교
-                d = abs(c["az"] - cl["rep"]["az"])
+        az, score = cands["az"], cands["score"]
+        if len(az) == 0:
+            return cands
+        order = np.argsort(az, kind="stable")
+        az_s = az[order]
+        score_s = score[order]
+
+        if merge_deg >= 180:
+            rep_idx = self._cluster_sweep(az_s, score_s, merge_deg)
+        else:
+            rep_idx = self._cluster_runs(az_s, score_s, merge_deg)
+            # 360 근처 후보는 0/360 경계를 넘어 첫 클러스터에 붙음 (첫 클러스터가 항상 먼저 비교되므로)
+            tail = np.searchsorted(az_s, az_s[rep_idx[0]] + 360 - merge_deg)
+            if tail < len(az_s):
+                rep_idx = self._cluster_runs(az_s[:tail], score_s[:tail], merge_deg)
+                tail_best = tail + np.argmax(score_s[tail:])
+                if score_s[tail_best] > score_s[rep_idx[0]]:
+                    rep_idx[0] = tail_best
+
+        pick = order[rep_idx]
+        return {k: v[pick] for k, v in cands.items()}
+
+    @staticmethod
+    def _cluster_runs(az, score, merge_deg):
+        """
+        정렬된 az에서 경계 넘김 없이 클러스터링 -> 대표 인덱스 배열 (생성 순서)
+        인접 간격이 merge_deg보다 크면 무조건 새 클러스터라 run 단위로 자르고,
+        run 폭이 merge_deg 이하면 run 전체가 한 클러스터
+        """
+        starts = np.flatnonzero(np.diff(az) > merge_deg) + 1
+        bounds = np.concatenate(([0], starts, [len(az)]))
+        lengths = np.diff(bounds)
+
+        # run 안의 첫 번째 최대 score (동점이면 먼저 나온 쪽 = 기존과 동일)
+        run_id = np.repeat(np.arange(len(lengths)), lengths)
+        run_max = np.maximum.reduceat(score, bounds[:-1])
+        hit = np.flatnonzero(score == run_max[run_id])
+        first = hit[np.concatenate(([True], np.diff(run_id[hit]) > 0))]
+
+        # 폭이 넓은 run은 대표가 바뀌면서 쪼개질 수 있어서 순차 처리 (마지막 클러스터만 후보)
+        wide = np.flatnonzero(az[bounds[1:] - 1] - az[bounds[:-1]] > merge_deg)
+        if len(wide) == 0:
+            return first
+
+        az_l = az.tolist()
+        score_l = score.tolist()
+        rep_idx = first.tolist()
+        for r in reversed(wide.tolist()):
+            reps = []
+            rep = bounds[r]
+            for i in range(bounds[r] + 1, bounds[r + 1]):
+                if az_l[i] - az_l[rep] <= merge_deg:
+                    if score_l[i] > score_l[rep]:
+                        rep = i
+                else:
+                    reps.append(rep)
+                    rep = i
+            reps.append(rep)
+            rep_idx[r:r + 1] = reps
+        return np.asarray(rep_idx)
+
+    @staticmethod
+    def _cluster_sweep(az, score, merge_deg):
+        # 모든 클러스터 대표와 비교하는 원래 방식 (merge_deg가 비정상적으로 클 때만)
+        az = az.tolist()
+        score = score.tolist()
+        reps = []
+        for i, a in enumerate(az):
+            for k, r in enumerate(reps):
+                d = abs(a - az[r])
                 d = min(d, 360 - d)
                 if d <= merge_deg:
-                    # 더 점수가 높은 후보를 대표로
-                    if c["score"] > cl["rep"]["score"]:
-                        cl["rep"] = c
-                    placed = True
+                    if score[i] > score[r]:
+                        reps[k] = i
                     break
-            if not placed:
-                clusters.append({"rep": c})
-        return [cl["rep"] for cl in clusters]
+            else:
+                reps.append(i)
+        return np.asarray(reps)
 
     def _ang_diff(self, a, b):
         d = abs(a - b) % 360
@@ -104,16 +527,76 @@ class AzimuthCaptureThread(QThread):
         return (prev + alpha * delta) % 360
 
     def _pick_pair_120(self, reps, prev_pair=None, target=120, tol=6):
+        # 대표 각도를 원 위에 정렬해두고, 각 대표에서 시계방향으로 target±tol 안에 있는 상대만 확인
+        # (점수/동점 처리는 전체 쌍을 i<j 순서로 보던 기존 방식과 동일)
+        rep_az, rep_score = reps["az"], reps["score"]
+        n = len(rep_az)
+        if n < 2:
+            return None
+        if n <= 16:
+            # 대표가 적을 때는 numpy 호출 오버헤드가 더 커서 전체 비교가 빠름
+            return self._pick_pair_120_all(rep_az.tolist(), rep_score.tolist(), prev_pair, target, tol)
+
+        wrapped = rep_az % 360
+        order = np.argsort(wrapped, kind="stable")
+        ring = np.concatenate((wrapped[order], wrapped[order] + 360))  # 0/360 경계 넘김용
+
+        # 원형 차이는 0~180 이라 시계방향 거리도 그 범위만 보면 모든 쌍이 한 번씩 나옴
+        # 경계의 부동소수 오차는 약간 넓게 잡고 아래에서 기존 조건으로 다시 거름
+        lo = max(target - tol, 0) - 1e-6
+        hi = min(target + tol, 180) + 1e-6
+        pos = np.arange(n)
+        start = np.clip(np.searchsorted(ring, ring[:n] + lo, side="left"), pos + 1, pos + n)
+        end = np.clip(np.searchsorted(ring, ring[:n] + hi, side="right"), pos + 1, pos + n)
+        counts = np.maximum(end - start, 0)
+        total = int(counts.sum())
+        if total == 0:
+            return None
+
+        # 각 대표의 [start, end) 구간을 (p, q) 쌍으로 펼침
+        p = np.repeat(pos, counts)
+        q = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(start, counts)
+        i = order[p]
+        j = order[q % n]
+        i, j = np.minimum(i, j), np.maximum(i, j)
+        if lo < 1e-6 or hi > 180 - 1e-6:
+            # 범위가 0이나 180에 닿으면 양방향에서 같은 쌍이 나올 수 있음
+            key = np.unique(i * n + j)
+            i, j = key // n, key % n
+
+        a, b = rep_az[i], rep_az[j]
+        keep = ~(np.abs(self._ang_diff_np(a, b) - target) > tol)
+        if not keep.any():
+            return None
+        i, j, a, b = i[keep], j[keep], a[keep], b[keep]
+
+        pair_score = rep_score[i] + rep_score[j]
+
+        # 이전 프레임과의 연속성 가점(튀는 것 방지)
+        if prev_pair is not None:
+            p1, p2 = prev_pair
+            dmatch = np.minimum(
+                self._ang_diff_np(a, p1) + self._ang_diff_np(b, p2),
+                self._ang_diff_np(a, p2) + self._ang_diff_np(b, p1),
+            )
+            pair_score += 200.0 / (1.0 + dmatch)
+
+        # 최고점, 동점이면 (i, j)가 가장 앞선 쌍
+        tied = np.flatnonzero(pair_score == pair_score.max())
+        k = tied[np.argmin(i[tied] * n + j[tied])]
+        return (rep_az[i[k]].item(), rep_az[j[k]].item())
+
+    def _pick_pair_120_all(self, rep_az, rep_score, prev_pair, target, tol):
         best = None
         best_score = -1e18
 
-        for i in range(len(reps)):
-            for j in range(i+1, len(reps)):
-                a, b = reps[i]["az"], reps[j]["az"]
+        for i in range(len(rep_az)):
+            for j in range(i+1, len(rep_az)):
+                a, b = rep_az[i], rep_az[j]
                 if abs(self._ang_diff(a, b) - target) > tol:
                     continue
 
-                pair_score = reps[i]["score"] + reps[j]["score"]
+                pair_score = rep_score[i] + rep_score[j]
 
                 # 이전 프레임과의 연속성 가점(튀는 것 방지)
                 if prev_pair is not None:
@@ -130,46 +613,364 @@ class AzimuthCaptureThread(QThread):
 
         return best
 
-    def calculate_angle(self, image):
-        edges = self.gpu_utils.gpu_canny(image)
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=40, minLineLength=8, maxLineGap=10)
+    @staticmethod
+    def _ang_diff_np(a, b):
+        d = np.abs(a - b) % 360
+        return np.minimum(d, 360 - d)
+
+    def calculate_angle(self, image, marks=None, timestamp=None):
+        """
+        marks: list를 넘기면 단계가 끝날 때마다 (단계이름, perf_counter_ns) 를 추가 (replay 측정용)
+        timestamp: 캡처 시각 (추적 필터의 예측/속도 기준), None 이면 지금 (perf_counter)
+        """
+        stamp = marks.append if marks is not None else _no_stamp
+        self.last_middle = None
+
+        if self.estimator == "theta":
+            # 엣지 이미지 없이 디바이스에서 중심 기준 각도 히스토그램 -> 봉우리 몇 개만 받아옴
+            if self.edge_stats_reject:
+                peaks, stats = self.gpu_utils.gpu_theta_peaks_stats(image)
+            else:
+                peaks, stats = self.gpu_utils.gpu_theta_peaks(image), None
+            stamp(("edge", time.perf_counter_ns()))
+            return self._angle_from_edges(None, stamp, peaks=peaks, stats=stats, shape=image.shape[:2],
+                                          timestamp=timestamp)
+
+        if self.edge_output == "points":
+            if self.estimator != "ring":
+                return self._angle_from_points(image, stamp, timestamp)
+            self._warn_once("points-ring", 'edge output "points" is not used by the ring estimator, using edge images')
+
+        coarse = stats = None
+        if self.pyramid and self.estimator == "hough":
+            edges, coarse = self.gpu_utils.gpu_canny_pyramid(image, self.pyramid)
+        elif self.edge_stats_reject:
+            edges, stats = self.gpu_utils.gpu_canny_stats(image)
+        else:
+            edges = self.gpu_utils.gpu_canny(image)
+        stamp(("edge", time.perf_counter_ns()))
+        return self._angle_from_edges(edges, stamp, coarse, stats=stats, timestamp=timestamp)
+
+    def _angle_from_points(self, image, stamp, timestamp):
+        # 원 안 엣지 좌표 -> 호스트에서 중심 기준 각도 히스토그램 (theta 커널과 같은 bin), 선 검출은 _theta_pair
+        h, w = image.shape[:2]
+        if self._roi is None or self._roi.shape != (h, w):
+            self._roi = circular_roi(w, h, self.roi_radius)
+        points = self.gpu_utils.gpu_edge_points(image, self._roi)
+        stamp(("edge", time.perf_counter_ns()))
+        stats = self.gpu_utils.points_stats(points, (h, w)) if self.edge_stats_reject else None
+        peaks = self.gpu_utils.points_theta_peaks(points, (h, w))
+        return self._angle_from_edges(None, stamp, peaks=peaks, stats=stats, shape=(h, w), timestamp=timestamp)
+
+    def _warn_once(self, key, message):
+        if key not in self._warned:
+            self._warned.add(key)
+            print(f"[azimuth] {message}")
+
+    def _implausible(self, edges, stats, shape):
+        """
+        엣지 통계로 미니맵이 아닌 프레임인지 (모든 경로가 _angle_from_edges 에서 이걸로 거름)
+        stats: 엣지 커널이 같이 센 [바깥 원 안 엣지 수, 중심 원 안 엣지 수], None 이면 edges 를 호스트에서 셈
+        바깥 원 = 반지름 min(h, w) // 2 (gpu_util.stats_radius_range), 중심 원 = 그 절반
+        """
+        if stats is None:
+            stats = self.gpu_utils.edge_stats(edges)
+        total, center = int(stats[0]), int(stats[1])
+        if self.perf is not None:
+            self.perf.count("edges", total)
+            self.perf.count("center", center)
+        self.reject_stats["frames"] += 1
+        outer_area = math.pi * (min(shape) // 2) ** 2
+        return (center < self.edge_min_center or total > self.edge_max_fraction * outer_area
+                or center > self.edge_max_center_ratio * total)
+
+    def _reject_implausible(self, now):
+        # 미니맵이 닫혀 있거나 메뉴/로딩 화면: 측정 없음으로 처리 (Hough/클러스터링/쌍 탐색 안 함)
+        self.reject_stats["rejected"] += 1
+        self.reject_stats["saved_cpu_ns"] += self._last_post_ns
+        self.last_confidence = 0.0
+        if self.tracker is not None:
+            self.tracker.miss(now)
+        return None
+
+    def calculate_angles(self, frames, batch_size=EDGE_BATCH_SIZE, timestamps=None):
+        """
+        오프라인 재처리용: batch_size 장씩 엣지를 한 번에 계산하고 프레임 순서대로 후처리
+        (edge_output 은 무시하고 항상 엣지 이미지 사용, "points" 면 처음 한 번 출력) -> 방위각 리스트
+        timestamps: 프레임별 캡처 시각 (추적 필터용), None 이면 처리 시각
+        """
+        if self.edge_output == "points":
+            self._warn_once("points-batch", 'edge output "points" is not used for batches, using edge images')
+        angles = []
+        for start in range(0, len(frames), batch_size):
+            edges = self.gpu_utils.gpu_canny_batch(frames[start:start + batch_size])
+            for i, e in enumerate(edges, start):
+                self.last_middle = None
+                angles.append(self._angle_from_edges(
+                    e, _no_stamp, timestamp=None if timestamps is None else timestamps[i]))
+        return angles
+
+    def _angle_from_edges(self, edges, stamp, coarse=None, peaks=None, stats=None, shape=None, timestamp=None):
+        """
+        coarse: calculate_angle 의 축소 엣지 (EDGE_PYRAMID)
+        peaks: gpu_theta_peaks / points_theta_peaks 결과 (theta 나 "points" 출력이면 edges 대신, 후보 선택은 _theta_pair)
+        stats: 엣지 통계 (edge_stats_reject), 없으면 edges 로 셈 (파이프라인/묶음/피라미드 경로)
+        shape: 프레임 (h, w), edges 가 없을 때만
+        timestamp: 프레임 캡처 시각, 추적 필터는 처리 시각이 아니라 이 시각으로 예측/갱신
+        """
+        tracker = self.tracker
+        if tracker is None:
+            now = None
+        else:
+            now = time.perf_counter() if timestamp is None else timestamp
+        if self.edge_stats_reject:
+            if self._implausible(edges, stats, edges.shape if shape is None else shape):
+                return self._reject_implausible(now)
+            t0 = time.perf_counter_ns()
+            angle = self._estimate(edges, stamp, coarse, peaks, now)
+            self._last_post_ns = time.perf_counter_ns() - t0
+            return angle
+        return self._estimate(edges, stamp, coarse, peaks, now)
+
+    def _estimate(self, edges, stamp, coarse, peaks, now):
+        tracker = self.tracker
+        gate = tracker.gate(now) if tracker is not None else None
+        if self.estimator == "ring":
+            pair = self.ring_sampler.find_pair(edges, target=120, tol=6, around=gate)
+            stamp(("ring", time.perf_counter_ns()))
+        elif self.estimator == "theta" or peaks is not None:  # peaks: theta 또는 "points" 출력
+            if peaks is None:  # 파이프라인/묶음 경로는 엣지 이미지를 받아서 CPU 에서
+                peaks = self.gpu_utils.edge_theta_peaks(edges)
+            pair = self._theta_pair(peaks, gate)
+            stamp(("theta", time.perf_counter_ns()))
+        else:
+            if gate is None and coarse is not None:
+                # 추적 잠금이 없을 때만 (잠금 중이면 예측 부채꼴 안 Hough 그대로)
+                # 축소 단계에서 못 찾은 프레임은 전체 해상도 Hough 로도 거의 못 찾아서 다시 시도하지 않음
+                wedges = self._coarse_gate(coarse, edges.shape)
+                stamp(("coarse", time.perf_counter_ns()))
+                pair = None if wedges is None else self._refine_pair(edges, coarse, wedges)
+                stamp(("refine", time.perf_counter_ns()))
+            else:
+                pair = self._hough_pair(edges, stamp, gate)
+        if pair is None:
+            self.last_confidence = 0.0
+            if tracker is not None:
+                tracker.miss(now)
+            return None
+
+        confidence = max(0.0, 1.0 - abs(self._ang_diff(pair[0], pair[1]) - 120) / 6)
+        if self.estimator == "ring":
+            confidence *= self.ring_sampler.last_strength
+        self.last_confidence = confidence
+
+        middle = self._calculate_middle_azimuth(pair[0], pair[1])  # 기존 함수 유지
+        self.last_middle = middle
+        self.prev_pair = pair
+        if tracker is not None:
+            self.last_azimuth = tracker.update(middle, now)
+        else:
+            self.middle_ema = self.last_azimuth = self._ang_ema(self.middle_ema, middle, self.ema_alpha)
+        stamp(("ema", time.perf_counter_ns()))
+
+        return int(self.last_azimuth)
+
+    def _gate_edges(self, edges, gate):
+        # 예측한 두 선 방향 +-gate 부채꼴 밖의 엣지는 지움 (HoughLinesP 비용은 엣지 픽셀 수에 비례)
+        h, w = edges.shape[:2]
+        if self._gate_mask is None or self._gate_mask.shape != (h, w):
+            self._gate_mask = np.zeros((h, w), dtype=np.uint8)
+            self._gated_edges = np.zeros((h, w), dtype=np.uint8)
+        mask = self._gate_mask
+        mask[:] = 0
+        dir1, dir2, g = gate
+        for d in (dir1, dir2):
+            cv2.ellipse(mask, (w // 2, h // 2), (w + h, w + h), 0, d - g, d + g, 255, -1)
+        return cv2.bitwise_and(edges, mask, dst=self._gated_edges)
+
+    def _theta_pair(self, peaks, gate=None):
+        """
+        peaks: (N, 2) [중심 기준 선 각도, 표 수] -> 120도 쌍 (표 수를 점수로, 이전 쌍 가점은 hough 와 같음)
+        gate 가 있으면 예측한 두 방향 +-gate 안의 봉우리만
+        """
+        perf = self.perf
+        if perf is not None:
+            perf.count("lines", len(peaks))
+        az = peaks[:, 0].tolist()
+        score = peaks[:, 1].tolist()
+        if gate is not None:
+            dir1, dir2, g = gate
+            keep = [i for i, a in enumerate(az) if min(self._ang_diff(a, dir1), self._ang_diff(a, dir2)) <= g]
+            az = [az[i] for i in keep]
+            score = [score[i] for i in keep]
+        return self._pick_pair_120_all(az, score, self.prev_pair, target=120, tol=6)
+
+    def _coarse_gate(self, coarse, full_shape):
+        """
+        축소 엣지에서 Hough -> 120도 쌍 -> 전체 해상도에서 볼 (선 방향 1, 선 방향 2, 부채꼴 폭)
+        못 찾으면 None
+        선이 몇 개 안 돼서 numpy 대신 파이썬 루프 (_filter_lines/_candidates 와 같은 기준을 1/f 로)
+        """
+        f = self.pyramid
+        self.pyramid_stats["frames"] += 1
+        # 길이/간격 기준도 1/f, 각도 해상도는 f 도 (어차피 부채꼴 안에서 다시 맞춤)
+        lines = cv2.HoughLinesP(coarse, 1, np.pi / 180 * f, threshold=self.hough_threshold // f,
+                                minLineLength=max(self.hough_min_length // f, 2),
+                                maxLineGap=max(self.hough_max_gap // f, 2))
         if lines is None:
             return None
+        h, w = full_shape[:2]
+        # 축소 픽셀 (x, y) 는 원본 블록 [f*x, f*x+f) -> 원본 중심의 축소 좌표
+        cx = (w // 2 + 0.5) / f - 0.5
+        cy = (h // 2 + 0.5) / f - 0.5
+        margin = self.line_margin / f
+        az, score = [], []
+        for x1, y1, x2, y2 in lines.reshape(-1, 4).tolist():
+            mx, my = (x1 + x2) * 0.5, (y1 + y2) * 0.5
+            if abs(mx - cx) > margin or abs(my - cy) > margin:
+                continue
+            if (x1 - cx) ** 2 + (y1 - cy) ** 2 >= (x2 - cx) ** 2 + (y2 - cy) ** 2:
+                dx, dy = x1 - cx, y1 - cy
+            else:
+                dx, dy = x2 - cx, y2 - cy
+            az.append(math.degrees(math.atan2(dy, dx)) % 360)
+            score.append(math.hypot(x2 - x1, y2 - y1) / (1.0 + math.hypot(mx - cx, my - cy) * f / 80.0))
+        if len(az) > 32:
+            # 선이 많으면 가까운 각도끼리 먼저 묶음
+            reps = self._cluster_angles({"az": np.asarray(az), "score": np.asarray(score)},
+                                        merge_deg=self.azimuth_threshold)
+            az, score = reps["az"].tolist(), reps["score"].tolist()
+        pair = self._pick_pair_120_all(az, score, self.prev_pair, target=120, tol=6 + f)
+        if pair is None:
+            return None
+        self.pyramid_stats["coarse_hits"] += 1
+        return pair[0], pair[1], self.pyramid_wedge_deg
 
-        h, w = image.shape[:2]
+    def _refine_pair(self, edges, coarse, wedges, min_points=8):
+        """
+        두 부채꼴에 걸친 축소 블록 안의 전체 해상도 엣지만 꺼내서 (중심 기준) 각도를 반지름 가중 평균 -> 선 방향 쌍
+        가운데 화살표 근처(반지름 < 12 px)는 각도가 부정확해서 뺌, 부채꼴 하나라도 점이 적으면 None
+        """
+        dir1, dir2, g = wedges
+        f = self.pyramid
+        h, w = edges.shape[:2]
+        ch, cw = h // f, w // f
+        pix_az, pix_r, block_az, block_slack = self._polar_tables(h, w, f)
+
+        # 엣지가 있는 축소 블록 중 부채꼴(+블록 크기만큼 여유)에 걸치는 것만
+        bys, bxs = np.nonzero(coarse)
+        baz = block_az[bys, bxs]
+        slack = block_slack[bys, bxs] + g
+        near = ((np.abs((baz - dir1 + 540) % 360 - 180) <= slack) |
+                (np.abs((baz - dir2 + 540) % 360 - 180) <= slack))
+        bys, bxs = bys[near], bxs[near]
+
+        # 블록 단위로 전체 해상도 엣지 좌표 -> 미리 계산한 각도/반지름
+        k, iy, ix = np.nonzero(edges[:ch * f, :cw * f].reshape(ch, f, cw, f)[bys, :, bxs, :])
+        ys = bys[k] * f + iy
+        xs = bxs[k] * f + ix
+        az = pix_az[ys, xs]
+        r = pix_r[ys, xs]
+
+        pair = []
+        for d in (dir1, dir2):
+            # 부채꼴 전체로 한 번, 그 평균 주변 절반 폭으로 한 번 더 (부채꼴 가장자리의 다른 엣지 영향 줄이기)
+            for width in (g, g / 2):
+                off = (az - d + 540) % 360 - 180
+                sel = np.abs(off) <= width
+                weight = r[sel]
+                if len(weight) < min_points:
+                    return None
+                d = d + float(off[sel] @ weight / weight.sum())
+            pair.append(d % 360)
+        if abs(self._ang_diff(pair[0], pair[1]) - 120) > 6:
+            return None
+        return tuple(pair)
+
+    def _polar_tables(self, h, w, f):
+        """
+        (픽셀 각도, 픽셀 반지름, 축소 블록 중심 각도, 블록 여유 각도) 캐시
+        반지름 < 12 px 픽셀은 반지름 0 (가중치 0, 부채꼴 평균에서 빠짐), 그 안쪽 블록은 여유 -inf (안 봄)
+        """
+        key = (h, w, f)
+        if self._polar is None or self._polar[0] != key:
+            cx, cy = w // 2, h // 2
+            ys, xs = np.mgrid[:h, :w].astype(np.float32)
+            pix_r = np.hypot(xs - cx, ys - cy)
+            pix_az = np.degrees(np.arctan2(ys - cy, xs - cx)).astype(np.float32)
+            pix_r[pix_r < 12] = 0
+            ch, cw = h // f, w // f
+            bys, bxs = np.mgrid[:ch, :cw].astype(np.float32) * f + (f - 1) / 2
+            block_r = np.hypot(bxs - cx, bys - cy)
+            block_az = np.degrees(np.arctan2(bys - cy, bxs - cx)).astype(np.float32)
+            block_slack = np.degrees(f / np.maximum(block_r, 1.0)).astype(np.float32)
+            block_slack[block_r + f < 12] = -np.inf
+            self._polar = (key, (pix_az, pix_r, block_az, block_slack))
+        return self._polar[1]
+
+    def _hough_pair(self, edges, stamp, gate=None):
+        if gate is not None:
+            edges = self._gate_edges(edges, gate)
+        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=self.hough_threshold,
+                                minLineLength=self.hough_min_length, maxLineGap=self.hough_max_gap)
+        stamp(("hough", time.perf_counter_ns()))
+        perf = self.perf
+        if perf is not None:
+            perf.count("lines", 0 if lines is None else len(lines))
+        if lines is None:
+            return None
+
+        h, w = edges.shape[:2]
         center = (w // 2, h // 2)
 
         # 기존처럼 "중앙 주변만" 라인을 먼저 제한하고 싶으면 유지 가능
-        filtered_lines = self._filter_lines(lines, center, margin=90)
+        filtered_lines = self._filter_lines(lines, center, margin=self.line_margin)
+        stamp(("filter", time.perf_counter_ns()))
+        if perf is not None:
+            perf.count("filtered", len(filtered_lines))
         if len(filtered_lines) < 2:
             return None
 
         cands = self._candidates(filtered_lines, center)
+        if gate is not None:
+            # 부채꼴을 스치기만 한 선(다른 방향)은 후보에서 뺌
+            dir1, dir2, g = gate
+            keep = np.minimum(self._ang_diff_np(cands["az"], dir1), self._ang_diff_np(cands["az"], dir2)) <= g
+            cands = {k: v[keep] for k, v in cands.items()}
+        stamp(("candidates", time.perf_counter_ns()))
         reps = self._cluster_angles(cands, merge_deg=self.azimuth_threshold)
+        stamp(("cluster", time.perf_counter_ns()))
+        if perf is not None:
+            perf.count("reps", len(reps["az"]))
 
         pair = self._pick_pair_120(reps, prev_pair=self.prev_pair, target=120, tol=6)
-        if pair is None:
-            return None
-
-        middle = self._calculate_middle_azimuth(pair[0], pair[1])  # 기존 함수 유지
-        self.middle_ema = self._ang_ema(self.middle_ema, middle, self.ema_alpha)
-        self.prev_pair = pair
+        stamp(("pair", time.perf_counter_ns()))
+        return pair
 
-        return int(self.middle_ema)
+    def reset_tracking(self):
+        # 프레임 간 상태 초기화 (replay를 처음부터 다시 돌릴 때)
+        self.drain_pipeline()  # 진행 중인 버퍼 세트는 끝까지 받아서 비워둠
+        self.prev_pair = None
+        self.middle_ema = None
+        self.last_middle = None
+        self.last_confidence = 0.0
+        self.last_azimuth = None
+        self.stream.reset()
+        self._prev_sample = None
+        if self.tracker is not None:
+            self.tracker.reset()
 
     def _filter_lines(self, lines, center, margin):
         # 중앙+margin만큼의 범위에 직선의 중심이 존재하는 직선만
+        # lines: HoughLinesP 결과 (N, 1, 4) -> (M, 4)
         cx, cy = center
-        filtered = []
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            line_center_x = (x1 + x2) // 2
-            line_center_y = (y1 + y2) // 2
-            
-            if (cx - margin <= line_center_x <= cx + margin and
-                cy - margin <= line_center_y <= cy + margin):
-                filtered.append(line)
-        return filtered
+        lines = lines.reshape(-1, 4)
+        line_center_x = (lines[:, 0] + lines[:, 2]) // 2
+        line_center_y = (lines[:, 1] + lines[:, 3]) // 2
+
+        mask = ((cx - margin <= line_center_x) & (line_center_x <= cx + margin) &
+                (cy - margin <= line_center_y) & (line_center_y <= cy + margin))
+        return lines[mask]
 
     def _calculate_azimuths(self, lines, center):
         azimuths = []
@@ -218,3 +1019,25 @@ class AzimuthCaptureThread(QThread):
     def stop(self):
         self.running = False
         self.wait()
+        stats = self.change_stats()
+        if stats["frames"]:
+            print(f"[azimuth] unchanged frames skipped: {stats['skipped']}/{stats['frames']} "
+                  f"({stats['hit_rate']:.0%}), saved ~{stats['saved_edge_ms']:.0f} ms edge "
+                  f"+ {stats['saved_cpu_ms']:.0f} ms post-processing")
+            sched = self.scheduler.stats()
+            print(f"[azimuth] capture fps: {sched['achieved_fps']:.1f} (target {sched['target_fps']:.1f}), "
+                  f"deadline misses: {sched['deadline_misses']}/{sched['frames']}")
+        rejects = self.reject_stats
+        if rejects["frames"]:
+            print(f"[azimuth] implausible frames rejected from edge stats: {rejects['rejected']}/{rejects['frames']}, "
+                  f"saved ~{rejects['saved_cpu_ns'] / 1e6:.0f} ms post-processing")
+        if self.tracker is not None and self.tracker.counts["frames"]:
+            t = self.tracker.stats()
+            relock = "-" if t["relock_frames_mean"] is None else f"{t['relock_frames_mean']:.1f}"
+            print(f"[azimuth] tracking: locked {t['lock_ratio']:.0%} of frames, {t['locks']} locks / "
+                  f"{t['losses']} losses, relock after {relock} frames")
+        snap = self.perf_snapshot()
+        if snap is not None and "total" in snap["stages"]:
+            total = snap["stages"]["total"]
+            print(f"[azimuth] frame time p50 {total['p50']:.0f} us, p95 {total['p95']:.0f} us, "
+                  f"rejected {snap['rejected']}/{snap['frames']}")
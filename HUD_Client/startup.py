@@ -0,0 +1,16 @@
+"""
+시작 시간 측정: 이 모듈을 처음 import 한 시점(main.py 맨 위)부터 각 이벤트가 처음 일어날 때까지
+    startup.mark("first HUD paint")  -> [startup] first HUD paint: 412 ms
+"""
+import time
+
+PROCESS_START = time.perf_counter()
+marks = {}
+
+
+def mark(name):
+    """처음 호출될 때만 기록/출력, 경과 ms 반환"""
+    if name not in marks:
+        marks[name] = (time.perf_counter() - PROCESS_START) * 1000
+        print(f"[startup] {name}: {marks[name]:.0f} ms")
+    return marks[name]
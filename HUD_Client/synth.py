@@ -0,0 +1,189 @@
+"""
+정답 방위각이 있는 합성 미니맵 생성기 (calculate_angle 변형들의 정확도 확인용)
+
+    synth = MinimapSynth(**PRESETS["hard"], seed=1)
+    bgra = synth.render(137.0)            # 방위각 137도 미니맵
+    for bgra, azimuth in synth.frames(1000): ...     # 서로 무관한 방위각
+    for bgra, azimuth in synth.walk(1000): ...       # 연속으로 회전하는 시퀀스 (추적 확인용)
+    bgra = synth.render_screen("menu")    # 미니맵이 아닌 화면 (closed / menu / loading), 정답 없음
+
+    python synth.py out.npz --count 500 --preset hard   # replay.py 형식 (+ "azimuth" 정답 배열)
+    python synth.py seq.npz --walk --screens 0.1         # 연속 회전 + 10% 는 미니맵 아닌 화면 (정답 NaN), tuning.py 용
+
+- 방위각 기준은 calculate_angle 결과와 같음 (시야각 선 두 개 = 이미지 각도 azimuth-150, azimuth-30, y 아래 방향)
+- 배경: 흐릿한 지형 색 얼룩 / clutter: 길(선분), 아이콘(원), 글자 같은 작은 사각형 / 가운데 플레이어 화살표
+- noise: 가우시안 노이즈 표준편차, blur: 가우시안 blur sigma, color_shift: 선/배경 색을 채널별로 흔드는 폭
+"""
+import argparse
+
+import cv2
+import numpy as np
+
+PRESETS = {
+    "clean": dict(clutter=0, noise=0, blur=0.0, color_shift=0),
+    "default": dict(clutter=12, noise=8, blur=0.0, color_shift=30),
+    "hard": dict(clutter=30, noise=20, blur=0.5, color_shift=60),
+    # 엣지 검출은 선명한 경계(gpu_util.EDGE_MAG_MIN 이상)만 잡으므로 blur 0.8 정도부터 거의 못 찾음
+    "blurry": dict(clutter=12, noise=8, blur=1.0, color_shift=30),
+}
+
+
+# 미니맵 자리에 미니맵이 아닌 것이 보일 때 (닫힘: 어두운 게임 화면, 메뉴: 글자 목록, 로딩: 그라데이션 + 문구)
+SCREENS = ("closed", "menu", "loading")
+
+
+def draw_view_lines(img, azimuth, color, thickness=2, line_type=cv2.LINE_8):
+    """가운데에서 뻗는 시야각 선 두 개 (이미지 각도 azimuth-150, azimuth-30), img 는 BGR 또는 BGRA"""
+    h, w = img.shape[:2]
+    cx, cy = w // 2, h // 2
+    r = min(w, h) // 2 - 10
+    for deg in (azimuth - 150, azimuth - 30):
+        x = int(round(cx + r * np.cos(np.radians(deg))))
+        y = int(round(cy + r * np.sin(np.radians(deg))))
+        cv2.line(img, (cx, cy), (x, y), color, thickness, line_type)
+
+
+class MinimapSynth:
+    def __init__(self, w=298, h=260, clutter=12, noise=8, blur=0.0, color_shift=30, line_width=2, seed=0):
+        self.w, self.h = w, h
+        self.clutter = clutter
+        self.noise = noise
+        self.blur = blur
+        self.color_shift = color_shift
+        self.line_width = line_width
+        self.rng = np.random.default_rng(seed)
+        self._buf = np.empty((h, w, 4), dtype=np.uint8)
+        self._noise = np.empty((h, w, 3), dtype=np.float32)
+
+    def _background(self, bgr):
+        # 저해상도 난수를 키워서 지형 같은 얼룩 (어두운 녹/갈색 계열)
+        rng = self.rng
+        small = rng.integers(0, 60, size=(self.h // 16 + 2, self.w // 16 + 2, 3), dtype=np.uint8)
+        cv2.resize(small, (self.w, self.h), dst=bgr, interpolation=cv2.INTER_CUBIC)
+        base = np.array([40, 70, 60]) + rng.integers(-self.color_shift // 2 - 1, self.color_shift // 2 + 1, 3)
+        cv2.add(bgr, tuple(int(v) for v in np.clip(base, 0, 255)) + (0,), dst=bgr)
+
+    def _clutter(self, bgr):
+        rng = self.rng
+        for _ in range(self.clutter):
+            kind = rng.integers(3)
+            color = tuple(int(c) for c in rng.integers(60, 220, 3))
+            if kind == 0:
+                # 길: 중심을 지나지 않는 긴 선분
+                x1, x2 = rng.integers(0, self.w, 2)
+                y1, y2 = rng.integers(0, self.h, 2)
+                cv2.line(bgr, (int(x1), int(y1)), (int(x2), int(y2)), color, int(rng.integers(1, 4)))
+            elif kind == 1:
+                # 아이콘
+                x, y = rng.integers(0, self.w), rng.integers(0, self.h)
+                cv2.circle(bgr, (int(x), int(y)), int(rng.integers(3, 9)), color, -1 if rng.random() < 0.5 else 1)
+            else:
+                # 글자/라벨
+                x, y = rng.integers(0, self.w - 20), rng.integers(0, self.h - 8)
+                cv2.rectangle(bgr, (int(x), int(y)), (int(x + rng.integers(6, 20)), int(y + rng.integers(3, 8))), color, -1)
+
+    def render(self, azimuth, out=None):
+        """azimuth(도) 미니맵 BGRA (out 을 주면 거기에, 아니면 내부 버퍼를 덮어씀)"""
+        out = self._buf if out is None else out
+        rng = self.rng
+        bgr = np.empty((self.h, self.w, 3), dtype=np.uint8)
+        self._background(bgr)
+
+        self._clutter(bgr)
+
+        shift = rng.integers(-self.color_shift, self.color_shift + 1, 3) if self.color_shift else np.zeros(3, int)
+        color = tuple(int(v) for v in np.clip(np.array([235, 235, 235]) + shift, 0, 255))
+        draw_view_lines(bgr, azimuth, color, self.line_width, cv2.LINE_AA)
+
+        # 플레이어 화살표 (시야 방향 = azimuth-90)
+        cx, cy = self.w // 2, self.h // 2
+        head = np.radians(azimuth - 90)
+        pts = [(cx + 7 * np.cos(head + a), cy + 7 * np.sin(head + a)) for a in (0, 2.5, -2.5)]
+        cv2.fillConvexPoly(bgr, np.round(pts).astype(np.int32), (60, 200, 240))
+
+        if self.blur:
+            cv2.GaussianBlur(bgr, (0, 0), self.blur, dst=bgr)
+        if self.noise:
+            noise = self._noise
+            noise[:] = rng.standard_normal(noise.shape, dtype=np.float32)
+            noise *= self.noise
+            noise += bgr
+            np.clip(noise, 0, 255, out=noise)
+            bgr = noise.astype(np.uint8)
+
+        out[..., :3] = bgr
+        out[..., 3] = 255
+        return out
+
+    def render_screen(self, kind, out=None):
+        """미니맵이 아닌 화면 BGRA (kind: SCREENS 중 하나)"""
+        out = self._buf if out is None else out
+        rng = self.rng
+        bgr = np.empty((self.h, self.w, 3), dtype=np.uint8)
+        if kind == "closed":
+            # 미니맵 없이 어두운 지형이 그대로 보임
+            self._background(bgr)
+            cv2.GaussianBlur(bgr, (0, 0), 3, dst=bgr)
+        elif kind == "menu":
+            bgr[:] = (30, 28, 24)
+            for row in range(12, self.h - 4, 16):
+                color = tuple(int(c) for c in rng.integers(170, 250, 3))
+                text = "".join(chr(c) for c in rng.integers(65, 91, int(rng.integers(6, 16))))
+                cv2.putText(bgr, text, (int(rng.integers(4, 30)), row), cv2.FONT_HERSHEY_PLAIN, 0.9, color, 1)
+        elif kind == "loading":
+            bgr[:] = np.linspace(0, 70, self.w, dtype=np.float32)[None, :, None].astype(np.uint8)
+            cv2.putText(bgr, "Loading", (self.w // 2 - 60, self.h // 2 + 8), cv2.FONT_HERSHEY_SIMPLEX, 1.0,
+                        (220, 220, 220), 2, cv2.LINE_AA)
+        else:
+            raise ValueError(f"unknown screen: {kind}")
+        if self.noise:
+            noise = rng.standard_normal(bgr.shape, dtype=np.float32) * self.noise
+            bgr = np.clip(noise + bgr, 0, 255).astype(np.uint8)
+        out[..., :3] = bgr
+        out[..., 3] = 255
+        return out
+
+    def walk(self, count, max_step=8.0, out=None):
+        """
+        (bgra, 정답 방위각) 연속 시퀀스: 회전 속도(도/프레임)가 무작위로 조금씩 바뀌며 +-max_step 안에서 움직임
+        """
+        azimuth = float(self.rng.uniform(0, 360))
+        step = 0.0
+        for _ in range(count):
+            yield self.render(azimuth, out), azimuth
+            step = float(np.clip(step + self.rng.normal(0, 1.0), -max_step, max_step))
+            azimuth = (azimuth + step) % 360
+
+    def frames(self, count, out=None):
+        """(bgra, 정답 방위각) 을 count 번, 방위각은 0~360 균등 (bgra 는 다음 프레임에서 덮어써짐)"""
+        for _ in range(count):
+            azimuth = float(self.rng.uniform(0, 360))
+            yield self.render(azimuth, out), azimuth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out", help="저장할 .npz 경로")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--walk", action="store_true", help="서로 무관한 방위각 대신 연속 회전 시퀀스")
+    parser.add_argument("--screens", type=float, default=0.0, help="이 비율만큼 미니맵이 아닌 화면으로 바꿈 (정답 NaN)")
+    args = parser.parse_args()
+
+    synth = MinimapSynth(**PRESETS[args.preset], seed=args.seed)
+    frames = np.empty((args.count, synth.h, synth.w, 4), dtype=np.uint8)
+    truth = np.empty(args.count)
+    source = synth.walk(args.count) if args.walk else synth.frames(args.count)
+    for i, (bgra, azimuth) in enumerate(source):
+        if args.screens and synth.rng.random() < args.screens:
+            bgra = synth.render_screen(SCREENS[int(synth.rng.integers(len(SCREENS)))])
+            azimuth = np.nan
+        frames[i] = bgra
+        truth[i] = azimuth
+    np.savez_compressed(args.out, frames=frames, azimuth=truth)
+    print(f"saved: {args.out} ({args.count} frames, preset {args.preset})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+방위각 추적 (원 위 alpha-beta 필터: 각도 + 각속도)
+
+    tracker = AzimuthTracker()
+    dirs = tracker.gate(t)          # 잠금 상태면 예측한 시야각 선 두 방향 (이미지 각도), 아니면 None
+    ... dirs 주변 gate_deg 안에서만 선/봉우리 탐색 ...
+    angle = tracker.update(middle, t)   # 찾았으면 측정값으로 보정한 방위각
+    tracker.miss(t)                     # 못 찾았으면
+
+- 측정이 lock_after 번 연속으로 예측과 gate_deg 안에서 맞으면 잠금(lock)
+- 잠금 중에는 예측 주변만 탐색, lose_after 번 연속 못 찾으면 잠금 해제 -> 다시 전체 탐색
+- 방위각 기준은 calculate_angle 결과와 같음 (시야각 선 = 이미지 각도 azimuth-150, azimuth-30)
+"""
+
+
+def _wrap180(deg):
+    return (deg + 180) % 360 - 180
+
+
+class AzimuthTracker:
+    def __init__(self, alpha=0.6, beta=0.2, gate_deg=12, lock_after=2, lose_after=3, max_rate=720):
+        self.alpha = alpha
+        self.beta = beta
+        self.gate_deg = gate_deg
+        self.lock_after = lock_after
+        self.lose_after = lose_after
+        self.max_rate = max_rate  # deg/s, 튀는 측정 하나로 속도가 폭주하지 않게
+        self.reset()
+
+    def reset(self):
+        self.angle = None
+        self.rate = 0.0
+        self.t = None
+        self.locked = False
+        self.hits = 0
+        self.misses = 0
+        self.counts = {"frames": 0, "gated": 0, "full": 0, "locks": 0, "losses": 0}
+        self._lost_at = None  # 잠금을 잃은 프레임 번호
+        self.relock_frames = []  # 잠금을 잃고 다시 잡기까지 걸린 프레임 수
+
+    def predict(self, t):
+        if self.angle is None:
+            return None
+        dt = 0.0 if self.t is None else max(t - self.t, 0.0)
+        return (self.angle + self.rate * dt) % 360
+
+    def gate(self, t):
+        """잠금 중이면 (예측 선 방향 1, 선 방향 2, gate_deg), 아니면 None (전체 탐색)"""
+        self.counts["frames"] += 1
+        if not self.locked:
+            self.counts["full"] += 1
+            return None
+        self.counts["gated"] += 1
+        pred = self.predict(t)
+        return (pred - 150) % 360, (pred - 30) % 360, self.gate_deg
+
+    def update(self, measured, t):
+        """측정한 방위각(도)으로 상태 갱신 -> 필터링된 방위각"""
+        if self.angle is None:
+            self.angle, self.rate, self.t = measured % 360, 0.0, t
+            self.hits = 1
+            return self.angle
+
+        dt = max(t - self.t, 1e-6)
+        pred = (self.angle + self.rate * dt) % 360
+        residual = _wrap180(measured - pred)
+
+        if not self.locked and abs(residual) > self.gate_deg:
+            # 예측과 안 맞는 새 후보 -> 거기서 다시 시작
+            self.angle, self.rate, self.t = measured % 360, 0.0, t
+            self.hits = 1
+            return self.angle
+
+        self.angle = (pred + self.alpha * residual) % 360
+        self.rate += self.beta * residual / dt
+        self.rate = max(-self.max_rate, min(self.max_rate, self.rate))
+        self.t = t
+        self.misses = 0
+        self.hits += 1
+        if not self.locked and self.hits >= self.lock_after:
+            self.locked = True
+            self.counts["locks"] += 1
+            if self._lost_at is not None:
+                self.relock_frames.append(self.counts["frames"] - self._lost_at)
+                self._lost_at = None
+        return self.angle
+
+    def miss(self, t):
+        self.hits = 0
+        if not self.locked:
+            return
+        self.misses += 1
+        if self.misses >= self.lose_after:
+            self.locked = False
+            self.misses = 0
+            self.rate = 0.0
+            self.counts["losses"] += 1
+            self._lost_at = self.counts["frames"]
+
+    def stats(self):
+        counts = self.counts
+        frames = max(counts["frames"], 1)
+        relock = self.relock_frames
+        return {
+            **counts,
+            "locked": self.locked,
+            "lock_ratio": counts["gated"] / frames,
+            "relocks": len(relock),
+            "relock_frames_mean": sum(relock) / len(relock) if relock else None,
+        }
@@ -0,0 +1,213 @@
+"""
+정답 방위각이 있는 프레임으로 엣지/Hough 파라미터 찾기 (오차 vs 프레임당 시간 Pareto front)
+
+    python synth.py seq.npz --walk --count 600 --screens 0.1        # 정답 있는 프레임 (녹화 프레임 + "azimuth" 도 됨)
+    python tuning.py seq.npz                                          # 찾아서 conf.TUNING_PROFILE 에 저장
+    python tuning.py seq.npz --candidates 128 --max-us 800 --out my_profile.json --dry-run
+
+- 후보: 지금 기본값 + 무작위 (--candidates 개), 범위는 SPACE
+- successive halving: 앞쪽 --min-frames 장으로 전부 재고, (Pareto 순위, 오차) 상위 1/eta 만 eta 배 프레임으로 다시
+  --keep 개 이하로 줄면 남은 후보는 전체 프레임으로 -> 그 결과의 Pareto front 에서 고름
+- 평가는 프로세스 풀 (--workers), 후보마다 reset_tracking 후 프레임 순서대로 calculate_angle
+  (프레임 캡처 시각은 i / CAPTURE_MAX_FPS, 추적 필터가 켜져 있어도 후보끼리 같은 조건)
+  시간은 프로세스 CPU 시간 (워커끼리 코어를 나눠 써도 덜 흔들리게, cv2 스레드는 1개로)
+- 오차: 프레임마다 원형 차이 (못 찾음 / 미니맵이 아닌 프레임(정답 NaN)에서 방위각이 나옴 = MISS_PENALTY_DEG), 평균
+- 고르기: front 중 오차가 가장 작은 것, --max-us 를 주면 프레임당 시간이 그 이하인 것 중에서
+  (못 찾는 프레임은 Hough 후처리가 짧아서 "지금보다 느리지 않게" 로 고르면 대부분 놓치는 설정이 뽑힘)
+- 프로파일 JSON: {"params": {AzimuthCaptureThread.TUNABLE 속성: 값}, "metrics", "baseline", ...} (읽기/쓰기는 tuning_profile.py)
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from conf import CAPTURE_MAX_FPS, TUNING_PROFILE
+from tuning_profile import save_profile
+
+# 찾는 범위 (lo, hi, 종류), 엣지 범위는 gradient 크기 (중앙차분이라 최대 ~360)
+SPACE = {
+    "edge_mag_min": (120, 230, int),
+    "edge_mag_max": (240, 360, int),
+    "hough_threshold": (20, 70, int),
+    "hough_min_length": (4, 24, int),
+    "hough_max_gap": (2, 24, int),
+    "line_margin": (50, 130, int),
+    "azimuth_threshold": (3, 12, int),
+    "ema_alpha": (0.15, 1.0, float),
+}
+# hough 가 아니면 엣지 범위와 EMA 만 결과에 영향
+ESTIMATOR_PARAMS = {
+    "hough": tuple(SPACE),
+    "ring": ("edge_mag_min", "edge_mag_max", "ema_alpha"),
+    "theta": ("edge_mag_min", "edge_mag_max", "ema_alpha"),
+}
+MISS_PENALTY_DEG = 30.0
+
+
+def load_labeled(path):
+    """(프레임 리스트, 정답 방위각 배열) .npz 의 "frames" + "azimuth" (NaN = 미니맵 아님)"""
+    from capture import load_frames
+    with np.load(path) as archive:
+        if "azimuth" not in archive:
+            raise ValueError(f"{path}: no \"azimuth\" array (synth.py output or recorded frames + labels)")
+        truth = archive["azimuth"].astype(np.float64)
+    frames = load_frames(path)
+    if len(frames) != len(truth):
+        raise ValueError(f"{path}: {len(frames)} frames but {len(truth)} labels")
+    return frames, truth
+
+
+def sample_params(rng, base, names):
+    params = dict(base)
+    for name in names:
+        lo, hi, kind = SPACE[name]
+        params[name] = int(rng.integers(lo, hi + 1)) if kind is int else round(float(rng.uniform(lo, hi)), 3)
+    return params
+
+
+def pareto_ranks(points):
+    """(오차, 시간) 둘 다 작을수록 좋음 -> 0 = front, 1 = front 를 빼면 front, ..."""
+    points = np.asarray(points, dtype=np.float64)
+    ranks = np.full(len(points), -1)
+    rank = 0
+    left = np.arange(len(points))
+    while len(left):
+        p = points[left]
+        dominated = np.array([np.any(np.all(p <= q, axis=1) & np.any(p < q, axis=1)) for q in p])
+        ranks[left[~dominated]] = rank
+        left = left[dominated]
+        rank += 1
+    return ranks
+
+
+_worker = None
+
+
+def _init_worker(path, backend, estimator):
+    global _worker
+    import cv2
+    from gpu_util import GPUUtils
+    from screen_scan import AzimuthCaptureThread
+
+    cv2.setNumThreads(1)
+    frames, truth = load_labeled(path)
+    h, w = frames[0].shape[:2]
+    thread = AzimuthCaptureThread((0, 0, w, h), gpu_utils=GPUUtils(backend), profile=None)
+    thread.estimator = estimator
+    _worker = (thread, frames, truth)
+
+
+def _evaluate(params, count):
+    """앞쪽 count 프레임 -> {"error", "us", "found", "false"}"""
+    thread, frames, truth = _worker
+    thread.apply_tuning(params)
+    thread.reset_tracking()
+    thread.calculate_angle(frames[0])  # 워밍업 (OpenCL 은 엣지 범위가 바뀌면 다시 빌드)
+    thread.reset_tracking()
+    errors = np.empty(count)
+    found = false = 0
+    cpu_ns = 0
+    for i in range(count):
+        t0 = time.process_time_ns()
+        angle = thread.calculate_angle(frames[i], timestamp=i / CAPTURE_MAX_FPS)
+        cpu_ns += time.process_time_ns() - t0
+        if math.isnan(truth[i]):
+            errors[i] = 0.0 if angle is None else MISS_PENALTY_DEG
+            false += angle is not None
+        elif angle is None:
+            errors[i] = MISS_PENALTY_DEG
+        else:
+            d = abs(angle - truth[i]) % 360
+            errors[i] = min(d, 360 - d)
+            found += 1
+    return {"error": float(errors.mean()), "us": cpu_ns / count / 1000, "found": found, "false": false}
+
+
+def successive_halving(pool, candidates, n_frames, min_frames=30, eta=2, keep=8, verbose=True):
+    """
+    return: (남은 후보 인덱스, 전체 프레임 결과 리스트)
+    """
+    alive = list(range(len(candidates)))
+    budget = min(min_frames, n_frames)
+    while True:
+        results = list(pool.map(_evaluate, [candidates[i] for i in alive], [budget] * len(alive)))
+        if verbose:
+            best = min(r["error"] for r in results)
+            print(f"[tuning] {len(alive):>4} candidates x {budget:>5} frames  best error {best:.2f} deg")
+        if budget >= n_frames:
+            return alive, results
+        ranks = pareto_ranks([(r["error"], r["us"]) for r in results])
+        order = sorted(range(len(alive)), key=lambda k: (ranks[k], results[k]["error"]))
+        alive = [alive[k] for k in order[:max(len(alive) // eta, keep)]]
+        budget = n_frames if len(alive) <= keep else min(budget * eta, n_frames)
+
+
+def _fmt_params(params, names):
+    return " ".join(f"{name}={params[name]}" for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("frames", help="\"frames\" + \"azimuth\" 가 있는 .npz")
+    parser.add_argument("--candidates", type=int, default=64)
+    parser.add_argument("--min-frames", type=int, default=40, help="첫 단계에서 후보마다 보는 프레임 수")
+    parser.add_argument("--eta", type=int, default=2, help="단계마다 1/eta 만 남기고 프레임은 eta 배")
+    parser.add_argument("--keep", type=int, default=8, help="이만큼 남으면 전체 프레임으로")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--backend", default="numpy", help="엣지 백엔드 (gpu_util.EDGE_BACKENDS, 결과는 모두 같음)")
+    parser.add_argument("--estimator", choices=sorted(ESTIMATOR_PARAMS), default="hough")
+    parser.add_argument("--max-us", type=float, help="고를 때 프레임당 시간 상한 (기본: 없음)")
+    parser.add_argument("--out", default=TUNING_PROFILE)
+    parser.add_argument("--dry-run", action="store_true", help="front 만 보여주고 저장 안 함")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from gpu_util import GPUUtils
+    from screen_scan import AzimuthCaptureThread
+
+    n_frames = len(load_labeled(args.frames)[1])
+    names = ESTIMATOR_PARAMS[args.estimator]
+    base = AzimuthCaptureThread((0, 0, 1, 1), gpu_utils=GPUUtils("numpy"), profile=None).tuning_params()
+    rng = np.random.default_rng(args.seed)
+    candidates = [base] + [sample_params(rng, base, names) for _ in range(args.candidates - 1)]
+    candidates = [c for c in candidates if c["edge_mag_min"] < c["edge_mag_max"]]
+    print(f"[tuning] {args.frames}: {n_frames} frames, {len(candidates)} candidates, "
+          f"{args.workers} workers, {args.backend} / {args.estimator}")
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(args.frames, args.backend, args.estimator)) as pool:
+        alive, results = successive_halving(pool, candidates, n_frames, args.min_frames, args.eta, args.keep)
+        if 0 not in alive:  # 기본값은 비교용으로 항상 전체 프레임에서
+            alive.append(0)
+            results += pool.map(_evaluate, [base], [n_frames])
+    print(f"[tuning] done in {time.perf_counter() - t0:.1f} s")
+
+    baseline = results[alive.index(0)]
+    ranks = pareto_ranks([(r["error"], r["us"]) for r in results])
+    front = sorted((k for k in range(len(alive)) if ranks[k] == 0), key=lambda k: results[k]["us"])
+    max_us = math.inf if args.max_us is None else args.max_us
+    within = [k for k in front if results[k]["us"] <= max_us]
+    pick = min(within, key=lambda k: results[k]["error"]) if within else front[0]
+
+    print(f"{'':<2} {'error deg':>9} {'us/frame':>9} {'found':>6} {'false':>6}  params")
+    for k in sorted(range(len(alive)), key=lambda k: (ranks[k], results[k]["us"])):
+        r = results[k]
+        mark = "*" if k == pick else ("f" if ranks[k] == 0 else " ")
+        label = "(current defaults)" if alive[k] == 0 else _fmt_params(candidates[alive[k]], names)
+        print(f"{mark:<2} {r['error']:>9.2f} {r['us']:>9.0f} {r['found']:>6} {r['false']:>6}  {label}")
+    print("f = Pareto front, * = picked" + ("" if within else f" (nothing under {max_us:.0f} us, fastest on front)"))
+
+    if args.dry_run:
+        return
+    save_profile(args.out, candidates[alive[pick]], metrics=results[pick], baseline=baseline,
+                 frames=os.path.abspath(args.frames), count=n_frames, backend=args.backend,
+                 estimator=args.estimator, created=time.strftime("%Y-%m-%d %H:%M:%S"))
+    print(f"[tuning] saved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
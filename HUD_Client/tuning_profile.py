@@ -0,0 +1,79 @@
+"""
+tuning.py 가 저장한 파라미터 프로파일 읽기/쓰기 (실행 중에 import 해도 가볍게 표준 라이브러리만)
+
+    params = load_profile(TUNING_PROFILE)   # 검증된 {이름: 값}, 파일이 없거나 쓸 값이 없으면 None
+    save_profile(path, params, metrics=..., baseline=...)
+
+- 프로파일 JSON: {"params": {PARAMS 이름: 값}, 그 외 메타 정보}
+- 모르는 이름 / 타입이 안 맞는 값은 출력만 하고 건너뜀 (오래된 파일이나 손으로 고친 파일 때문에 HUD 가 죽지 않게)
+"""
+import json
+import os
+
+# AzimuthCaptureThread 에서 바꿀 수 있는 속성과 타입 (int 자리에 float 는 안 받음, float 자리에 int 는 받음)
+PARAMS = {
+    "edge_mag_min": int,
+    "edge_mag_max": int,
+    "hough_threshold": int,
+    "hough_min_length": int,
+    "hough_max_gap": int,
+    "line_margin": int,
+    "azimuth_threshold": int,
+    "ema_alpha": float,
+}
+
+
+def _valid(kind, value):
+    if isinstance(value, bool):
+        return False
+    if kind is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, int)
+
+
+def validate_params(params, source="tuning profile", current=None):
+    """
+    쓸 수 있는 값만 남긴 dict (건너뛴 것은 [azimuth] 로 출력)
+    current: 지금 값 dict, 프로파일에 엣지 범위 한쪽만 있을 때 다른 쪽과 비교용
+    """
+    if not isinstance(params, dict):
+        print(f"[azimuth] {source}: \"params\" is not an object, ignored")
+        return {}
+    valid = {}
+    for name, value in params.items():
+        kind = PARAMS.get(name)
+        if kind is None:
+            print(f"[azimuth] {source}: unknown parameter {name!r}, skipped")
+        elif not _valid(kind, value):
+            print(f"[azimuth] {source}: {name}={value!r} is not {kind.__name__}, skipped")
+        else:
+            valid[name] = kind(value)
+    current = current or {}
+    lo = valid.get("edge_mag_min", current.get("edge_mag_min"))
+    hi = valid.get("edge_mag_max", current.get("edge_mag_max"))
+    if lo is not None and hi is not None and lo >= hi:
+        print(f"[azimuth] {source}: edge_mag_min {lo} >= edge_mag_max {hi}, both skipped")
+        valid.pop("edge_mag_min", None)
+        valid.pop("edge_mag_max", None)
+    return valid
+
+
+def load_profile(path, current=None):
+    """프로파일의 검증된 params dict, 파일이 없거나 깨졌거나 쓸 값이 없으면 None (current: validate_params)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            params = json.load(f)["params"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"[azimuth] cannot read tuning profile {path}: {e}")
+        return None
+    return validate_params(params, f"tuning profile {path}", current) or None
+
+
+def save_profile(path, params, **meta):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"params": params, **meta}, f, indent=1)
+    os.replace(tmp, path)
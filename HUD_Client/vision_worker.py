@@ -0,0 +1,200 @@
+"""
+캡처 + 방위각 계산을 별도 프로세스에서 (GUI 프로세스의 GIL 경합 없이)
+
+    azimuth_thread = VisionProcessThread((x1, y1, x2, y2))   # AzimuthCaptureThread 대신
+    azimuth_thread.angle_signal.connect(...)
+    azimuth_thread.start()
+
+- 워커 프로세스: 캡처 소스 -> AzimuthCaptureThread.process_frame -> 결과 슬롯에 기록 (프레임 자체는 넘기지 않음)
+- 결과 슬롯: (방위각, 캡처 시각, 신뢰도, 프레임 번호, 속도) 를 seqlock 으로 기록 -> 락 없이 읽기
+  seq 가 홀수면 쓰는 중, 읽기 전후 seq 가 같아야 온전한 값
+- 워커가 슬롯에 쓴 뒤 세마포어를 올리면 GUI 프로세스의 VisionProcessThread 가 깨어나서 읽고 angle_signal 로 내보냄
+  (기다리는 동안 GIL 을 놓고 잠들어 있음, 밀린 알림은 한 번에 비우고 슬롯의 최신 값만 읽음)
+- 캡처 시각은 time.perf_counter() 기준 (같은 PC 에서는 프로세스 간에도 같은 시계)
+"""
+import math
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from azimuth_stream import SampleStream
+from conf import (
+    AZIMUTH_ESTIMATOR,
+    CAPTURE_BACKEND,
+    EDGE_BACKEND,
+    PERF_LOG_SEC,
+    SAMPLE_HEARTBEAT_SEC,
+    SAMPLE_MIN_DEG,
+    SAMPLE_MIN_RATE,
+)
+
+RESULT_FIELDS = ("azimuth", "timestamp", "confidence", "frame_index", "velocity")
+
+
+class SeqlockSlot:
+    """
+    buf 앞 8바이트 = seq(uint64), 그 뒤 = payload
+    쓰는 쪽은 한 프로세스만, 읽는 쪽은 여러 개여도 됨
+    """
+    def __init__(self, buf, payload_shape, payload_dtype):
+        self._seq = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=0)
+        self.payload = np.ndarray(payload_shape, dtype=payload_dtype, buffer=buf, offset=8)
+
+    @staticmethod
+    def nbytes(payload_shape, payload_dtype):
+        return 8 + int(np.prod(payload_shape)) * np.dtype(payload_dtype).itemsize
+
+    @property
+    def seq(self):
+        return int(self._seq[0])
+
+    def write(self, values):
+        seq = int(self._seq[0])
+        self._seq[0] = seq + 1  # 홀수: 쓰는 중
+        np.copyto(self.payload, values)
+        self._seq[0] = seq + 2
+
+    def read(self, out, last_seq=None):
+        """
+        out 에 복사하고 seq 반환, last_seq 와 같으면(새 값 없음) 복사 없이 그대로 반환
+        """
+        while True:
+            seq = int(self._seq[0])
+            if seq == last_seq:
+                return seq
+            if seq & 1:
+                continue
+            np.copyto(out, self.payload)
+            if int(self._seq[0]) == seq:
+                return seq
+
+
+def _make_source(spec, capture_rect):
+    # 워커 프로세스 안에서 소스 생성 (spec 은 pickle 가능한 (종류, kwargs))
+    from capture import FileSource, SyntheticSource, create_screen_source
+    if spec is None:
+        return create_screen_source(capture_rect, CAPTURE_BACKEND)
+    kind, kwargs = spec
+    if kind == "synthetic":
+        return SyntheticSource(**kwargs)
+    if kind == "file":
+        return FileSource(**kwargs)
+    raise ValueError(f"unknown source: {kind}")
+
+
+def _worker_main(capture_rect, source_spec, backend, estimator, profile, result_name, ready, stop_event):
+    from gpu_util import GPUUtils
+    from perf import summary_line
+    from screen_scan import AzimuthCaptureThread
+
+    # spawn 된 자식은 부모의 resource_tracker 를 같이 쓰므로 붙기만 하고 정리(unlink)는 부모가
+    result_shm = shared_memory.SharedMemory(name=result_name)
+    result_slot = SeqlockSlot(result_shm.buf, (len(RESULT_FIELDS),), np.float64)
+
+    source = _make_source(source_spec, capture_rect)
+    vision = AzimuthCaptureThread(capture_rect, gpu_utils=GPUUtils(backend), source=source, profile=profile)
+    vision.estimator = estimator
+    # 워커의 단계별 시간은 GUI 로 넘기지 않고 여기서 PERF_LOG_SEC 마다 한 줄 출력
+    next_log = time.perf_counter() + PERF_LOG_SEC if vision.perf is not None and PERF_LOG_SEC else None
+    try:
+        with source:
+            while not stop_event.is_set():
+                frame = source.grab()
+                if frame is None:
+                    break
+                angle = vision.process_frame(frame.bgra, frame.timestamp)
+                azimuth = math.nan if angle is None else vision.last_azimuth
+                velocity = math.nan if vision.tracker is None else vision.tracker.rate
+                result_slot.write((azimuth, frame.timestamp, vision.last_confidence, frame.index, velocity))
+                ready.release()
+                if next_log is not None and time.perf_counter() >= next_log:
+                    next_log += PERF_LOG_SEC
+                    print("[vision-worker] perf: " + summary_line(vision.perf.snapshot()))
+                stop_event.wait(vision.scheduler.frame_done(angle))
+    finally:
+        del result_slot  # numpy view 를 먼저 놓아야 close 가능
+        result_shm.close()
+
+
+class VisionProcessThread(QThread):
+    """
+    AzimuthCaptureThread 와 같은 angle_signal / sample_signal 을 내보내지만 실제 계산은 워커 프로세스에서
+    last_result: {"azimuth", "timestamp", "confidence", "frame_index", "received"} 마지막으로 받은 값
+    """
+    angle_signal = pyqtSignal(int)
+    sample_signal = pyqtSignal(object)
+
+    def __init__(self, capture_rect, parent=None, source_spec=None, backend=EDGE_BACKEND,
+                 estimator=AZIMUTH_ESTIMATOR, idle_timeout=0.1, profile=None):
+        super().__init__(parent)
+        self.capture_rect = capture_rect
+        self.source_spec = source_spec
+        self.backend = backend
+        self.estimator = estimator
+        self.idle_timeout = idle_timeout  # 새 값이 없을 때 종료/워커 상태를 확인하는 간격 (sec)
+        self.running = True
+        self.last_result = None
+        self.stream = SampleStream(SAMPLE_MIN_DEG, SAMPLE_MIN_RATE, SAMPLE_HEARTBEAT_SEC)
+
+        n_fields = len(RESULT_FIELDS)
+        self._result_shm = shared_memory.SharedMemory(
+            create=True, size=SeqlockSlot.nbytes((n_fields,), np.float64))
+        self._result_slot = SeqlockSlot(self._result_shm.buf, (n_fields,), np.float64)
+        self._result_slot.payload[:] = math.nan
+
+        ctx = mp.get_context("spawn")
+        self._ready = ctx.Semaphore(0)  # 워커가 결과를 쓸 때마다 +1
+        self._stop_event = ctx.Event()
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(capture_rect, source_spec, backend, estimator, profile, self._result_shm.name, self._ready,
+                  self._stop_event),
+            name="vision-worker",
+            daemon=True,
+        )
+
+    def start(self, *args):
+        self._process.start()
+        super().start(*args)
+
+    def run(self):
+        values = np.empty(len(RESULT_FIELDS), dtype=np.float64)
+        seq = self._result_slot.seq
+        ready = self._ready
+        while self.running and self._process.is_alive():
+            if not ready.acquire(timeout=self.idle_timeout):
+                continue
+            while ready.acquire(False):  # GUI 쪽이 밀렸으면 알림은 버리고 최신 값 하나만
+                pass
+            new_seq = self._result_slot.read(values, seq)
+            if new_seq == seq:
+                continue
+            seq = new_seq
+            azimuth, timestamp, confidence, frame_index, velocity = values.tolist()
+            self.last_result = {
+                "azimuth": None if math.isnan(azimuth) else int(azimuth),
+                "timestamp": timestamp,
+                "confidence": confidence,
+                "frame_index": int(frame_index),
+                "received": time.perf_counter(),
+            }
+            if not math.isnan(azimuth):
+                self.angle_signal.emit(int(azimuth))
+                sample = self.stream.push(azimuth, timestamp, confidence, None if math.isnan(velocity) else velocity)
+                if sample is not None:
+                    self.sample_signal.emit(sample)
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+        self._ready.release()  # 기다리는 중이면 바로 깨움
+        self.wait()
+        self._process.join(timeout=3)
+        if self._process.is_alive():
+            self._process.terminate()
+        del self._result_slot
+        self._result_shm.close()
+        self._result_shm.unlink()
@@ -6,9 +6,11 @@ from PyQt5.QtGui import QColor, QPainter, QPen, QFont, QPixmap, QFontDatabase
 from PyQt5.QtWidgets import QWidget, QLabel
 
 from draw_tools import draw_neon_line
+from azimuth_stream import Extrapolator
 from conf import(
     AZIMUTH_DURATION,
     LR_DURATION,
+    EXTRAPOLATE_MAX_SEC,
 )
 
 INF_LEFT = 1000  # 좌측 세로선 상단 x
@@ -264,6 +266,7 @@ class CompassWidget(QWidget):
         self.resize(250, 250)  # 크기 설정
         self._rotation = 0.0  # 회전 각도
         self.line_color = QColor(0, 255, 0, 127)  # 50% 투명한 초록색
+        self._extrapolator = Extrapolator(EXTRAPOLATE_MAX_SEC)
 
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -343,6 +346,16 @@ class CompassWidget(QWidget):
         self.compass_ani.start()
         self.rotation %= 360
 
+    def set_sample(self, sample, now):
+        """azimuth_stream.AzimuthSample 받기 (그리는 건 advance 에서)"""
+        self._extrapolator.push(sample, now)
+
+    def advance(self, now):
+        """화면 갱신 주기마다: 마지막 샘플에서 내다본 현재 방위각으로 회전 (애니메이션 없음)"""
+        value = self._extrapolator.value(now)
+        if value is not None and round(value, 1) != self._rotation:
+            self.rotation = value
+
     # 회전을 위한 프로퍼티
     @pyqtProperty(float)
     def rotation(self):
@@ -363,6 +376,7 @@ class AzimuthWidget(QWidget):
         self._azimuth = 0.0
         self.line_color = QColor(0, 255, 0, 255)  # 50% 투명한 초록색
         self.resize(100, 100)
+        self._extrapolator = Extrapolator(EXTRAPOLATE_MAX_SEC)
 
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -395,6 +409,15 @@ class AzimuthWidget(QWidget):
         self.azimuth_ani.start()
         self.azimuth %= 360
 
+    def set_sample(self, sample, now):
+        self._extrapolator.push(sample, now)
+
+    def advance(self, now):
+        # 표시는 정수라 정수가 바뀔 때만 다시 그림
+        value = self._extrapolator.value(now)
+        if value is not None and round(value) % 360 != round(self._azimuth) % 360:
+            self.azimuth = value
+
     @pyqtProperty(float)
     def azimuth(self):
         return round(self._azimuth, 1)
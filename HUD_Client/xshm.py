@@ -0,0 +1,273 @@
+"""
+X11 MIT-SHM 미니맵 캡처 (Linux)
+
+공유메모리 세그먼트 하나를 XImage 버퍼로 붙여두고, 매 프레임 XShmGetImage 로
+X 서버가 그 메모리에 직접 써넣게 함 -> 프레임마다 새 이미지 할당/복사 없음
+grab() 이 돌려주는 배열은 항상 같은 메모리를 보는 view
+
+Xvfb 에서도 동작 (예: Xvfb :99 -screen 0 1280x720x24 & DISPLAY=:99 python bench.py capture --source xshm)
+X 에러는 요청마다 _x_error 를 지우고 응답(XSync) 뒤에 확인 (지난 요청의 에러가 남아서 다음 요청 실패로 보이지 않게)
+
+    DISPLAY=:99 python xshm.py   # 스모크 테스트 (DISPLAY 가 없으면 건너뜀)
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+import time
+from ctypes import POINTER, Structure, byref, c_char_p, c_int, c_ubyte, c_uint, c_ulong, c_void_p
+
+import numpy as np
+
+from capture import CaptureSource, Frame
+
+ZPIXMAP = 2
+ALL_PLANES = 0xFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XImage(Structure):
+    # 앞부분 필드만 (포인터로만 다루므로 뒤쪽 함수 테이블은 생략)
+    _fields_ = [
+        ("width", c_int),
+        ("height", c_int),
+        ("xoffset", c_int),
+        ("format", c_int),
+        ("data", c_void_p),
+        ("byte_order", c_int),
+        ("bitmap_unit", c_int),
+        ("bitmap_bit_order", c_int),
+        ("bitmap_pad", c_int),
+        ("depth", c_int),
+        ("bytes_per_line", c_int),
+        ("bits_per_pixel", c_int),
+    ]
+
+
+class XShmSegmentInfo(Structure):
+    _fields_ = [
+        ("shmseg", c_ulong),
+        ("shmid", c_int),
+        ("shmaddr", c_void_p),
+        ("readOnly", c_int),
+    ]
+
+
+class XErrorEvent(Structure):
+    _fields_ = [
+        ("type", c_int),
+        ("display", c_void_p),
+        ("resourceid", c_ulong),
+        ("serial", c_ulong),
+        ("error_code", c_ubyte),
+        ("request_code", c_ubyte),
+        ("minor_code", c_ubyte),
+    ]
+
+
+# X 에러 핸들러는 프로세스에 하나뿐: 첫 open 때 바꾸고 마지막 close 때 원래 핸들러로 되돌림
+# 에러는 display 가 같은 소스에 기록, 콜백 객체는 모듈이 계속 들고 있음 (X 가 해제된 콜백을 부르지 않게)
+_open_sources = []
+_previous_handler = None
+
+
+def _on_x_error(display, event):
+    for source in _open_sources:
+        if source._display == display:
+            source._x_error = event.contents.error_code
+    return 0
+
+
+_ERROR_HANDLER = ctypes.CFUNCTYPE(c_int, c_void_p, POINTER(XErrorEvent))(_on_x_error)
+
+
+def _load(name):
+    path = ctypes.util.find_library(name)
+    if path is None:
+        raise RuntimeError(f"lib{name} not found")
+    return ctypes.CDLL(path)
+
+
+class XShmSource(CaptureSource):
+    """capture_rect = (x1, y1, x2, y2) 화면 좌표, 24/32bit TrueColor 화면만 (BGRX)"""
+    name = "xshm"
+
+    def __init__(self, capture_rect, display=None):
+        x1, y1, x2, y2 = capture_rect
+        self.x, self.y = x1, y1
+        self.w, self.h = x2 - x1, y2 - y1
+        self.display_name = display
+        self._display = None
+        self._image = None
+        self._shminfo = None
+        self._attached = False
+        self._view = None
+        self._index = 0
+        self._x_error = None
+
+    def _bind(self):
+        self._xlib = xlib = _load("X11")
+        self._xext = xext = _load("Xext")
+        self._libc = libc = ctypes.CDLL(None, use_errno=True)
+
+        xlib.XOpenDisplay.argtypes = [c_char_p]
+        xlib.XOpenDisplay.restype = c_void_p
+        xlib.XCloseDisplay.argtypes = [c_void_p]
+        xlib.XDefaultScreen.argtypes = [c_void_p]
+        xlib.XDefaultVisual.argtypes = [c_void_p, c_int]
+        xlib.XDefaultVisual.restype = c_void_p
+        xlib.XDefaultDepth.argtypes = [c_void_p, c_int]
+        xlib.XRootWindow.argtypes = [c_void_p, c_int]
+        xlib.XRootWindow.restype = c_ulong
+        xlib.XSync.argtypes = [c_void_p, c_int]
+        xlib.XDestroyImage.argtypes = [POINTER(XImage)]
+        xlib.XSetErrorHandler.argtypes = [c_void_p]
+        xlib.XSetErrorHandler.restype = c_void_p
+
+        xext.XShmQueryExtension.argtypes = [c_void_p]
+        xext.XShmCreateImage.argtypes = [c_void_p, c_void_p, c_uint, c_int, c_void_p,
+                                         POINTER(XShmSegmentInfo), c_uint, c_uint]
+        xext.XShmCreateImage.restype = POINTER(XImage)
+        xext.XShmAttach.argtypes = [c_void_p, POINTER(XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [c_void_p, POINTER(XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [c_void_p, c_ulong, POINTER(XImage), c_int, c_int, c_ulong]
+
+        libc.shmget.argtypes = [c_int, ctypes.c_size_t, c_int]
+        libc.shmat.argtypes = [c_int, c_void_p, c_int]
+        libc.shmat.restype = c_void_p
+        libc.shmdt.argtypes = [c_void_p]
+        libc.shmctl.argtypes = [c_int, c_int, c_void_p]
+
+    def open(self):
+        self._bind()
+        xlib, xext, libc = self._xlib, self._xext, self._libc
+
+        # 기본 X 에러 핸들러는 프로세스를 끝내버리므로 기록만 하는 핸들러로 교체
+        global _previous_handler
+        if not _open_sources:
+            _previous_handler = xlib.XSetErrorHandler(ctypes.cast(_ERROR_HANDLER, c_void_p))
+        _open_sources.append(self)
+
+        name = self.display_name.encode() if self.display_name else None
+        self._display = xlib.XOpenDisplay(name)
+        if not self._display:
+            self.close()
+            raise RuntimeError("cannot open X display (check $DISPLAY)")
+        try:
+            if not xext.XShmQueryExtension(self._display):
+                raise RuntimeError("X server has no MIT-SHM extension")
+
+            screen = xlib.XDefaultScreen(self._display)
+            self._root = xlib.XRootWindow(self._display, screen)
+            visual = xlib.XDefaultVisual(self._display, screen)
+            depth = xlib.XDefaultDepth(self._display, screen)
+
+            self._shminfo = XShmSegmentInfo()
+            self._image = xext.XShmCreateImage(self._display, visual, depth, ZPIXMAP, None,
+                                               byref(self._shminfo), self.w, self.h)
+            if not self._image:
+                raise RuntimeError("XShmCreateImage failed")
+            image = self._image.contents
+            if image.bits_per_pixel != 32:
+                raise RuntimeError(f"unsupported screen format: {image.bits_per_pixel} bpp")
+
+            size = image.bytes_per_line * image.height
+            shmid = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+            if shmid < 0:
+                raise OSError(ctypes.get_errno(), "shmget failed")
+            self._shminfo.shmid = shmid
+            addr = libc.shmat(shmid, None, 0)
+            if addr in (None, ctypes.c_void_p(-1).value):
+                libc.shmctl(shmid, IPC_RMID, None)
+                raise OSError(ctypes.get_errno(), "shmat failed")
+            self._shminfo.shmaddr = addr
+            self._shminfo.readOnly = 0
+            image.data = addr
+
+            self._x_error = None
+            xext.XShmAttach(self._display, byref(self._shminfo))
+            xlib.XSync(self._display, 0)
+            # 서버가 붙은 뒤에는 삭제 표시만 해둠 (프로세스가 죽어도 세그먼트가 남지 않게)
+            libc.shmctl(shmid, IPC_RMID, None)
+            if self._x_error is not None:
+                raise RuntimeError(f"XShmAttach failed (X error {self._x_error})")
+            self._attached = True
+
+            # 세그먼트 전체를 한 번만 numpy view 로 감싸둠 (행 끝 패딩은 잘라냄)
+            raw = (ctypes.c_ubyte * size).from_address(addr)
+            rows = np.frombuffer(raw, dtype=np.uint8).reshape(image.height, image.bytes_per_line // 4, 4)
+            self._view = rows[:, :self.w]
+            self._index = 0
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        xlib, xext, libc = getattr(self, "_xlib", None), getattr(self, "_xext", None), getattr(self, "_libc", None)
+        if self._attached:
+            self._x_error = None
+            xext.XShmDetach(self._display, byref(self._shminfo))
+            xlib.XSync(self._display, 0)
+            self._attached = False
+            if self._x_error is not None:
+                print(f"[capture] XShmDetach failed (X error {self._x_error})")
+        if self._shminfo is not None and self._shminfo.shmaddr:
+            libc.shmdt(self._shminfo.shmaddr)
+        if self._image:
+            self._image.contents.data = None  # 공유메모리는 shmdt 로 해제, XDestroyImage 가 free 하지 않게
+            xlib.XDestroyImage(self._image)
+        if self._display:
+            xlib.XCloseDisplay(self._display)
+        self._view = None
+        self._image = None
+        self._shminfo = None
+        self._display = None
+        if self in _open_sources:
+            _open_sources.remove(self)
+            if not _open_sources:
+                xlib.XSetErrorHandler(_previous_handler)
+
+    def grab(self):
+        # XShmGetImage 는 응답을 기다리는 요청이라 끝나면 이 요청의 에러도 핸들러에 도착해 있음 (XSync 필요 없음)
+        self._x_error = None
+        ok = self._xext.XShmGetImage(self._display, self._root, self._image, self.x, self.y, ALL_PLANES)
+        if not ok or self._x_error is not None:
+            raise RuntimeError(f"XShmGetImage failed (X error {self._x_error})")
+        t = time.perf_counter()
+        self._index += 1
+        return Frame(self._view, t, self._index - 1)
+
+
+def _smoke_test(frames=30):
+    """
+    실제 X 서버로: 열기 -> grab -> 화면 밖 영역 grab 은 실패 -> 다시 화면 안으로 옮기면 grab 성공 -> 닫기
+    (실패한 요청의 에러가 다음 grab 까지 남지 않는지 확인)
+    """
+    rect = (0, 0, 298, 260)
+    with XShmSource(rect) as source:
+        first = source.grab()
+        assert first.bgra.shape == (260, 298, 4), first.bgra.shape
+        for _ in range(frames):
+            frame = source.grab()
+        assert frame.index == frames, frame.index
+
+        source.x = 1 << 15  # 루트 창 밖 -> BadMatch
+        try:
+            source.grab()
+        except RuntimeError as e:
+            print(f"[capture] off-screen grab failed as expected: {e}")
+        else:
+            raise AssertionError("off-screen grab did not fail")
+        source.x = rect[0]
+        source.grab()
+    assert not _open_sources
+    print(f"[capture] xshm smoke test ok ({frames + 3} grabs)")
+
+
+if __name__ == "__main__":
+    if not os.environ.get("DISPLAY"):
+        print("[capture] DISPLAY is not set, xshm smoke test skipped")
+        sys.exit(0)
+    _smoke_test()